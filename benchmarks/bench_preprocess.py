@@ -0,0 +1,72 @@
+"""Benchmark panel-wide feature computation against the per-symbol loop.
+
+Generates synthetic minute bars (one trading session per day) for 10, 100
+and 1000 symbols and times ``preprocess.compute_features`` and
+``preprocess.compute_features_per_symbol`` on the same input, checking that
+both produce the same frame.
+
+Usage:
+    python -m benchmarks.bench_preprocess [--symbols 10 100 1000] [--days 5] [--repeat 3]
+"""
+
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from trading import preprocess
+
+
+def synthetic_bars(n_symbols: int, days: int, seed: int = 0) -> pd.DataFrame:
+    """Minute bars for ``n_symbols`` over ``days`` 375-minute sessions."""
+    rng = np.random.default_rng(seed)
+    sessions = [pd.date_range(pd.Timestamp("2024-01-01 03:45") + pd.Timedelta(days=d), periods=375, freq="1min")
+                for d in range(days)]
+    dates = sessions[0].append(sessions[1:]) if days > 1 else sessions[0]
+    n = len(dates)
+    close = 100 * (1 + rng.normal(0, 0.002, (n_symbols, n)).cumsum(axis=1))
+    return pd.DataFrame({
+        "timestamp": np.tile(dates, n_symbols),
+        "symbol": np.repeat([f"NSE:SYM{i:04d}-EQ" for i in range(n_symbols)], n),
+        "open": close.ravel(),
+        "high": close.ravel() * 1.001,
+        "low": close.ravel() * 0.999,
+        "close": close.ravel(),
+        "volume": rng.integers(100, 1000, n_symbols * n),
+    }).set_index(["timestamp", "symbol"]).sort_index()
+
+
+def best_of(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark panel-wide vs per-symbol feature computation")
+    parser.add_argument("--symbols", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--days", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    params = dict(
+        rsi_period=preprocess.settings.get("rsi_period", 14),
+        sma_fast_period=preprocess.settings.get("sma_fast_period", 10),
+        sma_slow_period=preprocess.settings.get("sma_slow_period", 20),
+    )
+    print(f"{'symbols':>8} {'bars':>10} {'per-symbol s':>13} {'panel s':>9} {'speedup':>8}")
+    for n in args.symbols:
+        raw = synthetic_bars(n, args.days)
+        panel = preprocess.compute_features(raw, **params)
+        loop = preprocess.compute_features_per_symbol(raw, **params)
+        pd.testing.assert_frame_equal(panel, loop.reset_index(drop=True), check_exact=False, rtol=1e-9)
+
+        t_loop = best_of(lambda: preprocess.compute_features_per_symbol(raw, **params), args.repeat)
+        t_panel = best_of(lambda: preprocess.compute_features(raw, **params), args.repeat)
+        print(f"{n:>8} {len(raw):>10} {t_loop:>13.3f} {t_panel:>9.3f} {t_loop / t_panel:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
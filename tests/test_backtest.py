@@ -109,5 +109,59 @@ class TestBacktestEngine(unittest.TestCase):
         import shutil
         shutil.rmtree(cls.test_data_dir)
 
+class TestVectorizedBacktest(unittest.TestCase):
+    def setUp(self):
+        """Build a two-symbol panel with one known crossover per symbol"""
+        dates = pd.date_range(start="2024-01-01", periods=60, freq="1h")
+        # TEST1 falls then rallies (bullish cross), TEST2 rallies then falls (bearish cross)
+        up_down = np.r_[np.linspace(120, 100, 30), np.linspace(100, 130, 30)]
+        down_up = np.r_[np.linspace(100, 120, 30), np.linspace(120, 90, 30)]
+        frames = []
+        for symbol, prices in (("TEST1", up_down), ("TEST2", down_up)):
+            frames.append(pd.DataFrame({
+                "timestamp": dates,
+                "symbol": symbol,
+                "open": prices,
+                "high": prices * 1.01,
+                "low": prices * 0.99,
+                "close": prices,
+                "volume": 1000
+            }))
+        self.data = pd.concat(frames).set_index(["timestamp", "symbol"]).sort_index()
+        
+        self.engine = BacktestEngine()
+        self.engine.settings = dict(self.engine.settings, sma_fast_period=3, sma_slow_period=6, notional_cap=10000)
+    
+    def test_result_structure(self):
+        """Vectorized mode returns the same result dict as the event loop"""
+        results = self.engine.run(self.data, mode="vectorized")
+        for key in ("performance_metrics", "trade_metrics", "portfolio_summary",
+                    "signals", "portfolio_values", "trades"):
+            self.assertIn(key, results)
+        self.assertEqual(len(results["portfolio_values"]), 60)
+        self.assertIsInstance(results["performance_metrics"]["total_return"], float)
+    
+    def test_crossover_fills(self):
+        """Each crossover becomes one sized fill at the bar's close"""
+        results = self.engine.run(self.data, mode="vectorized")
+        sides = {s["symbol"]: s["side"] for s in results["signals"]}
+        self.assertEqual(sides, {"TEST1": "BUY", "TEST2": "SELL"})
+        
+        first = results["signals"][0]
+        close = self.data.loc[(first["timestamp"], first["symbol"]), "close"]
+        self.assertEqual(abs(first["quantity"]), int(10000 / close))
+    
+    def test_mark_to_market(self):
+        """Final portfolio value equals cash plus positions at last close"""
+        results = self.engine.run(self.data, mode="vectorized")
+        last_prices = self.data.groupby(level="symbol")["close"].last().to_dict()
+        expected = self.engine.portfolio.get_total_value(last_prices)
+        self.assertAlmostEqual(results["portfolio_values"][-1]["value"], expected, places=6)
+    
+    def test_unknown_mode(self):
+        """Unknown modes are rejected"""
+        with self.assertRaises(ValueError):
+            self.engine.run(self.data, mode="bogus")
+
 if __name__ == "__main__":
     unittest.main() 
\ No newline at end of file
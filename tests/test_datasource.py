@@ -0,0 +1,261 @@
+import tempfile
+import threading
+import time
+import unittest
+import datetime as dt
+from pathlib import Path
+from unittest import mock
+import pandas as pd
+import numpy as np
+from trading import datasource
+from trading.barstore import BarStore
+from trading.backfill import backfill, chunk_range
+from trading.utils.ratelimit import TokenBucket
+
+class FakeFyers:
+    """Local stand-in for fyersModel.FyersModel.history."""
+
+    def __init__(self, symbols, now):
+        self.now = now
+        self.calls = []
+        minutes = pd.date_range(end=now + pd.Timedelta(hours=1), periods=3 * 24 * 60, freq="1min")
+        self.bars = {
+            sym: pd.DataFrame({
+                "timestamp": minutes,
+                "open": 100.0 + i,
+                "high": 101.0 + i,
+                "low": 99.0 + i,
+                "close": 100.0 + i + np.arange(len(minutes)) * 0.01,
+                "volume": 1000
+            })
+            for i, sym in enumerate(symbols)
+        }
+
+    def history(self, data):
+        start = pd.Timestamp(data["range_from"])
+        end = pd.Timestamp(data["range_to"]) + pd.Timedelta(days=1)
+        df = self.bars[data["symbol"]]
+        df = df[(df["timestamp"] >= start) & (df["timestamp"] < end) & (df["timestamp"] <= self.now)]
+        self.calls.append({"symbol": data["symbol"], "range_from": data["range_from"], "candles": len(df)})
+        if df.empty:
+            return {"s": "no_data", "candles": []}
+        candles = [
+            [int(ts.timestamp()), o, h, l, c, v]
+            for ts, o, h, l, c, v in df.itertuples(index=False)
+        ]
+        return {"s": "ok", "candles": candles}
+
+class TestDeltaFetch(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.symbols = ["NSE:TEST1-EQ", "NSE:TEST2-EQ"]
+        self.fake = FakeFyers(self.symbols, pd.Timestamp.now().floor("min") - pd.Timedelta(minutes=10))
+        patches = [
+            mock.patch.object(datasource, "_get_fyers_client", return_value=self.fake),
+            mock.patch.object(datasource, "RAW_DIR", self.root / "raw"),
+        ]
+        (self.root / "raw").mkdir()
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def fetch(self, store):
+        return datasource.fetch(self.symbols, lookback_hours=24, store=store)
+
+    def test_second_fetch_requests_only_tail(self):
+        """After the first run only bars newer than the stored tail are transferred"""
+        store = BarStore(self.root / "bars")
+        first = self.fetch(store)
+        first_candles = sum(c["candles"] for c in self.fake.calls)
+
+        self.fake.calls.clear()
+        self.fake.now += pd.Timedelta(minutes=5)
+        second = self.fetch(store)
+
+        self.assertEqual(len(self.fake.calls), len(self.symbols))
+        self.assertLess(sum(c["candles"] for c in self.fake.calls), first_candles)
+        for sym in self.symbols:
+            self.assertEqual(store.last_timestamp(sym), self.fake.now)
+            self.assertEqual(len(second.xs(sym, level="symbol")) - len(first.xs(sym, level="symbol")), 5)
+
+    def test_cached_window_matches_full_fetch(self):
+        """Merged store contents equal a fresh uncached fetch of the same window"""
+        store = BarStore(self.root / "bars")
+        self.fetch(store)
+        self.fake.now += pd.Timedelta(minutes=3)
+        cached = self.fetch(store)
+        fresh = self.fetch(BarStore(self.root / "fresh"))
+        pd.testing.assert_frame_equal(cached, fresh, check_dtype=False)
+
+    def test_store_reloads_index(self):
+        """The last timestamp survives reopening the store"""
+        store = BarStore(self.root / "bars")
+        self.fetch(store)
+        reopened = BarStore(self.root / "bars")
+        self.assertEqual(reopened.last_timestamp(self.symbols[0]), self.fake.now)
+        self.assertEqual(reopened.symbols(), sorted(self.symbols))
+
+class TestBarStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.store = BarStore(Path(self.tmp.name))
+
+    def bars(self, minutes, close):
+        return pd.DataFrame({
+            "timestamp": pd.date_range("2024-01-01 09:15", periods=minutes, freq="1min"),
+            "open": 100.0, "high": 101.0, "low": 99.0, "close": close, "volume": 10
+        })
+
+    def test_forming_minute_is_replaced(self):
+        """A refetched last minute overwrites the partial bar stored earlier"""
+        partial = self.bars(3, 100.0)
+        partial.loc[2, ["close", "volume"]] = [100.5, 4]
+        self.assertEqual(self.store.merge("NSE:TEST-EQ", partial), 3)
+
+        final = self.bars(5, 100.0).iloc[2:]
+        self.assertEqual(self.store.merge("NSE:TEST-EQ", final), 2)
+        stored = self.store.load("NSE:TEST-EQ")
+        self.assertEqual(len(stored), 5)
+        self.assertTrue(stored["timestamp"].is_unique)
+        self.assertEqual(stored.loc[2, "close"], 100.0)
+        self.assertEqual(stored.loc[2, "volume"], 10)
+        self.assertEqual(BarStore(Path(self.tmp.name)).index["NSE:TEST-EQ"]["rows"], 5)
+
+class SlowFyers:
+    """Fake history endpoint with fixed latency that throttles chosen symbols once."""
+
+    def __init__(self, latency=0.05, throttle=()):
+        self.latency = latency
+        self.throttle = set(throttle)
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def history(self, data):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.latency)
+        with self.lock:
+            self.in_flight -= 1
+            if data["symbol"] in self.throttle:
+                self.throttle.discard(data["symbol"])
+                return {"s": "error", "code": 429, "message": "request limit reached"}
+        if data["symbol"].endswith("BAD"):
+            return {"s": "error", "code": -300, "message": "invalid symbol"}
+        return {"s": "ok", "candles": [[1704067200, 1.0, 1.0, 1.0, 1.0, 10]]}
+
+class TestConcurrentFetch(unittest.TestCase):
+    def setUp(self):
+        now = dt.datetime(2024, 1, 2)
+        self.requests = [(f"NSE:S{i}-EQ", now - dt.timedelta(days=1), now) for i in range(20)]
+
+    def test_bounded_concurrency(self):
+        """Requests overlap but never exceed max_workers in flight"""
+        fake = SlowFyers(latency=0.05)
+        t0 = time.perf_counter()
+        results = datasource.fetch_many(fake, self.requests, max_workers=5)
+        elapsed = time.perf_counter() - t0
+
+        self.assertEqual([r.symbol for r in results], [r[0] for r in self.requests])
+        self.assertTrue(all(r.status == "ok" and r.rows == 1 for r in results))
+        self.assertLessEqual(fake.max_in_flight, 5)
+        self.assertLess(elapsed, 20 * 0.05 / 2)
+
+    def test_throttle_retry_and_failures(self):
+        """Throttled symbols are retried; hard failures come back as error results"""
+        fake = SlowFyers(latency=0.0, throttle={"NSE:S3-EQ"})
+        requests = self.requests[:5] + [("NSE:BAD", *self.requests[0][1:])]
+        results = datasource.fetch_many(fake, requests, max_workers=4, backoff_seconds=0.001)
+        by_symbol = {r.symbol: r for r in results}
+
+        self.assertEqual(by_symbol["NSE:S3-EQ"].status, "ok")
+        self.assertEqual(by_symbol["NSE:S3-EQ"].attempts, 2)
+        self.assertEqual(by_symbol["NSE:BAD"].status, "error")
+        self.assertIn("invalid symbol", by_symbol["NSE:BAD"].error)
+        self.assertNotIn("data", by_symbol["NSE:BAD"].to_dict())
+
+class TestTokenBucket(unittest.TestCase):
+    def test_rate_limit(self):
+        """A drained bucket refills at the configured rate"""
+        clock = [0.0]
+        bucket = TokenBucket(rate=10, capacity=2, clock=lambda: clock[0],
+                             sleep=lambda s: clock.__setitem__(0, clock[0] + s))
+        self.assertTrue(bucket.try_acquire())
+        self.assertTrue(bucket.try_acquire())
+        self.assertFalse(bucket.try_acquire())
+
+        waited = bucket.acquire()
+        self.assertAlmostEqual(waited, 0.1)
+        clock[0] += 0.05
+        self.assertFalse(bucket.try_acquire())
+        clock[0] += 0.05
+        self.assertTrue(bucket.try_acquire())
+
+class DailyFyers:
+    """Fake history endpoint with one bar per day; fails given (symbol, range_from) once."""
+
+    def __init__(self, fail_from=()):
+        self.fail_from = set(fail_from)
+        self.calls = []
+
+    def history(self, data):
+        self.calls.append((data["symbol"], data["range_from"], data["range_to"]))
+        key = (data["symbol"], data["range_from"])
+        if key in self.fail_from:
+            self.fail_from.discard(key)
+            return {"s": "error", "code": 500, "message": "internal error"}
+        days = pd.date_range(data["range_from"], data["range_to"], freq="D") + pd.Timedelta(hours=4)
+        return {"s": "ok", "candles": [[int(ts.timestamp()), 1.0, 1.0, 1.0, 1.0, 10] for ts in days]}
+
+class TestBackfill(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = BarStore(Path(self.tmp.name))
+        self.start, self.end = dt.date(2024, 1, 1), dt.date(2024, 12, 31)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_chunk_range(self):
+        """Chunks tile the range without gaps or overlap"""
+        chunks = chunk_range(self.start, self.end, 60)
+        self.assertEqual(chunks[0][0], self.start)
+        self.assertEqual(chunks[-1][1], self.end)
+        self.assertTrue(all((b - a).days < 60 for a, b in chunks))
+        self.assertTrue(all(n[0] - p[1] == dt.timedelta(days=1) for p, n in zip(chunks, chunks[1:])))
+
+    def test_resume_after_failure(self):
+        """A failed chunk is retried on the next run and nothing else is refetched"""
+        symbols = ["NSE:TEST1-EQ", "NSE:TEST2-EQ"]
+        fake = DailyFyers(fail_from={(sym, "2024-03-01") for sym in symbols})
+        first = backfill(self.start, self.end, symbols, store=self.store, chunk_days=60, fyers=fake)
+        self.assertEqual(first["failed"], 2)
+        self.assertEqual(first["fetched"], first["chunks"] - 2)
+
+        fake.calls.clear()
+        second = backfill(self.start, self.end, symbols, store=self.store, chunk_days=60, fyers=fake)
+        self.assertEqual(second["failed"], 0)
+        self.assertEqual(len(fake.calls), 2)
+        for sym in symbols:
+            history = self.store.load(sym)
+            self.assertEqual(len(history), 366)
+            self.assertTrue(history["timestamp"].is_unique)
+            self.assertTrue(history["timestamp"].is_monotonic_increasing)
+
+    def test_one_upsert_per_symbol(self):
+        """All chunks of a symbol are written with a single upsert"""
+        symbols = ["NSE:TEST1-EQ", "NSE:TEST2-EQ"]
+        with mock.patch.object(self.store, "upsert", wraps=self.store.upsert) as upsert:
+            summary = backfill(self.start, self.end, symbols, store=self.store, chunk_days=30, fyers=DailyFyers())
+        self.assertEqual(summary["fetched"], summary["chunks"])
+        self.assertEqual(sorted(c.args[0] for c in upsert.call_args_list), symbols)
+        self.assertEqual(summary["bars_added"], 2 * 366)
+
+if __name__ == "__main__":
+    unittest.main()
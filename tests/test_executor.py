@@ -0,0 +1,164 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+import pandas as pd
+import yaml
+from trading import executor, orders
+from trading.broker import fyers, mock as mock_broker
+from trading.intelligence.rules import Signal
+
+def signals(n):
+    ts = pd.Timestamp("2024-01-01 10:00")
+    return [Signal(symbol=f"NSE:TEST{i}-EQ", side="BUY" if i % 2 else "SELL", confidence=0.6, timestamp=ts,
+                   price=100.0)
+            for i in range(n)]
+
+class TestExecutor(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.config_dir = Path(self.tmp.name)
+        self.write_settings("mock")
+        for p in [mock.patch.object(executor, "CONFIG_DIR", self.config_dir),
+                  mock.patch.object(mock_broker, "DB_PATH", self.config_dir / "orders.sqlite")]:
+            p.start()
+            self.addCleanup(p.stop)
+        executor.reset()
+        self.addCleanup(executor.reset)
+
+    def write_settings(self, broker, **settings):
+        with open(self.config_dir / "settings.yaml", "w") as f:
+            yaml.safe_dump({"broker": broker, **settings}, f)
+
+    def test_batch_through_persistent_broker(self):
+        """One broker session serves every call and a batch is one place_orders call"""
+        broker = executor._get_broker()
+        with mock.patch.object(broker, "place_orders", wraps=broker.place_orders) as place:
+            responses = executor.execute(signals(5))
+            executor.execute(signals(2))
+        self.assertIs(executor._get_broker(), broker)
+        self.assertEqual(place.call_count, 2)
+        self.assertEqual([o["symbol"] for o in place.call_args_list[0].args[0]], [s.symbol for s in signals(5)])
+        self.assertEqual([r["status"] for r in responses], ["ok"] * 5)
+        self.assertEqual(len({r["id"] for r in responses}), 5)
+        self.assertEqual(executor.execute([]), [])
+
+    def test_concurrent_fallback(self):
+        """Brokers without a multi-order endpoint get concurrent single orders, results in order"""
+        class SingleOrderBroker:
+            def place_order(self, symbol, side, qty=1, price=None):
+                if symbol.endswith("3-EQ"):
+                    raise RuntimeError("rejected")
+                return {"status": "ok", "symbol": symbol}
+
+        with mock.patch.object(executor, "_get_broker", return_value=SingleOrderBroker()):
+            responses = executor.execute(signals(6))
+        self.assertEqual(responses[3], {"status": "error", "message": "rejected"})
+        self.assertEqual([r.get("symbol") for i, r in enumerate(responses) if i != 3],
+                         [s.symbol for i, s in enumerate(signals(6)) if i != 3])
+
+    def test_broker_follows_settings(self):
+        """Changing the broker setting replaces the session"""
+        first = executor._get_broker()
+        self.write_settings("other")
+        stat = (self.config_dir / "settings.yaml").stat()
+        os.utime(self.config_dir / "settings.yaml", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertIsNot(executor._get_broker(), first)
+
+    def test_submit_through_order_manager(self):
+        """submit queues orders on the shared manager; the mock broker fills them on reconcile"""
+        placed = executor.submit(signals(4))
+        manager = executor.get_order_manager()
+        self.assertIs(manager.broker, executor._get_broker())
+        self.assertTrue(manager.book.wait([o.order_id for o in placed], statuses={orders.SUBMITTED}, timeout=5))
+        manager.reconcile()
+        self.assertEqual({o.status for o in placed}, {orders.FILLED})
+        self.assertEqual(manager.book.position("NSE:TEST1-EQ"), 1)
+        self.assertEqual(manager.book.position("NSE:TEST0-EQ"), -1)
+
+    def test_cancelled_order_frees_reservation(self):
+        """An order cancelled after the broker acknowledged it hands its reservation back"""
+        self.write_settings("mock", position_limit=2, notional_cap=1000)
+        buy = Signal("NSE:A-EQ", "BUY", 0.6, pd.Timestamp("2024-01-01"), price=100.0)
+        order, = executor.submit([buy])
+        manager = executor.get_order_manager()
+        self.assertTrue(manager.book.wait([order.order_id], statuses={orders.SUBMITTED}, timeout=5))
+        risk = executor.get_risk_engine()
+        self.assertEqual((risk.positions["NSE:A-EQ"], risk.notional), (1, 100.0))
+        manager.book.apply_updates([{"id": order.broker_id, "status": orders.CANCELLED}])
+        self.assertEqual((risk.positions["NSE:A-EQ"], risk.notional), (0, 0.0))
+
+    def test_risk_checks_before_broker(self):
+        """Orders beyond the limits are rejected before the broker; broker rejections free their reservation"""
+        self.write_settings("mock", position_limit=2, notional_cap=450)
+        buys = [Signal(symbol="NSE:A-EQ", side="BUY", confidence=0.6, timestamp=pd.Timestamp("2024-01-01"),
+                       price=100.0)] * 3
+        responses = executor.execute(buys)
+        self.assertEqual([r["status"] for r in responses], ["ok", "ok", "rejected"])
+        self.assertIn("position limit", responses[2]["message"])
+        risk = executor.get_risk_engine()
+        self.assertEqual((risk.positions["NSE:A-EQ"], risk.notional), (2, 200.0))
+
+        with mock.patch.object(executor._get_broker(), "place_orders",
+                               return_value=[{"status": "error", "message": "down"}]):
+            executor.execute([Signal("NSE:B-EQ", "SELL", 0.6, pd.Timestamp("2024-01-01"), price=200.0)])
+        self.assertEqual((risk.positions["NSE:B-EQ"], risk.notional), (0, 200.0))
+        responses = executor.execute([Signal("NSE:B-EQ", "SELL", 0.6, pd.Timestamp("2024-01-01"), price=300.0)])
+        self.assertIn("notional cap", responses[0]["message"])
+
+        # A new session rebuilds the counters from the recorded orders
+        executor.reset()
+        self.assertEqual(executor.get_risk_engine().positions, {"NSE:A-EQ": 2})
+        self.assertEqual(executor.get_risk_engine().notional, 200.0)
+
+    def test_raising_broker_frees_reservations(self):
+        """A batch submission that raises fails every order and releases what was reserved"""
+        self.write_settings("mock", position_limit=5, notional_cap=1000)
+        risk = executor.get_risk_engine()
+        signals = [Signal("NSE:A-EQ", "BUY", 0.6, pd.Timestamp("2024-01-01"), price=100.0),
+                   Signal("NSE:B-EQ", "SELL", 0.6, pd.Timestamp("2024-01-01"), price=200.0)]
+        with mock.patch.object(executor._get_broker(), "place_orders",
+                               side_effect=ConnectionError("connection reset")):
+            responses = executor.execute(signals)
+        self.assertEqual([r["status"] for r in responses], ["error", "error"])
+        self.assertIn("connection reset", responses[0]["message"])
+        self.assertEqual((risk.positions.get("NSE:A-EQ", 0), risk.positions.get("NSE:B-EQ", 0), risk.notional),
+                         (0, 0, 0.0))
+
+class TestFyersBasket(unittest.TestCase):
+    def test_chunks_and_maps_responses(self):
+        """Orders go out in baskets of BASKET_SIZE; each order gets its own response"""
+        client = mock.Mock()
+        client.place_basket_orders.side_effect = [
+            {"s": "ok", "data": [{"statusCode": 200, "body": {"s": "ok", "id": str(i)}} for i in range(10)]},
+            {"s": "error", "message": "basket rejected"},
+        ]
+        broker = fyers.FyersBroker.__new__(fyers.FyersBroker)
+        broker.client = client
+        orders = [{"symbol": s.symbol, "side": s.side, "qty": 1} for s in signals(12)]
+        responses = broker.place_orders(orders)
+        self.assertEqual(client.place_basket_orders.call_count, 2)
+        self.assertEqual(len(client.place_basket_orders.call_args_list[0].args[0]), 10)
+        self.assertEqual([r["id"] for r in responses[:10]], [str(i) for i in range(10)])
+        self.assertEqual(responses[10:], [{"s": "error", "message": "basket rejected"}] * 2)
+        self.assertEqual(client.place_basket_orders.call_args_list[1].args[0][0]["side"], -1)
+
+    def test_order_statuses(self):
+        """Expired orders are cancelled and unknown status codes are skipped"""
+        client = mock.Mock()
+        client.orderbook.return_value = {"orderBook": [
+            {"id": "1", "status": 6, "filledQty": 2, "tradedPrice": 10.0},
+            {"id": "2", "status": 7, "filledQty": 0},
+            {"id": "3", "status": 99, "filledQty": 0},
+            {"id": "4", "status": 2, "filledQty": 1},
+        ]}
+        broker = fyers.FyersBroker.__new__(fyers.FyersBroker)
+        broker.client = client
+        with self.assertLogs(fyers.logger, "WARNING"):
+            updates = broker.order_statuses(["1", "2", "3"])
+        self.assertEqual([(u["id"], u["status"]) for u in updates], [("1", "PARTIAL"), ("2", "CANCELLED")])
+
+if __name__ == "__main__":
+    unittest.main()
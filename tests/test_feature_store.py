@@ -0,0 +1,143 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+import pandas as pd
+import numpy as np
+from trading import indicators, preprocess
+from trading.feature_store import FeatureStore
+
+class TestFeatureStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = FeatureStore(Path(self.tmp.name) / "store", version="test")
+        rng = np.random.default_rng(8)
+        dates = pd.date_range("2024-01-01 03:45", periods=1500, freq="1min")
+        frames = []
+        for symbol in ["TEST1", "TEST2", "TEST3"]:
+            close = 100 * (1 + rng.normal(0, 0.002, len(dates)).cumsum())
+            frames.append(pd.DataFrame({
+                "timestamp": dates, "symbol": symbol, "open": close, "high": close * 1.001,
+                "low": close * 0.999, "close": close, "volume": rng.integers(100, 1000, len(dates))
+            }))
+        self.raw = pd.concat(frames).set_index(["timestamp", "symbol"]).sort_index()
+        self.computed_symbols = []
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def compute(self, raw):
+        flat = raw.reset_index() if "symbol" not in raw.columns else raw
+        self.computed_symbols.append(sorted(flat["symbol"].unique()))
+        return preprocess.compute_features(raw, rsi_period=5, sma_fast_period=3, sma_slow_period=6)
+
+    def test_reuses_unchanged_blocks(self):
+        """A repeat run is served from the store; a changed symbol alone is recomputed"""
+        expected = self.compute(self.raw)
+        first, computed = self.store.get_or_compute(self.raw, self.compute, {"p": 1})
+        self.assertEqual(computed, 3)
+        pd.testing.assert_frame_equal(first, expected)
+
+        second, computed = self.store.get_or_compute(self.raw, self.compute, {"p": 1})
+        self.assertEqual(computed, 0)
+        pd.testing.assert_frame_equal(second, expected)
+
+        changed = self.raw.copy()
+        changed.loc[(changed.index[-1][0], "TEST2"), "close"] += 1
+        self.computed_symbols.clear()
+        third, computed = self.store.get_or_compute(changed, self.compute, {"p": 1})
+        self.assertEqual(self.computed_symbols, [["TEST2|2024-01-02T00:00:00"]])  # only its last block
+        pd.testing.assert_frame_equal(third, self.compute(changed))
+
+        # Different parameters never hit blocks computed under others
+        _, computed = self.store.get_or_compute(self.raw, self.compute, {"p": 2})
+        self.assertEqual(computed, 3)
+
+    def test_shifted_window_reuses_blocks(self):
+        """A window moved forward hits the blocks with a full warm-up and matches a plain computation"""
+        rng = np.random.default_rng(3)
+        dates = pd.date_range("2024-01-01", periods=12 * 24 * 60, freq="1min")
+        close = 100 * (1 + rng.normal(0, 0.002, len(dates)).cumsum())
+        raw = pd.DataFrame({
+            "timestamp": dates, "symbol": "TEST1", "open": close, "high": close * 1.001,
+            "low": close * 0.999, "close": close, "volume": 500
+        }).set_index(["timestamp", "symbol"])
+        nodes = indicators.plan(["rsi", "sma_fast", "sma_slow"],
+                                {"rsi_period": 5, "sma_fast_period": 3, "sma_slow_period": 6})
+        store = FeatureStore(Path(self.tmp.name) / "shifted", version="test",
+                             warmup={"1h": indicators.warmup_bars(nodes)})
+
+        def window(start):
+            start = pd.Timestamp(start)
+            return raw[(raw.index.get_level_values("timestamp") >= start) &
+                       (raw.index.get_level_values("timestamp") < start + pd.Timedelta(days=10))]
+
+        store.get_or_compute(window("2024-01-01 00:00"), self.compute, {"p": 1})
+        self.computed_symbols.clear()
+        shifted, computed = store.get_or_compute(window("2024-01-01 00:30"), self.compute, {"p": 1})
+        self.assertEqual(computed, 1)
+        # Blocks short of their warm-up are recomputed from the window start in one pass, and the forming last block
+        self.assertEqual(self.computed_symbols, [["TEST1|2024-01-01T00:00:00", "TEST1|2024-01-11T00:00:00"]])
+        pd.testing.assert_frame_equal(shifted, self.compute(window("2024-01-01 00:30")), check_exact=False, rtol=1e-9)
+
+    def test_matches_transform_on_sessions(self):
+        """On gapped exchange sessions the store returns what a plain transform does"""
+        rng = np.random.default_rng(5)
+        days = pd.bdate_range("2024-01-01", periods=80)
+        dates = pd.DatetimeIndex(np.concatenate(
+            [pd.date_range(day + pd.Timedelta("03:45:00"), periods=375, freq="1min") for day in days]))
+        frames = []
+        for symbol in ["TEST1", "TEST2"]:
+            close = 100 * (1 + rng.normal(0, 0.002, len(dates)).cumsum())
+            frames.append(pd.DataFrame({
+                "timestamp": dates, "symbol": symbol, "open": close, "high": close * 1.001,
+                "low": close * 0.999, "close": close, "volume": rng.integers(100, 1000, len(dates))
+            }))
+        raw = pd.concat(frames).set_index(["timestamp", "symbol"]).sort_index()
+        moved = raw[raw.index.get_level_values("timestamp") >= days[1]]
+
+        def features(data, enabled):
+            with mock.patch.object(preprocess, "_store", self.store), \
+                    mock.patch.dict(preprocess.settings, {"feature_store": {"enabled": enabled}, "timeframes": ["1h"],
+                                                          "indicators": ["rsi", "sma_fast", "sma_slow"]}):
+                return preprocess.features(data)[0]
+
+        for data in (raw, moved):
+            expected = features(data, False)
+            pd.testing.assert_frame_equal(features(data, True), expected, check_exact=False, rtol=1e-9)
+        self.assertTrue(list(self.store.root.glob("*.parquet")))  # blocks with a full warm-up were stored
+
+    def test_lru_eviction(self):
+        """Least-recently-used blocks go first once over the entry limit"""
+        self.store.max_entries = 3
+        block = pd.DataFrame({"x": [1.0]})
+        for i, key in enumerate(["a", "b", "c"]):
+            self.store.put(key, block)
+            os.utime(self.store._path(key), ns=(i * 10**9, i * 10**9))
+        self.store.get("a")  # refresh a
+        self.store.put("d", block)
+        self.assertEqual(self.store.evict(), 1)
+        self.assertIsNone(self.store.get("b"))
+        self.assertIsNotNone(self.store.get("a"))
+
+        self.store.max_bytes = 0
+        self.store.evict()
+        self.assertEqual(list(self.store.root.glob("*.parquet")), [])
+
+    def test_transform_skips_snapshot_when_cached(self):
+        """transform only writes a features CSV when something was computed"""
+        features_dir = Path(self.tmp.name) / "features"
+        features_dir.mkdir()
+        with mock.patch.object(preprocess, "FEATURE_DIR", features_dir), \
+                mock.patch.object(preprocess, "_store", self.store), \
+                mock.patch.dict(preprocess.settings, {"feature_store": {"enabled": True}}):
+            first = preprocess.transform(self.raw)
+            snapshots = list(features_dir.iterdir())
+            second = preprocess.transform(self.raw)
+        self.assertEqual(len(snapshots), 1)
+        self.assertEqual(list(features_dir.iterdir()), snapshots)
+        pd.testing.assert_frame_equal(first, second)
+
+if __name__ == "__main__":
+    unittest.main()
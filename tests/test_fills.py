@@ -0,0 +1,98 @@
+import unittest
+import numpy as np
+import pandas as pd
+from trading.backtest.fills import FillSimulator, bar_arrays, bar_matrices
+from trading.backtest.portfolio import Portfolio
+from trading.backtest import vectorized
+
+def bar(open_, high, low, close, volume):
+    """One bar per symbol from per-symbol lists"""
+    return {name: np.asarray(values, dtype=float) for name, values in
+            zip(("open", "high", "low", "close", "volume"), (open_, high, low, close, volume))}
+
+class TestFillSimulator(unittest.TestCase):
+    def test_market_fills_at_close_with_slippage(self):
+        """Market orders fill on their own bar at the close, slippage against the trader"""
+        sim = FillSimulator(2, slippage=0.01)
+        sim.submit(0, [0, 1], [10, -5], [100.0, 50.0])
+        fills = sim.match(0, bar([99, 49], [101, 51], [98, 48], [100, 50], [1000, 1000]))
+        self.assertEqual(fills.quantity.tolist(), [10, -5])
+        np.testing.assert_allclose(fills.price, [101.0, 49.5])
+        self.assertEqual(sim.open_orders, 0)
+
+    def test_limit_orders(self):
+        """Limits work from the next bar and fill at the limit, or the better open on a gap"""
+        sim = FillSimulator(2, order_type="limit", limit_offset=0.02)
+        sim.submit(0, [0, 1], [10, -10], [100.0, 100.0])   # BUY at 98, SELL at 102
+        self.assertEqual(len(sim.match(0, bar([100, 100], [101, 103], [97, 99], [100, 100], [1e6, 1e6]))), 0)
+
+        fills = sim.match(1, bar([99, 100], [100, 101], [98.5, 99], [99, 100], [1e6, 1e6]))
+        self.assertEqual(len(fills), 0)   # BUY low stays above 98, SELL high below 102
+        fills = sim.match(2, bar([97, 103], [99, 104], [96, 101], [98, 102], [1e6, 1e6]))
+        self.assertEqual(fills.col.tolist(), [0, 1])
+        np.testing.assert_allclose(fills.price, [97.0, 103.0])   # gapped through the limits
+
+    def test_stop_orders(self):
+        """Stops trigger on the bar's high/low and fill at the stop, or the worse open on a gap"""
+        sim = FillSimulator(2, order_type="stop", stop_offset=0.01)
+        sim.submit(0, [0, 1], [10, -10], [100.0, 100.0])   # BUY stop 101, SELL stop 99
+        fills = sim.match(1, bar([100, 98], [101.5, 100], [99.5, 97], [101, 98], [1e6, 1e6]))
+        self.assertEqual(fills.quantity.tolist(), [10, -10])
+        np.testing.assert_allclose(fills.price, [101.0, 98.0])
+
+    def test_volume_cap_and_queue(self):
+        """Fills are capped at a share of volume, shared first-in first-out, and the rest carries over"""
+        sim = FillSimulator(1, volume_share=0.1)
+        sim.submit(0, [0, 0], [30, 20], [10.0, 10.0])
+        fills = sim.match(0, bar([10], [10], [10], [10], [400]))
+        self.assertEqual(fills.order_id.tolist(), [0, 1])
+        self.assertEqual(fills.quantity.tolist(), [30, 10])
+        self.assertEqual(sim.open_orders, 1)
+
+        fills = sim.match(1, bar([np.nan], [np.nan], [np.nan], [np.nan], [np.nan]))
+        self.assertEqual(len(fills), 0)   # no bar, nothing fills
+        fills = sim.match(2, bar([11], [11], [11], [11], [1000]))
+        self.assertEqual((fills.order_id.tolist(), fills.quantity.tolist()), ([1], [10]))
+        self.assertEqual(sim.stats, {"submitted": 2, "filled": 2, "partial_fills": 1, "expired": 0})
+
+    def test_expiry(self):
+        """Orders left after ttl_bars are dropped"""
+        sim = FillSimulator(1, volume_share=0.1, ttl_bars=1)
+        sim.submit(0, [0], [100], [10.0])
+        sim.match(0, bar([10], [10], [10], [10], [100]))
+        sim.match(1, bar([10], [10], [10], [10], [100]))
+        self.assertEqual((sim.open_orders, sim.stats["expired"]), (0, 1))
+
+    def test_bar_helpers(self):
+        """Bar matrices and arrays fall back to close without high/low and leave volume uncapped"""
+        data = pd.DataFrame({
+            "timestamp": pd.to_datetime(["2024-01-01 10:00"] * 2 + ["2024-01-01 11:00"]),
+            "symbol": ["A", "B", "A"],
+            "close": [1.0, 2.0, 3.0],
+        }).set_index(["timestamp", "symbol"])
+        index = data.index.get_level_values("timestamp").unique()
+        symbols = pd.Index(["A", "B"])
+        bars = bar_matrices(data, index, symbols)
+        np.testing.assert_array_equal(bars["high"], [[1.0, 2.0], [3.0, np.nan]])
+        self.assertTrue(np.isnan(bars["volume"]).all())
+        row = bar_arrays(data.xs(index[1], level="timestamp"), symbols)
+        np.testing.assert_array_equal(row["low"], [3.0, np.nan])
+
+class TestSimulateWithFills(unittest.TestCase):
+    def test_partial_fills_across_bars(self):
+        """The columnar core keeps working capped orders on later bars"""
+        close = np.full((4, 1), 10.0)
+        bars = {"open": close, "high": close, "low": close, "close": close, "volume": np.full((4, 1), 300.0)}
+        orders = np.array([[1], [0], [0], [0]], dtype=np.int8)
+        portfolio = Portfolio(initial_capital=100000, commission_rate=0.0, slippage=0.0)
+        sim = FillSimulator(1, volume_share=0.1)
+        quantities, cash, fills, placed = vectorized.simulate(
+            portfolio, close, orders, pd.RangeIndex(4), pd.Index(["A"]),
+            notional_cap=1000, bars=bars, fill_sim=sim)
+        self.assertEqual(placed, [{"row": 0, "col": 0, "price": 10.0, "quantity": 100}])
+        self.assertEqual(quantities[:, 0].tolist(), [30, 30, 30, 10])
+        self.assertEqual(len(portfolio.trades), 4)
+        self.assertAlmostEqual(cash[3], 100000 - 1000)
+
+if __name__ == "__main__":
+    unittest.main()
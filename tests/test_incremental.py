@@ -0,0 +1,100 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+import pandas as pd
+import numpy as np
+from trading import preprocess
+from trading.incremental import IncrementalFeatureEngine, TOLERANCE
+
+class TestIncrementalFeatureEngine(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Generate three sessions of minute bars with an overnight gap"""
+        rng = np.random.default_rng(7)
+        sessions = [pd.date_range(f"2024-01-0{d} 03:45", periods=375, freq="1min") for d in (1, 2, 3)]
+        dates = sessions[0].append(sessions[1]).append(sessions[2])
+        frames = []
+        for symbol in ["TEST1", "TEST2"]:
+            close = 100 * (1 + rng.normal(0, 0.002, len(dates)).cumsum())
+            frames.append(pd.DataFrame({
+                "timestamp": dates,
+                "symbol": symbol,
+                "open": close * (1 + rng.normal(0, 0.0005, len(dates))),
+                "high": close * 1.001,
+                "low": close * 0.999,
+                "close": close,
+                "volume": rng.integers(100, 1000, len(dates))
+            }))
+        cls.raw = pd.concat(frames).set_index(["timestamp", "symbol"]).sort_index()
+        cls.tmp = tempfile.TemporaryDirectory()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def transform(self, raw):
+        with mock.patch.object(preprocess, "FEATURE_DIR", Path(self.tmp.name)), \
+                mock.patch.dict(preprocess.settings, {"feature_store": {"enabled": False}}):
+            return preprocess.transform(raw)
+
+    def assertFramesClose(self, actual, expected):
+        self.assertEqual(len(actual), len(expected))
+        self.assertEqual(list(actual["symbol"]), list(expected["symbol"]))
+        self.assertEqual(list(actual["timestamp"]), list(expected["timestamp"]))
+        for col in ["open", "high", "low", "close", "volume", "rsi", "sma_fast", "sma_slow"]:
+            np.testing.assert_allclose(
+                actual[col].astype(float), expected[col].astype(float), rtol=TOLERANCE, err_msg=col
+            )
+
+    def test_matches_transform_in_chunks(self):
+        """Feeding bars in overlapping chunks reproduces transform()"""
+        engine = IncrementalFeatureEngine(rsi_period=5, sma_fast_period=3, sma_slow_period=6)
+        timestamps = self.raw.index.get_level_values("timestamp").unique()
+        for end in range(0, len(timestamps), 97):
+            # Each chunk re-sends the previous 30 minutes, as an overlapping fetch would
+            chunk = timestamps[max(0, end - 30):end + 97]
+            engine.update(self.raw.loc[chunk])
+
+        with mock.patch.dict(preprocess.settings, {"rsi_period": 5, "sma_fast_period": 3, "sma_slow_period": 6}):
+            expected = self.transform(self.raw)
+        self.assertFramesClose(engine.frame(), expected)
+
+    def test_emits_only_changed_bars(self):
+        """A single new minute only re-emits the partial hour"""
+        engine = IncrementalFeatureEngine(rsi_period=5, sma_fast_period=3, sma_slow_period=6)
+        timestamps = self.raw.index.get_level_values("timestamp").unique()
+        engine.update(self.raw.loc[timestamps[:-1]])
+        changed = engine.update(self.raw.loc[timestamps[-2:]])
+
+        self.assertEqual(len(changed), 2)  # one row per symbol
+        self.assertTrue((changed["timestamp"] == timestamps[-1].floor("h")).all())
+        self.assertTrue(engine.update(self.raw.loc[timestamps[-2:]]).empty)
+
+    def test_revised_last_minute_replaces_partial_bar(self):
+        """A re-fetched last minute with its final values replaces the still-forming one"""
+        engine = IncrementalFeatureEngine(rsi_period=5, sma_fast_period=3, sma_slow_period=6)
+        timestamps = self.raw.index.get_level_values("timestamp").unique()
+        forming = self.raw.loc[timestamps[:200]].copy()
+        last = forming.index.get_level_values("timestamp") == timestamps[199]
+        forming.loc[last, "close"] *= 0.99
+        forming.loc[last, "volume"] //= 3
+        engine.update(forming)
+        changed = engine.update(self.raw.loc[timestamps[199:201]])
+        self.assertTrue((changed["timestamp"] == timestamps[200].floor("h")).all())
+        engine.update(self.raw.loc[timestamps[200:]])
+
+        with mock.patch.dict(preprocess.settings, {"rsi_period": 5, "sma_fast_period": 3, "sma_slow_period": 6}):
+            expected = self.transform(self.raw)
+        self.assertFramesClose(engine.frame(), expected)
+
+        streamed = IncrementalFeatureEngine(rsi_period=5, sma_fast_period=3, sma_slow_period=6)
+        for (ts, sym), bar in self.raw.loc[timestamps[:800]].iterrows():
+            streamed.add_bar(sym, ts, bar["open"], bar["high"], bar["low"], bar["close"] * 1.01, bar["volume"] + 1)
+            streamed.add_bar(sym, ts, bar["open"], bar["high"], bar["low"], bar["close"], bar["volume"])
+        reference = IncrementalFeatureEngine(rsi_period=5, sma_fast_period=3, sma_slow_period=6)
+        reference.update(self.raw.loc[timestamps[:800]])
+        self.assertFramesClose(streamed.frame(), reference.frame())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+from unittest import mock
+import pandas as pd
+import numpy as np
+import ta
+from trading import indicators
+from trading.indicators import Setting, compute, plan, register, required
+
+class TestIndicatorRegistry(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(2)
+        frames = []
+        for symbol in ["TEST1", "TEST2"]:
+            close = 100 * (1 + rng.normal(0, 0.01, 200).cumsum())
+            frames.append(pd.DataFrame({
+                "timestamp": pd.date_range("2024-01-01", periods=200, freq="1h"),
+                "symbol": symbol, "open": close, "high": close * 1.01,
+                "low": close * 0.99, "close": close, "volume": 1000
+            }))
+        self.panel = pd.concat(frames, ignore_index=True)
+        self.settings = {"rsi_period": 14, "sma_fast_period": 10, "sma_slow_period": 20}
+
+    def test_matches_reference_per_symbol(self):
+        """Grouped kernels match per-symbol ta/pandas computations"""
+        out = compute(self.panel, ["rsi", "sma_fast", "bb_upper"], self.settings)
+        for sym, grp in out.groupby("symbol"):
+            close = grp["close"]
+            np.testing.assert_allclose(grp["rsi"], ta.momentum.rsi(close, window=14), rtol=1e-12)
+            np.testing.assert_allclose(grp["sma_fast"], close.rolling(10).mean(), rtol=1e-12)
+            np.testing.assert_allclose(
+                grp["bb_upper"], close.rolling(20).mean() + 2 * close.rolling(20).std(), rtol=1e-12
+            )
+        self.assertNotIn("sma_slow", out.columns)
+
+    def test_shared_nodes_computed_once(self):
+        """Identical computations under different names share one node"""
+        names = [n for node in plan(["sma_slow", "bb_upper", "bb_lower"], self.settings) for n in node.names]
+        self.assertEqual(names.count("sma_slow"), 1)
+        self.assertEqual(names.count("close_std"), 1)
+
+        same_period = dict(self.settings, sma_fast_period=20)
+        nodes = plan(["sma_fast", "sma_slow"], same_period)
+        self.assertEqual(len(nodes), 1)
+        self.assertEqual(nodes[0].names, ["sma_fast", "sma_slow"])
+        out = compute(self.panel, ["sma_fast", "sma_slow"], same_period)
+        np.testing.assert_array_equal(out["sma_fast"], out["sma_slow"])
+
+    def test_unused_indicators_not_evaluated(self):
+        """Only the requested indicators' dependencies run"""
+        calls = []
+
+        with mock.patch.dict(indicators.REGISTRY):
+            @register("traced", inputs=("close",), window=Setting("traced_period", 3))
+            def traced(ctx, close, window):
+                calls.append(window)
+                return close
+
+            compute(self.panel, ["sma_fast"], self.settings)
+            self.assertEqual(calls, [])
+            compute(self.panel, ["traced"], dict(self.settings, traced_period=5))
+            self.assertEqual(calls, [5])
+        self.assertNotIn("traced", indicators.REGISTRY)
+
+    def test_required_consumers(self):
+        """Consumers' needs are merged in order without duplicates"""
+        self.assertEqual(required({}), ["rsi", "sma_fast", "sma_slow"])
+        self.assertEqual(required({"indicators": ["rsi", "bb_lower", "close"]}),
+                         ["rsi", "bb_lower", "sma_fast", "sma_slow"])
+        model = mock.Mock(feature_names_in_=["close", "rsi", "bb_lower"])
+        self.assertEqual(required({"indicators": ["rsi"]}, model), ["rsi", "sma_fast", "sma_slow", "bb_lower"])
+        self.assertEqual(required({"timeframes": ["1h", "1d"]}, features=["bb_upper_1d", "returns"]),
+                         ["rsi", "sma_fast", "sma_slow", "bb_upper", "returns"])
+        with self.assertRaises(KeyError):
+            plan(["unknown"])
+
+    def test_warmup_bars(self):
+        """Warm-up follows the longest chain; RSI runs until its seed no longer matters"""
+        self.assertEqual(indicators.warmup_bars(plan(["sma_slow", "bb_lower"], {"sma_slow_period": 20})), 20 + 1)
+        self.assertEqual(indicators.warmup_bars(plan(["rsi"], {"rsi_period": 14})), 1 + 1 + 373 + 1)
+        self.assertLess((1 - 1 / 14) ** 373, indicators.EWM_TOLERANCE)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import gc
+import sqlite3
+import tempfile
+import time
+import unittest
+import weakref
+from pathlib import Path
+from unittest import mock
+from trading.broker.mock import MockBroker
+
+class TestMockBroker(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = Path(self.tmp.name) / "orders.sqlite"
+
+    def broker(self, **kwargs):
+        broker = MockBroker(self.path, **kwargs)
+        self.addCleanup(broker.close)
+        return broker
+
+    def rows(self):
+        with sqlite3.connect(self.path) as conn:
+            return conn.execute("SELECT symbol, side, qty, status, fill_price FROM orders ORDER BY id").fetchall()
+
+    def test_throughput(self):
+        """Thousands of orders per second through batched inserts on one WAL connection"""
+        broker = self.broker(flush_rows=1000, flush_seconds=None)
+        broker.update_prices({f"S{i}": 100.0 + i for i in range(50)})
+        t0 = time.perf_counter()
+        for batch in range(50):
+            responses = broker.place_orders([{"symbol": f"S{i}", "side": "BUY", "qty": 1} for i in range(100)])
+        elapsed = time.perf_counter() - t0
+        broker.flush()
+        self.assertGreater(5000 / elapsed, 2000)
+        self.assertEqual(len(self.rows()), 5000)
+        self.assertEqual(responses[-1]["id"], 5000)
+        with sqlite3.connect(self.path) as conn:
+            self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+            indexes = {row[1] for row in conn.execute("PRAGMA index_list(orders)")}
+        self.assertTrue({"idx_orders_symbol", "idx_orders_ts"} <= indexes)
+
+    def test_fills_against_latest_price(self):
+        """Fills use the latest bar price with slippage, else the reference price; no price is rejected"""
+        broker = self.broker(slippage=0.01, flush_seconds=None)
+        broker.update_prices({"A": 100.0})
+        buy, sell, none = broker.place_orders([
+            {"symbol": "A", "side": "BUY", "qty": 2, "price": 90.0},
+            {"symbol": "B", "side": "SELL", "qty": 1, "price": 50.0},
+            {"symbol": "C", "side": "BUY", "qty": 1},
+        ])
+        self.assertAlmostEqual(buy["fill_price"], 101.0)
+        self.assertAlmostEqual(sell["fill_price"], 49.5)
+        self.assertEqual(none["status"], "error")
+
+        statuses = {s["id"]: s for s in broker.order_statuses([buy["id"], none["id"]])}
+        self.assertEqual(statuses[str(buy["id"])]["filled_qty"], 2)
+        self.assertEqual((statuses[str(none["id"])]["status"], statuses[str(none["id"])]["filled_qty"]), ("REJECTED", 0))
+        self.assertEqual([(sym, qty) for _, sym, _, qty, _ in broker.order_history()], [("A", 2), ("B", 1)])
+
+    def test_time_based_flush_and_reopen(self):
+        """Buffered orders are written on a timer; brokers sharing the file never reuse an id"""
+        broker = self.broker(flush_seconds=0.02)
+        broker.place_order("A", "BUY", 1, price=10.0)
+        deadline = time.time() + 5
+        while not self.rows() and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.rows(), [("A", "BUY", 1, "FILLED", 10.0)])
+        broker.close()
+        first, second = self.broker(flush_seconds=None), self.broker(flush_seconds=None)
+        ids = [b.place_orders([{"symbol": "A", "side": "SELL", "price": 11.0}])[0]["id"] for b in (first, second, first)]
+        self.assertEqual(len({1, *ids}), 4)
+        self.assertEqual(ids[2], ids[0] + 1)
+        first.flush()
+        second.flush()
+        self.assertEqual(len(self.rows()), 4)
+
+    def test_failed_flush_keeps_orders(self):
+        """Orders stay buffered when their insert fails and are written by the next flush"""
+        broker = self.broker(flush_seconds=None)
+        broker.place_order("A", "BUY", 1, price=10.0)
+        conn = broker._conn
+        broker._conn = mock.MagicMock(wraps=conn)
+        broker._conn.__exit__.return_value = False
+        broker._conn.executemany.side_effect = sqlite3.OperationalError("disk I/O error")
+        with self.assertRaises(sqlite3.OperationalError):
+            broker.flush()
+        broker._conn = conn
+        broker.flush()
+        self.assertEqual(self.rows(), [("A", "BUY", 1, "FILLED", 10.0)])
+
+    def test_unreferenced_broker_is_released(self):
+        """Neither the flush thread nor the exit hook keeps a broker alive; dropping it writes its orders"""
+        broker = MockBroker(self.path, flush_seconds=0.01)
+        broker.place_order("A", "BUY", 1, price=10.0)
+        ref = weakref.ref(broker)
+        del broker
+        deadline = time.time() + 5
+        while ref() is not None and time.time() < deadline:
+            gc.collect()
+            time.sleep(0.01)
+        self.assertIsNone(ref())
+        self.assertEqual(self.rows(), [("A", "BUY", 1, "FILLED", 10.0)])
+
+    def test_migrates_old_store(self):
+        """Stores from before prices and statuses were recorded stay readable"""
+        with sqlite3.connect(self.path) as conn:
+            conn.execute("CREATE TABLE orders (id INTEGER PRIMARY KEY AUTOINCREMENT, ts TEXT, symbol TEXT, side TEXT, qty INTEGER)")
+            conn.execute("INSERT INTO orders (ts, symbol, side, qty) VALUES ('2024-01-01T10:00:00', 'A', 'BUY', 3)")
+        broker = self.broker(flush_seconds=None)
+        self.assertEqual(broker.order_history(), [("2024-01-01T10:00:00", "A", "BUY", 3, None)])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+import itertools
+import threading
+import time
+import unittest
+from trading import orders
+from trading.orders import OrderBook, OrderManager
+
+class FakeBroker:
+    """Local broker: each request costs ``latency`` seconds; orders fill on the next status poll."""
+
+    def __init__(self, latency=0.002, reject=()):
+        self.latency = latency
+        self.reject = set(reject)
+        self.ids = itertools.count(100)
+        self.placed = {}
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def place_orders(self, batch):
+        time.sleep(self.latency)
+        responses = []
+        with self.lock:
+            self.requests += 1
+            for o in batch:
+                if o["symbol"] in self.reject:
+                    responses.append({"s": "error", "message": "not allowed"})
+                    continue
+                broker_id = str(next(self.ids))
+                self.placed[broker_id] = o
+                responses.append({"s": "ok", "id": broker_id})
+        return responses
+
+    def order_statuses(self, ids):
+        time.sleep(self.latency)
+        with self.lock:
+            self.requests += 1
+            return [{"id": i, "status": "FILLED", "filled_qty": self.placed[i]["qty"], "avg_price": 100.0}
+                    for i in ids]
+
+class TestOrderManager(unittest.TestCase):
+    def test_throughput_and_reconcile(self):
+        """Hundreds of orders per second go out in batches and reconcile into positions"""
+        broker = FakeBroker()
+        with OrderManager(broker, batch_size=50, poll_seconds=None) as manager:
+            t0 = time.perf_counter()
+            placed = [manager.submit(f"SYM{i % 10}", "BUY" if i % 3 else "SELL", qty=2) for i in range(1000)]
+            submit_seconds = time.perf_counter() - t0
+            self.assertTrue(manager.book.wait([o.order_id for o in placed], statuses={orders.SUBMITTED}, timeout=5))
+            elapsed = time.perf_counter() - t0
+        self.assertLess(submit_seconds, 0.5)  # submit never waits on the broker
+        self.assertGreater(len(placed) / elapsed, 500)
+        self.assertLessEqual(manager.batches, 1000 // 10)
+
+        requests = broker.requests
+        self.assertEqual(manager.reconcile(), 1000)
+        self.assertEqual(broker.requests, requests + 1)  # one poll for every open order
+        book = manager.book
+        self.assertEqual(book.position("SYM1"), sum(2 if i % 3 else -2 for i in range(1000) if i % 10 == 1))
+        self.assertEqual(book.open_quantity("SYM1"), 0)
+        self.assertEqual(len(book.for_symbol("SYM1")), 100)
+        self.assertEqual(book.get(placed[0].order_id).avg_price, 100.0)
+
+    def test_rejections_and_open_quantity(self):
+        """Rejected orders are terminal and working orders count as open quantity"""
+        broker = FakeBroker(reject={"BAD"})
+        with OrderManager(broker, poll_seconds=None) as manager:
+            good = manager.submit("GOOD", "BUY", 5)
+            bad = manager.submit("BAD", "SELL", 1)
+            self.assertTrue(manager.book.wait([good.order_id, bad.order_id],
+                                              statuses={orders.SUBMITTED, orders.REJECTED}, timeout=5))
+        self.assertEqual(bad.status, orders.REJECTED)
+        self.assertEqual(bad.error, "not allowed")
+        self.assertEqual(manager.book.open_quantity("GOOD"), 5)
+        self.assertEqual(manager.book.position("GOOD"), 0)
+        self.assertIs(manager.book.by_broker_id(good.broker_id), good)
+
+    def test_polling_thread(self):
+        """The poll loop fills orders without an explicit reconcile"""
+        with OrderManager(FakeBroker(), poll_seconds=0.01) as manager:
+            order = manager.submit("SYM", "BUY", 3)
+            self.assertTrue(manager.book.wait([order.order_id], timeout=5))
+        self.assertEqual((order.status, order.filled_qty), (orders.FILLED, 3))
+
+class TestOrderBook(unittest.TestCase):
+    def test_partial_fills(self):
+        """Pushed partial fills move the position by the newly filled quantity only"""
+        book = OrderBook()
+        order = book.new_order("SYM", "SELL", 10)
+        book.acknowledge(order, {"status": "ok", "id": 7})
+        self.assertEqual(book.apply_updates([{"id": "7", "status": orders.PARTIAL, "filled_qty": 4}]), 1)
+        self.assertEqual((book.position("SYM"), book.open_quantity("SYM")), (-4, -6))
+        self.assertEqual(book.apply_updates([{"id": "7", "status": orders.PARTIAL, "filled_qty": 4},
+                                             {"id": "unknown", "status": orders.FILLED}]), 0)
+        book.apply_updates([{"id": "7", "status": orders.FILLED, "filled_qty": 10}])
+        self.assertEqual((book.position("SYM"), book.open_quantity("SYM"), book.open_orders()), (-10, 0, []))
+
+    def test_cancel_after_ack_calls_on_reject(self):
+        """An acknowledged order cancelled after a partial fill reports its unfilled part"""
+        unfilled = []
+        book = OrderBook(on_reject=lambda o: unfilled.append((o.order_id, o.qty - o.filled_qty)))
+        order = book.new_order("SYM", "BUY", 10)
+        book.acknowledge(order, {"status": "ok", "id": 7})
+        book.apply_updates([{"id": "7", "status": orders.PARTIAL, "filled_qty": 3}])
+        self.assertEqual(unfilled, [])
+        book.apply_updates([{"id": "7", "status": orders.CANCELLED, "filled_qty": 3}])
+        self.assertEqual(unfilled, [(order.order_id, 7)])
+        book.apply_updates([{"id": "7", "status": orders.CANCELLED, "filled_qty": 3}])
+        self.assertEqual(len(unfilled), 1)
+
+    def test_finished_orders_leave_working_set(self):
+        """Only working orders are scanned and the oldest finished orders are dropped"""
+        book = OrderBook(keep_closed=2)
+        placed = [book.new_order("SYM", "BUY", 1) for _ in range(4)]
+        for i, order in enumerate(placed):
+            book.acknowledge(order, {"status": "ok", "id": i})
+        book.apply_updates([{"id": str(i), "status": orders.FILLED, "filled_qty": 1} for i in range(3)])
+        self.assertEqual(book.open_orders(), [placed[3]])
+        self.assertEqual((book.position("SYM"), book.open_quantity("SYM")), (3, 1))
+        self.assertIsNone(book.get(placed[0].order_id))
+        self.assertIsNone(book.by_broker_id("0"))
+        self.assertEqual(book.for_symbol("SYM"), placed[1:])
+        self.assertTrue(book.wait([placed[0].order_id, placed[1].order_id], timeout=0))
+
+if __name__ == "__main__":
+    unittest.main()
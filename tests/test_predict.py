@@ -0,0 +1,135 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+import joblib
+import pandas as pd
+import numpy as np
+from trading.intelligence import model as ml_model, artifact
+from trading.intelligence.artifact import SchemaError
+from trading.intelligence.predict import predict, predict_table
+
+class FixedModel:
+    """Classifier returning preset probabilities, counting its calls"""
+    def __init__(self, proba):
+        self.proba = np.asarray(proba)
+        self.calls = 0
+
+    def predict_proba(self, X):
+        self.calls += 1
+        return np.column_stack([1 - self.proba[:len(X)], self.proba[:len(X)]])
+
+class TestPredict(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        timestamps = pd.date_range("2024-01-01", periods=3, freq="1h")
+        self.feat = pd.DataFrame({
+            "timestamp": np.repeat(timestamps, 2),
+            "symbol": ["TEST2", "TEST1"] * 3,
+            "close": np.arange(6, dtype=float),
+        })
+        self.proba = [0.9, 0.5, 0.1, 0.56, 0.44, 0.55]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+        ml_model.clear_cache()
+
+    def test_table_thresholds_in_one_pass(self):
+        """The whole panel is scored once and thresholded into a signal table"""
+        model = FixedModel(self.proba)
+        table = predict_table(self.feat, buy_threshold=0.55, sell_threshold=0.45, model=model)
+        self.assertEqual(model.calls, 1)
+        self.assertEqual(list(table.columns), ["timestamp", "symbol", "side", "confidence"])
+        self.assertEqual(list(table["side"]), ["BUY", "BUY", "SELL", "SELL"])
+        self.assertEqual(list(table["symbol"]), ["TEST2", "TEST1", "TEST2", "TEST2"])
+        np.testing.assert_allclose(table["confidence"], [0.9, 0.56, 0.1, 0.44])
+        self.assertTrue(table["timestamp"].is_monotonic_increasing)
+
+        signals = predict(self.feat, use_ml=True, buy_threshold=0.55, sell_threshold=0.45, model=model)
+        self.assertEqual([(s.symbol, s.side) for s in signals], list(zip(table["symbol"], table["side"])))
+
+    def test_warmup_rows_not_scored(self):
+        """Rows with NaN features are skipped and signals keep their own row"""
+        class StrictModel(FixedModel):
+            def predict_proba(self, X):
+                if not np.isfinite(X.to_numpy(dtype=float)).all():
+                    raise ValueError("Input contains NaN")
+                return super().predict_proba(X)
+
+        feat = self.feat.assign(close=[np.nan, np.inf, 2.0, 3.0, 4.0, 5.0])
+        model = StrictModel([0.1, 0.56, 0.44, 0.55])
+        table = predict_table(feat, buy_threshold=0.55, sell_threshold=0.45, model=model)
+        self.assertEqual(list(table["side"]), ["BUY", "SELL", "SELL"])
+        self.assertEqual(list(table["symbol"]), ["TEST1", "TEST2", "TEST2"])
+        self.assertEqual(list(table["timestamp"]), list(feat["timestamp"].iloc[[3, 2, 4]]))
+        np.testing.assert_allclose(table["confidence"], [0.56, 0.1, 0.44])
+
+        empty = predict_table(feat.assign(close=np.nan), model=model)
+        self.assertTrue(empty.empty)
+
+    def test_model_cached_until_file_changes(self):
+        """load_model reads the file once and again only after it changes"""
+        path = Path(self.tmp.name) / "model.joblib"
+        joblib.dump(FixedModel([0.9]), path)
+        with mock.patch.object(joblib, "load", wraps=joblib.load) as load:
+            first = ml_model.load_model(path)
+            self.assertIs(ml_model.load_model(path), first)
+            self.assertEqual(load.call_count, 1)
+
+            joblib.dump(FixedModel([0.1]), path)
+            stat = path.stat()
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+            second = ml_model.load_model(path)
+            self.assertEqual(load.call_count, 2)
+            self.assertIsNot(second, first)
+            np.testing.assert_array_equal(second.proba, [0.1])
+
+        with self.assertRaises(FileNotFoundError):
+            ml_model.load_model(Path(self.tmp.name) / "missing.joblib")
+
+class TestModelArtifact(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        rng = np.random.default_rng(6)
+        n = 200
+        self.feat = pd.DataFrame({
+            "timestamp": pd.date_range("2024-01-01", periods=n, freq="1h"),
+            "symbol": "TEST1",
+            "close": 100 + rng.normal(0, 1, n).cumsum(),
+            "rsi": rng.uniform(0, 100, n),
+            "volume": rng.integers(100, 1000, n),
+        })
+        self.labels = pd.Series((rng.random(n) > 0.5).astype(float))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+        ml_model.clear_cache()
+
+    def test_roundtrip_memory_mapped(self):
+        """Saved artifacts reload with their schema and memory-mapped weights"""
+        fitted = ml_model.fit(self.feat, self.labels)
+        self.assertEqual(fitted.schema.features, ["close", "rsi", "volume"])
+        self.assertEqual(fitted.schema.dtypes["volume"], "int64")
+
+        path = Path(self.tmp.name) / "model"
+        version = artifact.save(fitted, path)
+        loaded = ml_model.load_model(path)
+        self.assertEqual(loaded.version, version)
+        self.assertIsInstance(loaded.estimator.coef_, np.memmap)
+        np.testing.assert_allclose(loaded.predict_proba(self.feat), fitted.predict_proba(self.feat))
+        artifact.load(path, verify=True)
+
+    def test_schema_validated_and_reordered(self):
+        """Inputs are reordered to the schema; missing or non-numeric columns fail"""
+        fitted = ml_model.fit(self.feat, self.labels)
+        shuffled = self.feat[["volume", "symbol", "rsi", "timestamp", "close"]].assign(extra=1.0)
+        np.testing.assert_allclose(ml_model.predict_proba(fitted, shuffled), fitted.predict_proba(self.feat))
+
+        with self.assertRaises(SchemaError):
+            fitted.predict_proba(self.feat.drop(columns="rsi"))
+        with self.assertRaises(SchemaError):
+            fitted.predict_proba(self.feat.assign(rsi="high"))
+
+if __name__ == "__main__":
+    unittest.main()
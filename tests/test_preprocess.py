@@ -0,0 +1,108 @@
+import unittest
+from unittest import mock
+import pandas as pd
+import numpy as np
+from trading import preprocess
+from trading.intelligence import model as ml_model, rules
+from trading.intelligence.predict import predict_table
+
+class TestPanelFeatures(unittest.TestCase):
+    def setUp(self):
+        """Minute bars with random gaps for several symbols, shuffled"""
+        rng = np.random.default_rng(11)
+        frames = []
+        for i in range(5):
+            dates = pd.date_range("2024-01-01 03:45", periods=1500, freq="1min")
+            dates = dates[rng.random(len(dates)) > 0.3]
+            close = 100 * (1 + rng.normal(0, 0.002, len(dates)).cumsum())
+            frames.append(pd.DataFrame({
+                "timestamp": dates,
+                "symbol": f"TEST{i}",
+                "open": close * (1 + rng.normal(0, 0.0005, len(dates))),
+                "high": close * 1.001,
+                "low": close * 0.999,
+                "close": close,
+                "volume": rng.integers(100, 1000, len(dates))
+            }))
+        self.raw = pd.concat(frames).sample(frac=1, random_state=0).set_index(["timestamp", "symbol"])
+
+    def test_matches_per_symbol_loop(self):
+        """The panel-wide path reproduces the per-symbol resample/indicator loop"""
+        panel = preprocess.compute_features(self.raw, rsi_period=5, sma_fast_period=3, sma_slow_period=6)
+        loop = preprocess.compute_features_per_symbol(self.raw, rsi_period=5, sma_fast_period=3, sma_slow_period=6)
+        pd.testing.assert_frame_equal(panel, loop.reset_index(drop=True), check_exact=False, rtol=1e-12)
+
+    def test_resample_skips_empty_buckets(self):
+        """Hours without bars are not emitted"""
+        raw = self.raw[self.raw.index.get_level_values("timestamp").hour != 5]
+        hourly = preprocess.resample_panel(raw)
+        self.assertFalse((hourly["timestamp"].dt.hour == 5).any())
+        self.assertEqual(hourly["volume"].sum(), raw["volume"].sum())
+
+    def test_model_features_are_computed(self):
+        """Indicators the model was trained on are computed even when not listed in indicators"""
+        settings = {"indicators": ["rsi"], "rsi_period": 5, "sma_fast_period": 3, "sma_slow_period": 6,
+                    "feature_store": {"enabled": False}}
+        with mock.patch.dict(preprocess.settings, settings):
+            trained, _ = preprocess.features(self.raw, extra=["bb_lower"])
+            self.assertIn("bb_lower", trained.columns)
+            fitted = ml_model.fit(trained, ml_model.make_labels(trained))
+
+            plain, _ = preprocess.features(self.raw)
+            self.assertNotIn("bb_lower", plain.columns)
+            with mock.patch.dict(preprocess.settings, {"use_ml": True}), \
+                    mock.patch.object(ml_model, "load_model", return_value=fitted):
+                feat, _ = preprocess.features(self.raw)
+        pd.testing.assert_frame_equal(feat, trained)
+        table = predict_table(feat, buy_threshold=0.5, sell_threshold=0.5, model=fitted)
+        self.assertFalse(table.empty)
+
+class TestMultiTimeframe(unittest.TestCase):
+    def setUp(self):
+        """Four sessions of minute bars for two symbols"""
+        rng = np.random.default_rng(4)
+        sessions = [pd.date_range(f"2024-01-0{d} 03:45", periods=375, freq="1min") for d in (1, 2, 3, 4)]
+        dates = sessions[0].append(sessions[1:])
+        frames = []
+        for symbol in ["TEST1", "TEST2"]:
+            close = 100 * (1 + rng.normal(0, 0.002, len(dates)).cumsum())
+            frames.append(pd.DataFrame({
+                "timestamp": dates, "symbol": symbol, "open": close, "high": close * 1.001,
+                "low": close * 0.999, "close": close, "volume": rng.integers(100, 1000, len(dates))
+            }))
+        self.raw = pd.concat(frames).set_index(["timestamp", "symbol"]).sort_index()
+        self.timeframes = ["5min", "15min", "1h", "1d"]
+        self.params = dict(rsi_period=3, sma_fast_period=2, sma_slow_period=3, names=["rsi", "sma_fast", "sma_slow"])
+
+    def test_hierarchy_matches_direct_resample(self):
+        """Each level built from the one below equals resampling the minute bars"""
+        levels = preprocess.build_pyramid(self.raw, self.timeframes)
+        for tf in self.timeframes:
+            pd.testing.assert_frame_equal(levels[tf], preprocess.resample_panel(self.raw, tf))
+        with self.assertRaises(ValueError):
+            preprocess.build_pyramid(self.raw, ["15min", "20min"])
+
+    def test_no_lookahead(self):
+        """Rows only depend on bars that had closed by the end of the base bar"""
+        wide = preprocess.multi_timeframe_features(self.raw, self.timeframes, **self.params)
+        self.assertEqual(wide["volume"].dtype, np.int64)
+        self.assertTrue((wide.drop(columns=["timestamp", "symbol", "volume"]).dtypes == np.float64).all())
+
+        timestamps = self.raw.index.get_level_values("timestamp")
+        for cutoff in wide["timestamp"].drop_duplicates().iloc[[5, 40, -1]]:
+            # Recompute with only the minute bars up to the end of this 5m bar
+            truncated = self.raw[timestamps < cutoff + pd.Timedelta("5min")]
+            partial = preprocess.multi_timeframe_features(truncated, self.timeframes, **self.params)
+            expected = wide[wide["timestamp"] == cutoff].reset_index(drop=True)
+            actual = partial[partial["timestamp"] == cutoff].reset_index(drop=True)
+            pd.testing.assert_frame_equal(actual, expected)
+
+    def test_consumed_by_rules(self):
+        """The wide frame feeds the crossover rules directly"""
+        wide = preprocess.multi_timeframe_features(self.raw, self.timeframes, **self.params)
+        table = rules.generate_signal_table(wide)
+        self.assertFalse(table.empty)
+        self.assertTrue(set(table["timestamp"]) <= set(wide["timestamp"]))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import datetime as dt
+import time
+import unittest
+from trading.risk import RiskEngine
+
+class TestRiskEngine(unittest.TestCase):
+    def test_limits(self):
+        """Position and notional limits reject without changing the counters"""
+        risk = RiskEngine(position_limit=10, notional_cap=5000)
+        self.assertTrue(risk.reserve("A", "BUY", 8, 100.0).accepted)
+        self.assertFalse(risk.reserve("A", "BUY", 3, 100.0).accepted)
+        self.assertTrue(risk.reserve("A", "SELL", 18, 100.0).accepted)  # flips to -10
+        self.assertEqual(risk.positions["A"], -10)
+        decision = risk.reserve("B", "BUY", 9, 300.0)
+        self.assertFalse(decision.accepted)
+        self.assertIn("notional cap", decision.reason)
+        self.assertEqual((risk.notional, risk.rejected), (2600.0, 2))
+
+    def test_reference_price(self):
+        """Orders without a price use the last price seen, and are rejected without one"""
+        risk = RiskEngine(position_limit=10, notional_cap=5000)
+        self.assertEqual(risk.reserve("A", "BUY", 1).reason, "no reference price")
+        risk.mark("A", 50.0)
+        self.assertEqual(risk.reserve("A", "BUY", 1).price, 50.0)
+
+    def test_daily_reset_and_history(self):
+        """Notional counts today's orders only and resets at the date change"""
+        day = [dt.date(2024, 1, 2)]
+        rows = [("2024-01-01T10:00:00", "A", "BUY", 5, 100.0), ("2024-01-02T10:00:00", "A", "SELL", 2, 110.0),
+                ("2024-01-02T11:00:00", "B", "BUY", 1, None)]
+        risk = RiskEngine.from_history(rows, position_limit=10, notional_cap=1000, today=lambda: day[0])
+        self.assertEqual(risk.positions, {"A": 3, "B": 1})
+        self.assertEqual(risk.notional, 220.0)
+        self.assertFalse(risk.reserve("A", "BUY", 7, 120.0).accepted)
+        day[0] = dt.date(2024, 1, 3)
+        self.assertTrue(risk.reserve("A", "BUY", 7, 120.0).accepted)
+        self.assertEqual(risk.notional, 840.0)
+
+    def test_positions_carried_over(self):
+        """Broker positions replace the ones summed from an intraday history"""
+        rows = [("2024-01-02T10:00:00", "A", "BUY", 2, 100.0)]
+        risk = RiskEngine.from_history(rows, position_limit=10, notional_cap=1000,
+                                       today=lambda: dt.date(2024, 1, 2), positions={"A": 9, "C": -4, "D": 0})
+        self.assertEqual(risk.positions, {"A": 9, "C": -4})
+        self.assertEqual(risk.notional, 200.0)
+        self.assertFalse(risk.reserve("A", "BUY", 2, 100.0).accepted)
+
+    def test_constant_time(self):
+        """Checks cost the same regardless of how many symbols are tracked"""
+        risk = RiskEngine(position_limit=10**9, notional_cap=float("inf"))
+        t0 = time.perf_counter()
+        for i in range(20000):
+            risk.reserve(f"S{i % 500}", "BUY", 1, 10.0)
+        self.assertLess(time.perf_counter() - t0, 1.0)
+        self.assertEqual(len(risk.positions), 500)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+import pandas as pd
+import numpy as np
+from trading.intelligence.rules import generate_signals, generate_signal_table, signals_from_table
+
+class TestSignalTable(unittest.TestCase):
+    def setUp(self):
+        # Two symbols with oscillating SMAs so that crossovers happen repeatedly
+        dates = pd.date_range(start="2024-01-01", periods=50, freq="1h")
+        frames = []
+        for i, symbol in enumerate(["TEST1", "TEST2"]):
+            phase = np.linspace(0, 6 * np.pi, len(dates)) + i
+            frames.append(pd.DataFrame({
+                "timestamp": dates,
+                "symbol": symbol,
+                "sma_fast": 100 + np.sin(phase),
+                "sma_slow": 100 + np.cos(phase)
+            }))
+        self.feat_df = pd.concat(frames, ignore_index=True)
+
+    def test_matches_last_bar_rule(self):
+        """The table holds exactly what generate_signals finds bar by bar"""
+        expected = []
+        for end in range(2, 51):
+            window = self.feat_df.groupby("symbol").head(end)
+            for sig in generate_signals(window):
+                if sig.timestamp == window[window["symbol"] == sig.symbol]["timestamp"].iloc[-1]:
+                    expected.append((sig.timestamp, sig.symbol, sig.side))
+        table = generate_signal_table(self.feat_df)
+        actual = list(zip(table["timestamp"], table["symbol"], table["side"].astype(str)))
+        self.assertEqual(sorted(set(expected)), sorted(actual))
+        self.assertGreater(len(actual), 4)
+
+    def test_table_layout(self):
+        """Signal table is columnar, ordered and convertible to Signal objects"""
+        table = generate_signal_table(self.feat_df, confidence=0.7)
+        self.assertEqual(list(table.columns), ["timestamp", "symbol", "side", "confidence"])
+        self.assertTrue(table["timestamp"].is_monotonic_increasing)
+        self.assertTrue((table["confidence"] == 0.7).all())
+
+        signals = signals_from_table(table)
+        self.assertEqual(len(signals), len(table))
+        self.assertIn(signals[0].side, ("BUY", "SELL"))
+
+    def test_single_timestamp_and_empty(self):
+        """No crossover can be seen in a single bar or an empty frame"""
+        first = self.feat_df[self.feat_df["timestamp"] == self.feat_df["timestamp"].min()]
+        self.assertTrue(generate_signal_table(first).empty)
+        self.assertTrue(generate_signal_table(self.feat_df.iloc[0:0]).empty)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import logging
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+from trading.utils import logging_utils
+from trading.utils.logging_utils import PipelineContext, get_pipeline_context
+from trading.utils.scheduling import RunGuard
+
+class TestRunGuard(unittest.TestCase):
+    def setUp(self):
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.calls = []
+
+    def job(self, tag):
+        self.calls.append(tag)
+        self.started.set()
+        self.release.wait(5)
+        return tag
+
+    def start(self, guard, tag):
+        thread = threading.Thread(target=guard, args=(tag,))
+        thread.start()
+        return thread
+
+    def test_skip_overlapping_tick(self):
+        """A tick during an active run is dropped and counted"""
+        guard = RunGuard(self.job, policy="skip")
+        first = self.start(guard, "a")
+        self.started.wait(5)
+        self.assertIsNone(guard("b"))
+        self.release.set()
+        first.join(5)
+        self.assertEqual(self.calls, ["a"])
+        metrics = guard.metrics()
+        self.assertEqual((metrics["started"], metrics["completed"], metrics["skipped"], metrics["active"]), (1, 1, 1, 0))
+        self.assertEqual(guard("c"), "c")
+
+    def test_queue_overlapping_tick(self):
+        """Under the queue policy one tick waits for the slot, further ones are dropped"""
+        guard = RunGuard(self.job, policy="queue", max_queued=1)
+        first = self.start(guard, "a")
+        self.started.wait(5)
+        second = self.start(guard, "b")
+        for _ in range(500):
+            if guard.metrics()["waiting"] == 1:
+                break
+            threading.Event().wait(0.01)
+        self.assertIsNone(guard("c"))
+        self.release.set()
+        first.join(5)
+        second.join(5)
+        self.assertEqual(self.calls, ["a", "b"])
+        metrics = guard.metrics()
+        self.assertEqual((metrics["completed"], metrics["queued"], metrics["skipped"], metrics["waiting"]), (2, 1, 1, 0))
+
+    def test_failure_releases_slot(self):
+        """A failing run is counted and frees its slot"""
+        guard = RunGuard(mock.Mock(side_effect=[RuntimeError("boom"), "ok"]))
+        with self.assertRaises(RuntimeError):
+            guard()
+        self.assertEqual(guard(), "ok")
+        self.assertEqual(guard.metrics()["failed"], 1)
+        with self.assertRaises(ValueError):
+            RunGuard(self.job, policy="stack")
+
+class TestPipelineContext(unittest.TestCase):
+    def test_runs_log_to_their_own_files(self):
+        """Overlapping runs keep separate ids and log files"""
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        logger = logging.getLogger("trading.test_context")
+        barrier = threading.Barrier(2)
+        contexts = {}
+
+        def run(tag):
+            with PipelineContext() as ctx:
+                contexts[tag] = ctx
+                barrier.wait(5)
+                self.assertIs(get_pipeline_context(), ctx)
+                logger.info(f"message from {tag}")
+                barrier.wait(5)
+
+        with mock.patch.object(logging_utils, "LOGS_DIR", Path(tmp.name)):
+            threads = [threading.Thread(target=run, args=(tag,)) for tag in ("a", "b")]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join(5)
+
+        self.assertNotEqual(contexts["a"].pipeline_id, contexts["b"].pipeline_id)
+        for tag, other in (("a", "b"), ("b", "a")):
+            text = contexts[tag].log_file.read_text()
+            self.assertIn(f"message from {tag}", text)
+            self.assertNotIn(f"message from {other}", text)
+            self.assertIn(contexts[tag].pipeline_id, text)
+        self.assertNotIn(get_pipeline_context(), contexts.values())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import time
+import unittest
+from unittest import mock
+import pandas as pd
+from trading import datasource, preprocess, stages
+from tests.test_datasource import FakeFyers
+
+class TestStagedPipeline(unittest.TestCase):
+    def test_fast_items_pass_slow_ones(self):
+        """A slow item in one stage does not hold up the others"""
+        done = []
+
+        def first(item):
+            if item == "slow":
+                time.sleep(0.3)
+            return item
+
+        def last(item):
+            done.append(item)
+            return item
+
+        run = stages.StagedPipeline([stages.Stage("a", first, workers=2), stages.Stage("b", last)])
+        results = run.run(["slow", "x", "y", "z"])
+        self.assertEqual(sorted(results), ["slow", "x", "y", "z"])
+        self.assertEqual(done[-1], "slow")
+        self.assertEqual(run.stats()["a"]["processed"], 4)
+        self.assertGreaterEqual(run.stats()["a"]["max_ms"], 300)
+
+    def test_backpressure(self):
+        """Bounded queues never hold more than maxsize items"""
+        depths = []
+        run = None
+
+        def slow(item):
+            depths.append(run.stats()["slow"]["queue_depth"])
+            time.sleep(0.01)
+            return item
+
+        run = stages.StagedPipeline([
+            stages.Stage("fast", lambda item: item, workers=4, maxsize=2),
+            stages.Stage("slow", slow, maxsize=2),
+        ])
+        self.assertEqual(len(run.run(range(20))), 20)
+        self.assertLessEqual(max(depths), 2)
+        self.assertEqual(run.stats()["slow"]["queue_depth"], 0)
+
+    def test_failures_are_isolated(self):
+        """An item that raises is dropped and counted; the rest complete"""
+        def check(item):
+            if item == 3:
+                raise ValueError("bad item")
+            return item
+
+        run = stages.StagedPipeline([stages.Stage("check", check, workers=2), stages.Stage("keep", lambda i: i)])
+        self.assertEqual(sorted(run.run(range(6))), [0, 1, 2, 4, 5])
+        self.assertEqual(run.stats()["check"]["failed"], 1)
+        self.assertEqual([(name, item) for name, item, _ in run.errors], [("check", 3)])
+
+class TestLivePipeline(unittest.TestCase):
+    def test_symbols_flow_through(self):
+        """Every symbol is fetched, featurized, evaluated and executed independently"""
+        symbols = ["NSE:TEST1-EQ", "NSE:TEST2-EQ", "NSE:TEST3-EQ"]
+        fake = FakeFyers(symbols, pd.Timestamp.now().floor("min") - pd.Timedelta(minutes=10))
+        cfg = {"symbols": symbols, "lookback_hours": 24, "bar_cache": {"enabled": False},
+               "live_pipeline": {"queue_size": 1, "workers": {"fetch": 3, "features": 2}}}
+        execute = mock.Mock(side_effect=lambda signals: [{"status": "ok"}] * len(signals))
+
+        def compute(raw):
+            return preprocess.compute_features(raw, rsi_period=3, sma_fast_period=2, sma_slow_period=4)
+
+        with mock.patch.object(datasource, "_get_fyers_client", return_value=fake):
+            run = stages.live_pipeline(cfg, compute, execute=execute)
+            work = [stages.SymbolWork(sym) for sym in symbols]
+            results = run.run(work)
+
+        self.assertEqual(sorted(w.symbol for w in results), symbols)
+        for w in work:
+            self.assertEqual(w.fetch.status, "ok")
+            self.assertEqual(set(w.raw.index.get_level_values("symbol")), {w.symbol})
+            self.assertEqual(set(w.features["symbol"]), {w.symbol})
+        self.assertEqual({name: s["processed"] for name, s in run.stats().items()},
+                         {name: 3 for name in stages.STAGE_NAMES})
+        self.assertEqual(execute.call_count, sum(1 for w in work if w.signals))
+        for w in work:
+            self.assertEqual([t["execution"] for t in w.trades], [{"status": "ok"}] * len(w.signals))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,156 @@
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+import pandas as pd
+import numpy as np
+from trading.backtest.store import MarketDataStore
+from trading.backtest.mmap_cache import BarCache
+from trading.backtest import engine as backtest_engine, store as market_store
+from trading.backtest.engine import BacktestEngine
+
+class TestMarketDataStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = MarketDataStore(Path(self.tmp.name) / "market")
+
+        # Two overlapping snapshots spanning three months
+        dates = pd.date_range("2024-01-30", "2024-03-02", freq="1h")
+        frames = []
+        for symbol in ["NSE:TEST1-EQ", "NSE:TEST2-EQ"]:
+            frames.append(pd.DataFrame({
+                "timestamp": dates,
+                "symbol": symbol,
+                "open": np.arange(len(dates), dtype=float),
+                "high": np.arange(len(dates), dtype=float) + 1,
+                "low": np.arange(len(dates), dtype=float) - 1,
+                "close": np.arange(len(dates), dtype=float),
+                "volume": 100
+            }))
+        self.bars = pd.concat(frames, ignore_index=True)
+        self.first = self.bars[self.bars["timestamp"] < "2024-02-20"]
+        self.second = self.bars[self.bars["timestamp"] >= "2024-02-10"]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_overlapping_snapshots_deduplicated(self):
+        """Writing overlapping snapshots stores each bar once"""
+        self.store.write(self.first)
+        added = self.store.write(self.second)
+        self.assertEqual(added, len(self.bars) - len(self.first))
+
+        loaded = self.store.load("2024-01-01", "2024-12-31")
+        self.assertEqual(len(loaded), len(self.bars))
+        self.assertTrue(loaded.index.is_unique)
+        self.assertEqual(loaded["volume"].dtype, np.int64)
+
+    def test_slice_and_partition_pruning(self):
+        """Loads return only the requested slice and touch only its partitions"""
+        self.store.write(self.bars)
+        start, end = pd.Timestamp("2024-02-05"), pd.Timestamp("2024-02-06")
+
+        parts = self.store.partitions(start, end, ["NSE:TEST1-EQ"])
+        self.assertEqual([p.name for p in parts], ["month=2024-02.parquet"])
+
+        loaded = self.store.load(start, end, ["NSE:TEST1-EQ"])
+        timestamps = loaded.index.get_level_values("timestamp")
+        self.assertEqual(len(loaded), 25)
+        self.assertTrue((timestamps >= start).all() and (timestamps <= end).all())
+        self.assertEqual(list(loaded.index.get_level_values("symbol").unique()), ["NSE:TEST1-EQ"])
+
+    def test_ingest_directory(self):
+        """CSV and Parquet snapshots are both ingested"""
+        raw = Path(self.tmp.name) / "raw"
+        raw.mkdir()
+        self.first.to_csv(raw / "raw_1.csv", index=False)
+        self.second.set_index(["timestamp", "symbol"]).to_parquet(raw / "raw_2.parquet")
+
+        self.assertEqual(self.store.ingest_directory(raw), len(self.bars))
+        self.assertEqual(self.store.symbols(), ["NSE:TEST1-EQ", "NSE:TEST2-EQ"])
+
+    def test_load_falls_back_to_raw_snapshots(self):
+        """Partitions with no rows in the slice fall back to every raw snapshot, cached under their key"""
+        self.store.write(self.first)
+        raw = Path(self.tmp.name) / "raw"
+        raw.mkdir()
+        self.second.set_index(["timestamp", "symbol"]).to_parquet(raw / "raw_2.parquet")
+        cache = BarCache(Path(self.tmp.name) / "cache")
+        start, end = pd.Timestamp("2024-02-25"), pd.Timestamp("2024-02-26")
+        self.assertTrue(self.store.partitions(start, end))
+        with mock.patch.object(backtest_engine, "MarketDataStore", lambda: self.store), \
+                mock.patch.object(backtest_engine, "BarCache", lambda **kwargs: cache), \
+                mock.patch.object(market_store, "RAW_DIR", raw):
+            loaded = BacktestEngine.load_data(start, end, use_cache=True)
+        self.assertEqual(len(loaded), 2 * 25)
+        self.assertIsNotNone(cache.open(cache.key(start, end, None, [raw / "raw_2.parquet"])))
+
+class TestBarCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = BarCache(Path(self.tmp.name) / "cache")
+        self.source = Path(self.tmp.name) / "raw.csv"
+        self.source.write_text("placeholder")
+
+        dates = pd.date_range("2024-01-01", periods=48, freq="1h")
+        frames = []
+        for i, symbol in enumerate(["TEST2", "TEST1"]):
+            prices = 100 + i + np.sin(np.arange(len(dates)) / 3)
+            frames.append(pd.DataFrame({
+                "timestamp": dates, "symbol": symbol, "open": prices, "high": prices + 1,
+                "low": prices - 1, "close": prices, "volume": np.arange(len(dates))
+            }))
+        self.data = pd.concat(frames).set_index(["timestamp", "symbol"]).sort_index()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_roundtrip_is_memory_mapped(self):
+        """Cached frames equal the original and are backed by memory maps"""
+        key = self.cache.key("2024-01-01", "2024-01-03", None, [self.source])
+        self.assertIsNone(self.cache.open(key))
+        self.cache.write(key, self.data)
+
+        cached = self.cache.open(key)
+        self.assertTrue(cached.index.equals(self.data.index))
+        for col in self.data.columns:
+            np.testing.assert_array_equal(cached[col].to_numpy(), self.data[col].to_numpy())
+            self.assertIsInstance(cached[col].values, np.memmap)
+
+    def test_key_tracks_sources(self):
+        """Changing a source file or the slice changes the key"""
+        key = self.cache.key("2024-01-01", "2024-01-03", None, [self.source])
+        self.assertNotEqual(key, self.cache.key("2024-01-01", "2024-01-04", None, [self.source]))
+        self.assertNotEqual(key, self.cache.key("2024-01-01", "2024-01-03", ["TEST1"], [self.source]))
+        self.source.write_text("placeholder, now longer")
+        self.assertNotEqual(key, self.cache.key("2024-01-01", "2024-01-03", None, [self.source]))
+
+    def test_lru_eviction(self):
+        """Entries beyond the limits are evicted least-recently-used first"""
+        cache = BarCache(Path(self.tmp.name) / "bounded", max_entries=2)
+        keys = [cache.key("2024-01-01", f"2024-01-0{day}", None, [self.source]) for day in (2, 3, 4)]
+        cache.write(keys[0], self.data)
+        cache.write(keys[1], self.data)
+        time.sleep(0.01)
+        self.assertIsNotNone(cache.open(keys[0]))   # keys[1] is now the least recently used
+        cache.write(keys[2], self.data)
+        self.assertIsNone(cache.open(keys[1]))
+        self.assertIsNotNone(cache.open(keys[0]))
+        self.assertIsNotNone(cache.open(keys[2]))
+
+        tiny = BarCache(Path(self.tmp.name) / "bounded", max_mb=0)
+        tiny.write(keys[1], self.data)
+        self.assertEqual([p.name for p in tiny.root.iterdir()], [keys[1]])   # the new entry is kept
+
+    def test_backtest_on_cached_frame(self):
+        """The vectorized backtest runs directly on read-only cached columns"""
+        key = self.cache.key("2024-01-01", "2024-01-03", None, [self.source])
+        self.cache.write(key, self.data)
+        engine = BacktestEngine()
+        engine.settings = dict(engine.settings, sma_fast_period=3, sma_slow_period=6)
+        results = engine.run(self.cache.open(key), mode="vectorized")
+        self.assertEqual(len(results["portfolio_values"]), 48)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import unittest
+from unittest import mock
+import pandas as pd
+import numpy as np
+from trading import stream
+from trading.incremental import IncrementalFeatureEngine
+from trading.intelligence import rules
+
+class TestStreamingPipeline(unittest.TestCase):
+    def setUp(self):
+        """Three sessions of minute bars for two symbols"""
+        rng = np.random.default_rng(3)
+        sessions = [pd.date_range(f"2024-01-0{d} 03:45", periods=375, freq="1min") for d in (1, 2, 3)]
+        dates = sessions[0].append(sessions[1:])
+        frames = []
+        for symbol in ["TEST1", "TEST2"]:
+            close = 100 * (1 + rng.normal(0, 0.003, len(dates)).cumsum())
+            frames.append(pd.DataFrame({
+                "timestamp": dates, "symbol": symbol, "open": close, "high": close * 1.001,
+                "low": close * 0.999, "close": close, "volume": rng.integers(100, 1000, len(dates))
+            }))
+        self.raw = pd.concat(frames).set_index(["timestamp", "symbol"]).sort_index()
+
+    def engine(self):
+        return IncrementalFeatureEngine(rsi_period=3, sma_fast_period=2, sma_slow_period=4)
+
+    def expected_signals(self, raw):
+        feats = self.engine().update(raw)
+        table = rules.generate_signal_table(feats)
+        return [(pd.Timestamp(t), s, str(side)) for t, s, side in zip(table["timestamp"], table["symbol"], table["side"])]
+
+    def test_signals_on_bar_close(self):
+        """Each crossover is emitted by the hour's last minute bar and matches the batch rules"""
+        execute = mock.Mock()
+        pipeline = stream.StreamingPipeline(stream.ReplayFeed(self.raw), self.engine(), execute=execute)
+        emitted = []
+        for bar in pipeline.feed:
+            for sig in pipeline.on_bar(bar):
+                self.assertEqual(bar.timestamp, sig.timestamp + pd.Timedelta("59min"))
+                emitted.append((sig.timestamp, sig.symbol, sig.side))
+        expected = self.expected_signals(self.raw)
+        self.assertTrue(expected)
+        self.assertEqual(sorted(emitted), sorted(expected))
+        self.assertEqual(execute.call_count, len(emitted))
+        self.assertEqual(len(pipeline.latencies_ms), len(emitted))
+
+        # Same state as feeding the whole frame through the batch update
+        reference = self.engine()
+        reference.update(self.raw)
+        pd.testing.assert_frame_equal(pipeline.engine.frame(), reference.frame())
+
+    def test_missing_last_minute(self):
+        """Hours without their last minute are evaluated when the next hour starts"""
+        timestamps = self.raw.index.get_level_values("timestamp")
+        raw = self.raw[timestamps.minute != 59]
+        pipeline = stream.StreamingPipeline(stream.ReplayFeed(raw), self.engine(), execute=mock.Mock())
+        emitted = []
+        for bar in pipeline.feed:
+            emitted.extend((s.timestamp, s.symbol, s.side) for s in pipeline.on_bar(bar))
+        # The session's final hour is never closed by a later bar
+        last_hour = timestamps.max().floor("h")
+        expected = [e for e in self.expected_signals(raw) if e[0] != last_hour]
+        self.assertEqual(sorted(emitted), sorted(expected))
+
+    def test_warm_up_and_subscribe(self):
+        """Bars already folded in by the warm-up are skipped and the feed honours subscribe"""
+        timestamps = self.raw.index.get_level_values("timestamp")
+        cutoff = pd.Timestamp("2024-01-02 06:00")
+        feed = stream.ReplayFeed(self.raw)
+        feed.subscribe(["TEST1"])
+        pipeline = stream.StreamingPipeline(feed, self.engine(), execute=mock.Mock())
+        pipeline.warm_up(self.raw[timestamps < cutoff])
+        self.assertEqual(pipeline.run(), len(self.raw.xs("TEST1", level="symbol")))
+        self.assertEqual(pipeline.engine.states["TEST2"].last_ts, cutoff - pd.Timedelta("1min"))
+
+        reference = self.engine()
+        reference.update(self.raw.xs("TEST1", level="symbol", drop_level=False))
+        actual = pipeline.engine.frame()
+        pd.testing.assert_frame_equal(actual[actual["symbol"] == "TEST1"].reset_index(drop=True), reference.frame())
+
+    def test_feed_requires_iter(self):
+        """A feed without __iter__ fails at construction, not mid-stream"""
+        class Silent(stream.Feed):
+            pass
+
+        with self.assertRaises(TypeError):
+            Silent()
+
+class TestMinuteBarBuilder(unittest.TestCase):
+    def test_ticks_to_bars(self):
+        """Ticks aggregate into OHLC with per-minute volume from the cumulative count"""
+        builder = stream.MinuteBarBuilder()
+        t = pd.Timestamp("2024-01-01 09:15")
+        self.assertIsNone(builder.add("A", t + pd.Timedelta("5s"), 100.0, 1000))
+        self.assertIsNone(builder.add("A", t + pd.Timedelta("20s"), 102.0, 1050))
+        self.assertIsNone(builder.add("A", t + pd.Timedelta("40s"), 99.0, 1100))
+        bar = builder.add("A", t + pd.Timedelta("65s"), 101.0, 1130)
+        self.assertEqual((bar.timestamp, bar.open, bar.high, bar.low, bar.close, bar.volume),
+                         (t, 100.0, 102.0, 99.0, 99.0, 100.0))
+        self.assertEqual(builder.flush(t + pd.Timedelta("90s")), [])
+        [bar] = builder.flush(t + pd.Timedelta("2min"))
+        self.assertEqual((bar.timestamp, bar.close, bar.volume), (t + pd.Timedelta("1min"), 101.0, 30.0))
+
+if __name__ == "__main__":
+    unittest.main()
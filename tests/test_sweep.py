@@ -0,0 +1,65 @@
+import tempfile
+import unittest
+from pathlib import Path
+import pandas as pd
+import numpy as np
+from trading.backtest.engine import BacktestEngine
+from trading.backtest.mmap_cache import BarCache
+from trading.backtest.sweep import grid, random_search, apply_params, sweep
+
+class TestSweep(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        rng = np.random.default_rng(3)
+        dates = pd.date_range("2024-01-01", periods=300, freq="1h")
+        frames = []
+        for symbol in ["TEST1", "TEST2"]:
+            prices = 100 * (1 + rng.normal(0, 0.01, len(dates)).cumsum())
+            frames.append(pd.DataFrame({
+                "timestamp": dates, "symbol": symbol, "open": prices, "high": prices * 1.01,
+                "low": prices * 0.99, "close": prices, "volume": 1000
+            }))
+        self.data = pd.concat(frames).set_index(["timestamp", "symbol"]).sort_index()
+        self.settings = BacktestEngine().settings
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_search_spaces(self):
+        """Grid enumerates all combinations; random search respects ranges"""
+        combos = grid({"sma_fast_period": [5, 10], "sma_slow_period": [20, 30, 40]})
+        self.assertEqual(len(combos), 6)
+        self.assertIn({"sma_fast_period": 10, "sma_slow_period": 30}, combos)
+
+        samples = random_search({"sma_fast_period": {"low": 3, "high": 8},
+                                 "backtest.position_fraction": {"low": 0.05, "high": 0.2}}, 20)
+        self.assertTrue(all(3 <= s["sma_fast_period"] <= 8 for s in samples))
+        self.assertTrue(all(isinstance(s["sma_fast_period"], int) for s in samples))
+        self.assertTrue(all(0.05 <= s["backtest.position_fraction"] <= 0.2 for s in samples))
+
+    def test_apply_params(self):
+        """Dotted keys override nested settings without touching the original"""
+        updated = apply_params(self.settings, {"backtest.slippage": 0.01, "sma_fast_period": 3})
+        self.assertEqual(updated["backtest"]["slippage"], 0.01)
+        self.assertEqual(updated["sma_fast_period"], 3)
+        self.assertNotEqual(self.settings["backtest"]["slippage"], 0.01)
+        with self.assertRaises(ValueError):
+            apply_params(self.settings, {"unknown": 1})
+
+    def test_parallel_sweep_matches_serial(self):
+        """Each row of the sweep equals a direct backtest with the same parameters"""
+        combos = grid({"sma_fast_period": [3, 5], "sma_slow_period": [10, 20]})
+        results = sweep(self.data, combos, max_workers=2, settings=self.settings,
+                        cache=BarCache(Path(self.tmp.name)))
+        self.assertEqual(len(results), 4)
+        self.assertTrue(results["error"].isna().all())
+
+        for params, row in zip(combos, results.to_dict("records")):
+            engine = BacktestEngine(settings=apply_params(self.settings, params))
+            expected = engine.run(self.data, mode="vectorized")
+            self.assertEqual(row["total_return"], expected["performance_metrics"]["total_return"])
+            self.assertEqual(row["total_trades"], expected["portfolio_summary"]["total_trades"])
+        self.assertEqual(list(Path(self.tmp.name).iterdir()), [])
+
+if __name__ == "__main__":
+    unittest.main()
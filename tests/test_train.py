@@ -0,0 +1,61 @@
+import tempfile
+import unittest
+from pathlib import Path
+import pandas as pd
+import numpy as np
+from trading.intelligence import artifact, model as ml_model
+from trading.intelligence.train import time_series_folds, train
+
+class TestTrain(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        rng = np.random.default_rng(9)
+        dates = pd.date_range("2024-01-01", periods=240, freq="1h")
+        frames = []
+        for symbol in ["TEST1", "TEST2"]:
+            close = 100 * (1 + rng.normal(0, 0.01, len(dates)).cumsum())
+            frames.append(pd.DataFrame({
+                "timestamp": dates, "symbol": symbol, "close": close,
+                "rsi": rng.uniform(0, 100, len(dates)), "sma_fast": close * 1.001,
+                "sma_slow": close * 0.999,
+            }))
+        self.feat = pd.concat(frames, ignore_index=True)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+        ml_model.clear_cache()
+
+    def test_folds_are_time_ordered_and_purged(self):
+        """Test rows always follow train rows, with a gap for the label horizon"""
+        timestamps = self.feat["timestamp"].to_numpy()
+        folds = time_series_folds(timestamps, n_splits=4, gap=2)
+        self.assertEqual(len(folds), 4)
+        unique = np.unique(timestamps)
+        for train_idx, test_idx in folds:
+            last_train, first_test = timestamps[train_idx].max(), timestamps[test_idx].min()
+            self.assertEqual(np.searchsorted(unique, first_test) - np.searchsorted(unique, last_train), 3)
+            # Every symbol at a bar is on the same side
+            self.assertFalse(set(timestamps[train_idx]) & set(timestamps[test_idx]))
+        self.assertGreater(len(folds[-1][0]), len(folds[0][0]))
+        with self.assertRaises(ValueError):
+            time_series_folds(timestamps[:10], n_splits=5)
+
+    def test_train_is_reproducible_and_loadable(self):
+        """Training twice gives the same weights; the artifact is what load_model reads"""
+        training = {"estimator": "random_forest", "params": {"n_estimators": 10}, "n_splits": 3, "seed": 1}
+        first = train(self.feat, training, max_workers=2)
+        second = train(self.feat, training, max_workers=2)
+        self.assertEqual(len(first.metadata["cv"]), 3)
+        self.assertEqual(first.metadata["cv"], second.metadata["cv"])
+        self.assertEqual(first.metadata["data_digest"], second.metadata["data_digest"])
+        np.testing.assert_array_equal(first.predict_proba(self.feat), second.predict_proba(self.feat))
+
+        path = Path(self.tmp.name) / "model"
+        artifact.save(first, path)
+        loaded = ml_model.load_model(path)
+        self.assertEqual(loaded.schema.features, ["close", "rsi", "sma_fast", "sma_slow"])
+        self.assertEqual(loaded.metadata["cv"], first.metadata["cv"])
+        np.testing.assert_allclose(loaded.predict_proba(self.feat), first.predict_proba(self.feat))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import tempfile
+import unittest
+from pathlib import Path
+import pandas as pd
+import numpy as np
+from trading.backtest.engine import BacktestEngine
+from trading.backtest.mmap_cache import BarCache
+from trading.backtest.walkforward import make_folds, walk_forward
+
+class TestWalkForward(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        rng = np.random.default_rng(5)
+        dates = pd.date_range("2024-01-01", periods=24 * 20, freq="1h")
+        frames = []
+        for symbol in ["TEST1", "TEST2"]:
+            prices = 100 * (1 + rng.normal(0, 0.01, len(dates)).cumsum())
+            frames.append(pd.DataFrame({
+                "timestamp": dates, "symbol": symbol, "open": prices, "high": prices * 1.01,
+                "low": prices * 0.99, "close": prices, "volume": 1000
+            }))
+        self.data = pd.concat(frames).set_index(["timestamp", "symbol"]).sort_index()
+        self.settings = dict(BacktestEngine().settings, sma_fast_period=3, sma_slow_period=6)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_make_folds(self):
+        """Rolling folds keep a fixed train length; expanding folds start at the beginning"""
+        start, end = pd.Timestamp("2024-01-01"), pd.Timestamp("2024-01-21")
+        rolling = make_folds(start, end, train_days=5, test_days=5)
+        self.assertEqual(len(rolling), 3)
+        self.assertEqual(rolling[1].train_start, pd.Timestamp("2024-01-06"))
+        self.assertEqual(rolling[1].train_end, pd.Timestamp("2024-01-11"))
+        self.assertEqual(rolling[-1].test_end, end)
+
+        expanding = make_folds(start, end, train_days=5, test_days=5, step_days=2, expanding=True)
+        self.assertTrue(all(f.train_start == start for f in expanding))
+        self.assertEqual(expanding[1].train_end - expanding[0].train_end, pd.Timedelta(days=2))
+
+    def test_rules_folds_match_direct_backtest(self):
+        """Each fold's metrics equal a direct backtest of its out-of-sample window"""
+        result = walk_forward(self.data, train_days=5, test_days=5, max_workers=2,
+                              settings=self.settings, cache=BarCache(Path(self.tmp.name)))
+        folds = result["folds"]
+        self.assertEqual(len(folds), 3)
+        self.assertTrue(folds["error"].isna().all())
+        self.assertEqual(result["aggregate"]["total_trades"], folds["total_trades"].sum())
+        self.assertEqual(list(Path(self.tmp.name).iterdir()), [])
+
+        # Indicators are warmed up on the history before each window
+        from trading.backtest import vectorized
+        features = vectorized.panel_features(self.data, 3, 6).dropna().set_index(["timestamp", "symbol"])
+        fold = folds.iloc[1]
+        ts = features.index.get_level_values("timestamp")
+        window = features[(ts >= fold["train_end"]) & (ts < fold["test_end"])]
+        expected = BacktestEngine(settings=self.settings).run(window, mode="vectorized")
+        self.assertEqual(fold["total_return"], expected["performance_metrics"]["total_return"])
+
+    def test_refit_per_fold(self):
+        """Refitting trains a model on every train window and trades the test window with it"""
+        result = walk_forward(self.data, train_days=10, test_days=5, expanding=True, refit=True,
+                              max_workers=2, settings=self.settings, cache=BarCache(Path(self.tmp.name)))
+        folds = result["folds"]
+        self.assertEqual(len(folds), 2)
+        self.assertTrue(folds["error"].isna().all(), folds["error"].tolist())
+        self.assertTrue((folds["bars"] > 0).all())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,152 @@
+"""Chunked historical backfill around the Fyers history window.
+
+The history endpoint serves a limited number of days of 1-minute bars per
+request, so a long range is split into endpoint-sized chunks that are
+fetched in parallel and upserted into a deduplicated per-symbol history
+store, once per symbol after all of its chunks have arrived (an upsert
+rewrites the symbol's file). Completed chunks are recorded in a progress
+file, so an interrupted backfill resumes where it stopped.
+
+Usage:
+    python -m trading.backfill --start 2024-01-01 --end 2024-12-31 [--symbols NSE:TCS-EQ ...]
+"""
+
+import argparse
+import datetime as dt
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+import pandas as pd
+import yaml
+from . import datasource
+from .barstore import BarStore, HISTORY_DIR
+
+CONFIG_DIR = Path(__file__).resolve().parents[1] / "config"
+logger = logging.getLogger(__name__)
+
+
+def chunk_range(start: dt.date, end: dt.date, chunk_days: int = 60) -> List[Tuple[dt.date, dt.date]]:
+    """Split the inclusive date range into inclusive chunks of at most ``chunk_days`` days."""
+    chunks = []
+    cursor = start
+    while cursor <= end:
+        chunk_end = min(cursor + dt.timedelta(days=chunk_days - 1), end)
+        chunks.append((cursor, chunk_end))
+        cursor = chunk_end + dt.timedelta(days=1)
+    return chunks
+
+
+def _chunk_key(chunk: Tuple[dt.date, dt.date]) -> str:
+    return f"{chunk[0].isoformat()}:{chunk[1].isoformat()}"
+
+
+class BackfillProgress:
+    """Completed (symbol, chunk) pairs, persisted next to the history store."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.done: Dict[str, Set[str]] = {}
+        if path.exists():
+            with open(path) as f:
+                self.done = {sym: set(keys) for sym, keys in json.load(f).items()}
+
+    def is_done(self, symbol: str, chunk: Tuple[dt.date, dt.date]) -> bool:
+        return _chunk_key(chunk) in self.done.get(symbol, set())
+
+    def mark_done(self, symbol: str, *chunks: Tuple[dt.date, dt.date]):
+        self.done.setdefault(symbol, set()).update(_chunk_key(chunk) for chunk in chunks)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump({sym: sorted(keys) for sym, keys in self.done.items()}, f, indent=2)
+        os.replace(tmp, self.path)
+
+
+def backfill(start: dt.date, end: dt.date, symbols: Optional[List[str]] = None,
+             store: Optional[BarStore] = None, chunk_days: Optional[int] = None,
+             fyers=None, restart: bool = False) -> dict:
+    """Fill the history store for ``symbols`` between ``start`` and ``end``.
+
+    Chunks already recorded as done are skipped unless ``restart`` is set.
+    Failed chunks are left unrecorded so the next run retries them. Returns
+    a summary with counts of fetched, skipped and failed chunks.
+    """
+    with open(CONFIG_DIR / "settings.yaml") as f:
+        cfg = yaml.safe_load(f)
+    backfill_cfg = cfg.get("backfill", {})
+    if symbols is None:
+        symbols = cfg["symbols"]
+    if chunk_days is None:
+        chunk_days = backfill_cfg.get("chunk_days", 60)
+    if store is None:
+        store = BarStore(HISTORY_DIR)
+    if fyers is None:
+        fyers = datasource._get_fyers_client()
+
+    progress_path = store.root / "backfill_progress.json"
+    if restart and progress_path.exists():
+        progress_path.unlink()
+    progress = BackfillProgress(progress_path)
+
+    chunks = chunk_range(start, end, chunk_days)
+    pending = [(sym, chunk) for sym in symbols for chunk in chunks if not progress.is_done(sym, chunk)]
+    summary = {"chunks": len(symbols) * len(chunks), "skipped": len(symbols) * len(chunks) - len(pending),
+               "fetched": 0, "failed": 0, "bars_added": 0, "errors": []}
+    logger.info(f"Backfill {start} to {end}: {len(pending)} of {summary['chunks']} chunks pending")
+
+    requests = [
+        (sym, dt.datetime.combine(c_start, dt.time.min), dt.datetime.combine(c_end, dt.time.max))
+        for sym, (c_start, c_end) in pending
+    ]
+    # Chunks are held per symbol and written with one upsert once the symbol's last chunk is in
+    remaining: Dict[str, int] = {}
+    for sym, _ in pending:
+        remaining[sym] = remaining.get(sym, 0) + 1
+    fetched: Dict[str, list] = {}
+    # Results arrive on this thread, so store writes and progress updates are never concurrent
+    for i, result in datasource.fetch_iter(fyers, requests, **datasource.fetch_settings(cfg)):
+        sym, chunk = pending[i]
+        remaining[sym] -= 1
+        if result.status == "error":
+            summary["failed"] += 1
+            summary["errors"].append({"symbol": sym, "chunk": _chunk_key(chunk), "error": result.error})
+            logger.warning(f"Backfill chunk {sym} {_chunk_key(chunk)} failed: {result.error}")
+        else:
+            fetched.setdefault(sym, []).append((chunk, result.data))
+            summary["fetched"] += 1
+            logger.debug(f"Backfill chunk {sym} {_chunk_key(chunk)}: {result.rows} bars in {result.latency_ms:.0f} ms")
+        if remaining[sym] == 0 and sym in fetched:
+            done = fetched.pop(sym)
+            frames = [data for _, data in done if data is not None and not data.empty]
+            if frames:
+                summary["bars_added"] += store.upsert(sym, pd.concat(frames, ignore_index=True))
+            progress.mark_done(sym, *(chunk for chunk, _ in done))
+
+    logger.info(f"Backfill complete: {summary['fetched']} fetched, {summary['skipped']} skipped, "
+                f"{summary['failed']} failed, {summary['bars_added']} new bars")
+    return summary
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Backfill minute-bar history in endpoint-sized chunks")
+    parser.add_argument("--start", required=True, help="first date (YYYY-MM-DD)")
+    parser.add_argument("--end", required=True, help="last date (YYYY-MM-DD)")
+    parser.add_argument("--symbols", nargs="+", help="symbols to backfill (default: settings symbols)")
+    parser.add_argument("--chunk-days", type=int, help="days per request (default: backfill.chunk_days)")
+    parser.add_argument("--restart", action="store_true", help="ignore recorded progress")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s - %(message)s")
+    summary = backfill(
+        start=dt.date.fromisoformat(args.start),
+        end=dt.date.fromisoformat(args.end),
+        symbols=args.symbols,
+        chunk_days=args.chunk_days,
+        restart=args.restart,
+    )
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
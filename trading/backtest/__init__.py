@@ -3,5 +3,7 @@
 from .engine import BacktestEngine
 from .portfolio import Portfolio
 from .performance import calculate_performance_metrics
+from .store import MarketDataStore
+from .fills import FillSimulator
 
-__all__ = ['BacktestEngine', 'Portfolio', 'calculate_performance_metrics'] 
\ No newline at end of file
+__all__ = ['BacktestEngine', 'Portfolio', 'calculate_performance_metrics', 'MarketDataStore', 'FillSimulator'] 
\ No newline at end of file
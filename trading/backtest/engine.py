@@ -5,18 +5,25 @@ from datetime import datetime
 from pathlib import Path
 import yaml
 from typing import List, Dict, Optional
-from ..intelligence import predict
+from ..intelligence import predict, predict_table, rules
 from .portfolio import Portfolio
 from .performance import calculate_performance_metrics, calculate_trade_metrics
+from . import vectorized
+from . import store as market_store
+from .store import MarketDataStore
+from .mmap_cache import BarCache
+from .fills import FillSimulator, bar_arrays, bar_matrices
 
 CONFIG_DIR = Path(__file__).resolve().parents[2] / "config"
 
 class BacktestEngine:
-    def __init__(self):
-        # Load settings
-        with open(CONFIG_DIR / "settings.yaml", "r") as f:
-            self.settings = yaml.safe_load(f)
-            self.backtest_settings = self.settings.get("backtest", {})
+    def __init__(self, settings: Optional[dict] = None):
+        # Load settings unless given explicitly (e.g. by a parameter sweep)
+        if settings is None:
+            with open(CONFIG_DIR / "settings.yaml", "r") as f:
+                settings = yaml.safe_load(f)
+        self.settings = settings
+        self.backtest_settings = self.settings.get("backtest", {})
         
         # Initialize portfolio
         self.portfolio = Portfolio(
@@ -28,30 +35,48 @@ class BacktestEngine:
         # Initialize containers for results
         self.signals: List[dict] = []
         self.portfolio_values: List[dict] = []
+        self.fill_stats: dict = {}
     
-    def run(self, data: pd.DataFrame, use_ml: bool = False) -> dict:
-        """Run backtest on historical data."""
+    def run(self, data: pd.DataFrame, use_ml: bool = False, mode: Optional[str] = None, model=None) -> dict:
+        """Run backtest on historical data.
+
+        ``mode`` selects the engine: ``"event"`` replays the data one
+        timestamp at a time, ``"vectorized"`` uses the columnar core. It
+        defaults to ``backtest.engine`` in the settings. ``model`` replaces
+        the saved ML model when ``use_ml`` is set.
+        """
+        if mode is None:
+            mode = self.backtest_settings.get("engine", "event")
+        if mode == "vectorized":
+            return self.run_vectorized(data, use_ml=use_ml, model=model)
+        if mode != "event":
+            raise ValueError(f"Unknown backtest mode: {mode}")
+        
         # Ensure data is sorted
         data = data.sort_index()
+        symbols = data.index.get_level_values("symbol").unique()
+        col_of = {symbol: j for j, symbol in enumerate(symbols)}
+        fill_sim = self._fill_simulator(len(symbols))
         
         # Track portfolio value over time
         current_prices = {}
         
         # Process each timestamp
-        for timestamp, group in data.groupby(level="timestamp"):
+        for row, (timestamp, group) in enumerate(data.groupby(level="timestamp")):
             # Update current prices
-            for symbol, row in group.iterrows():
-                current_prices[symbol[1]] = row["close"]
+            for symbol, bar in group.iterrows():
+                current_prices[symbol[1]] = bar["close"]
             
             # Generate signals
-            signals = predict(group, use_ml=use_ml)
+            signals = predict(group, use_ml=use_ml, model=model)
             
-            # Execute trades based on signals
+            # Size orders based on signals
+            cols, quantities, prices = [], [], []
             for signal in signals:
                 # Determine position size
                 price = current_prices[signal.symbol]
                 position_value = min(
-                    self.portfolio.cash * 0.1,  # Use max 10% of portfolio per trade
+                    self.portfolio.cash * self.backtest_settings.get("position_fraction", 0.1),  # Max share of cash per trade
                     self.settings["notional_cap"]  # Respect notional cap
                 )
                 quantity = int(position_value / price)
@@ -61,13 +86,9 @@ class BacktestEngine:
                     if signal.side == "SELL":
                         quantity = -quantity
                     
-                    # Execute trade
-                    self.portfolio.execute_trade(
-                        symbol=signal.symbol,
-                        quantity=quantity,
-                        price=price,
-                        timestamp=signal.timestamp
-                    )
+                    cols.append(col_of[signal.symbol])
+                    quantities.append(quantity)
+                    prices.append(price)
                     
                     # Record signal
                     self.signals.append({
@@ -79,12 +100,91 @@ class BacktestEngine:
                         "quantity": quantity
                     })
             
+            # Match new and queued orders against this bar
+            fill_sim.submit(row, cols, quantities, prices)
+            fills = fill_sim.match(row, bar_arrays(group.droplevel("timestamp"), symbols))
+            for j, quantity, price in zip(fills.col, fills.quantity, fills.price):
+                self.portfolio.execute_trade(
+                    symbol=symbols[j],
+                    quantity=int(quantity),
+                    price=float(price),
+                    timestamp=timestamp,
+                    slippage=0.0
+                )
+            
             # Record portfolio value
             self.portfolio_values.append({
                 "timestamp": timestamp,
                 "value": self.portfolio.get_total_value(current_prices)
             })
         
+        self.fill_stats = dict(fill_sim.stats, open_orders=fill_sim.open_orders)
+        return self._build_results()
+    
+    def _fill_simulator(self, n_symbols: int) -> FillSimulator:
+        """Fill simulator configured from ``backtest.fills``."""
+        return FillSimulator(n_symbols, slippage=self.portfolio.slippage, **self.backtest_settings.get("fills", {}))
+    
+    def run_vectorized(self, data: pd.DataFrame, use_ml: bool = False, model=None) -> dict:
+        """Run backtest on historical data with the columnar core."""
+        data = data.sort_index()
+        close_df = vectorized.to_matrix(data, "close")
+        timestamps, symbols = close_df.index, close_df.columns
+        close = close_df.to_numpy(dtype=float)
+        
+        # Generate signals for the whole panel in one pass
+        feat = vectorized.panel_features(
+            data,
+            sma_fast_period=self.settings.get("sma_fast_period", 10),
+            sma_slow_period=self.settings.get("sma_slow_period", 20),
+            rsi_period=self.settings.get("rsi_period", 14)
+        )
+        if use_ml:
+            events = predict_table(
+                feat,
+                buy_threshold=self.settings.get("ml_confidence_buy_threshold", 0.55),
+                sell_threshold=self.settings.get("ml_confidence_sell_threshold", 0.45),
+                model=model
+            )
+        else:
+            events = rules.generate_signal_table(feat, confidence=self.settings.get("default_signal_confidence", 0.6))
+        events = events.drop_duplicates(["timestamp", "symbol"], keep="last")
+        orders = vectorized.order_matrix(events, timestamps, symbols)
+        
+        # Simulate fills and mark the portfolio to market
+        starting_cash = self.portfolio.cash
+        fill_sim = self._fill_simulator(len(symbols))
+        quantities, cash, fills, placed = vectorized.simulate(
+            self.portfolio, close, orders, timestamps, symbols,
+            notional_cap=self.settings["notional_cap"],
+            position_fraction=self.backtest_settings.get("position_fraction", 0.1),
+            bars=bar_matrices(data, timestamps, symbols),
+            fill_sim=fill_sim
+        )
+        values = vectorized.mark_to_market(close, quantities, cash, starting_cash)
+        self.fill_stats = dict(fill_sim.stats, open_orders=fill_sim.open_orders)
+        
+        # Record signals and portfolio values
+        confidence = events.set_index(["timestamp", "symbol"])["confidence"]
+        for order in placed:
+            timestamp, symbol = timestamps[order["row"]], symbols[order["col"]]
+            self.signals.append({
+                "timestamp": timestamp,
+                "symbol": symbol,
+                "side": "BUY" if order["quantity"] > 0 else "SELL",
+                "confidence": float(confidence.loc[(timestamp, symbol)]),
+                "price": order["price"],
+                "quantity": order["quantity"]
+            })
+        self.portfolio_values.extend(
+            {"timestamp": timestamp, "value": float(value)}
+            for timestamp, value in zip(timestamps, values)
+        )
+        
+        return self._build_results()
+    
+    def _build_results(self) -> dict:
+        """Assemble the result dict shared by all backtest modes."""
         # Calculate performance metrics
         portfolio_value_series = pd.Series(
             [v["value"] for v in self.portfolio_values],
@@ -101,17 +201,30 @@ class BacktestEngine:
             "portfolio_summary": portfolio_summary,
             "signals": self.signals,
             "portfolio_values": self.portfolio_values,
-            "trades": self.portfolio.trades
+            "trades": self.portfolio.trades,
+            "fill_stats": self.fill_stats
         }
     
     @staticmethod
-    def load_data(start_date: Optional[str] = None, end_date: Optional[str] = None) -> pd.DataFrame:
-        """Load historical data for backtesting."""
+    def load_data(start_date: Optional[str] = None, end_date: Optional[str] = None,
+                  symbols: Optional[List[str]] = None, use_cache: Optional[bool] = None) -> pd.DataFrame:
+        """Load historical data for backtesting.
+
+        Reads from the partitioned market-data store when it holds bars for
+        the requested slice, otherwise from the raw CSV/Parquet snapshots
+        (deduplicated on timestamp and symbol). With ``use_cache`` (default
+        ``backtest.mmap_cache``) the result is kept in a memory-mapped
+        columnar cache and later calls for the same slice open it without
+        parsing.
+        """
+        with open(CONFIG_DIR / "settings.yaml", "r") as f:
+            backtest_settings = yaml.safe_load(f).get("backtest", {})
+        
         # Use settings if dates not provided
-        if start_date is None:
-            start_date = BacktestEngine.settings.get("backtest", {}).get("start_date")
-        if end_date is None:
-            end_date = BacktestEngine.settings.get("backtest", {}).get("end_date")
+        start_date = start_date or backtest_settings.get("start_date")
+        end_date = end_date or backtest_settings.get("end_date")
+        if use_cache is None:
+            use_cache = backtest_settings.get("mmap_cache", True)
         
         if not start_date or not end_date:
             raise ValueError("Start date and end date must be provided either in settings or as parameters")
@@ -120,24 +233,69 @@ class BacktestEngine:
         start_dt = pd.Timestamp(start_date)
         end_dt = pd.Timestamp(end_date)
         
-        # Load data from CSV files in the raw directory
-        raw_dir = Path(__file__).resolve().parents[2] / "data" / "raw"
+        # Prefer the partitioned store: only the needed partitions and row groups are read
+        store = MarketDataStore()
+        sources = []
+        if market_store.pq is not None and store.has_data():
+            sources = store.partitions(start_dt, end_dt, symbols)
+        use_store = bool(sources)
+        if not use_store:
+            sources = BacktestEngine._raw_sources()
+        
+        cache = BarCache(max_mb=backtest_settings.get("mmap_cache_max_mb", 2048)) if use_cache else None
+        if cache is not None:
+            key = cache.key(start_dt, end_dt, symbols, sources)
+            cached = cache.open(key)
+            if cached is not None:
+                return cached
+        
+        combined_df = store.load(start_dt, end_dt, symbols) if use_store else None
+        if combined_df is None or combined_df.empty:
+            if use_store:
+                # The partitions hold no rows for this slice; the result comes from the raw snapshots
+                sources = BacktestEngine._raw_sources()
+                if cache is not None:
+                    key = cache.key(start_dt, end_dt, symbols, sources)
+                    cached = cache.open(key)
+                    if cached is not None:
+                        return cached
+            combined_df = BacktestEngine._read_snapshots(sources, start_dt, end_dt, symbols)
+        if combined_df is None:
+            raise ValueError(f"No data found between {start_date} and {end_date}")
+        
+        if cache is not None:
+            cache.write(key, combined_df)
+        return combined_df
+    
+    @staticmethod
+    def _raw_sources() -> List[Path]:
+        """Raw CSV snapshots, plus Parquet ones when pyarrow is available."""
+        sources = sorted(market_store.RAW_DIR.glob("*.csv"))
+        if market_store.pq is not None:
+            sources += sorted(market_store.RAW_DIR.glob("*.parquet"))
+        return sources
+    
+    @staticmethod
+    def _read_snapshots(files: List[Path], start_dt: pd.Timestamp, end_dt: pd.Timestamp,
+                        symbols: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+        """Read raw snapshots into one deduplicated (timestamp, symbol) frame."""
         dfs = []
         
-        for file in raw_dir.glob("*.csv"):
-            df = pd.read_csv(file)
-            df["timestamp"] = pd.to_datetime(df["timestamp"])
+        for file in files:
+            df = market_store.read_snapshot(file)
             df = df[(df["timestamp"] >= start_dt) & (df["timestamp"] <= end_dt)]
+            if symbols is not None:
+                df = df[df["symbol"].isin(symbols)]
             if not df.empty:
                 dfs.append(df)
         
         if not dfs:
-            raise ValueError(f"No data found between {start_date} and {end_date}")
+            return None
         
-        # Combine all data
-        combined_df = pd.concat(dfs)
+        # Combine all data; overlapping snapshots hold the same bars more than once
+        combined_df = pd.concat(dfs).drop_duplicates(["timestamp", "symbol"], keep="last")
         
         # Set multi-index
         combined_df = combined_df.set_index(["timestamp", "symbol"]).sort_index()
         
-        return combined_df 
\ No newline at end of file
+        return combined_df
@@ -0,0 +1,197 @@
+"""Bar-level fill simulation for backtests.
+
+``FillSimulator`` keeps every working order in flat numpy arrays and
+matches all of them against one bar of every symbol at once:
+
+- market orders fill at the bar's close (the price the signal was
+  computed on), with slippage against the trader;
+- limit orders fill when the bar trades through the limit (``low`` for a
+  BUY, ``high`` for a SELL), at the limit or the better open on a gap;
+- stop orders trigger when the bar reaches the stop (``high`` for a BUY,
+  ``low`` for a SELL) and fill at the stop or the worse open on a gap,
+  with slippage; afterwards they work as market orders.
+
+Per bar each symbol can fill at most ``volume_share`` of its ``volume``,
+shared between its orders first-in first-out. Whatever is left stays
+queued for later bars until it fills or ``ttl_bars`` have passed. Limit
+and stop orders start working on the bar after they are submitted, since
+their signal is only known at the close.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence
+import numpy as np
+import pandas as pd
+
+MARKET, LIMIT, STOP = 0, 1, 2
+ORDER_TYPES = {"market": MARKET, "limit": LIMIT, "stop": STOP}
+NEVER = np.iinfo(np.int64).max
+
+_FIELDS = {
+    "id": np.int64, "col": np.int64, "sign": np.int8, "type": np.int8, "remaining": np.int64,
+    "limit": float, "stop": float, "triggered": bool, "active_from": np.int64, "expires": np.int64,
+}
+
+
+@dataclass
+class Fills:
+    """Fills of one bar, one entry per (order, bar)."""
+    order_id: np.ndarray
+    col: np.ndarray
+    quantity: np.ndarray   # signed
+    price: np.ndarray      # executed price, slippage included
+
+    def __len__(self):
+        return len(self.order_id)
+
+
+def _columns(frame: pd.DataFrame, column) -> Dict[str, np.ndarray]:
+    """``open``/``high``/``low``/``close``/``volume`` arrays from ``column(name)``.
+
+    Missing ``open``/``high``/``low`` columns fall back to ``close``; a
+    missing ``volume`` column leaves fills uncapped.
+    """
+    bars = {"close": column("close")}
+    for name in ("open", "high", "low"):
+        bars[name] = column(name) if name in frame.columns else bars["close"]
+    bars["volume"] = column("volume") if "volume" in frame.columns else np.full_like(bars["close"], np.nan)
+    return bars
+
+
+def bar_matrices(data: pd.DataFrame, index: pd.Index, columns: pd.Index) -> Dict[str, np.ndarray]:
+    """Timestamp x symbol bar matrices of a (timestamp, symbol) indexed frame."""
+    return _columns(data, lambda name: data[name].unstack(level="symbol")
+                    .reindex(index=index, columns=columns).to_numpy(dtype=float))
+
+
+def bar_arrays(bars: pd.DataFrame, symbols: pd.Index) -> Dict[str, np.ndarray]:
+    """Per-symbol arrays of one timestamp's bars (a symbol-indexed frame)."""
+    bars = bars.reindex(symbols)
+    return _columns(bars, lambda name: bars[name].to_numpy(dtype=float))
+
+
+class FillSimulator:
+    def __init__(self, n_symbols: int, slippage: float = 0.0, volume_share: Optional[float] = None,
+                 order_type: str = "market", limit_offset: float = 0.0, stop_offset: float = 0.0,
+                 ttl_bars: Optional[int] = None):
+        if order_type not in ORDER_TYPES:
+            raise ValueError(f"Unknown order type: {order_type}")
+        self.n_symbols = n_symbols
+        self.slippage = slippage
+        self.volume_share = volume_share
+        self.order_type = order_type
+        self.limit_offset = limit_offset
+        self.stop_offset = stop_offset
+        self.ttl_bars = ttl_bars
+        self._orders = {name: np.empty(0, dtype=dtype) for name, dtype in _FIELDS.items()}
+        self._next_id = 0
+        self.stats = {"submitted": 0, "filled": 0, "partial_fills": 0, "expired": 0}
+
+    @property
+    def open_orders(self) -> int:
+        return len(self._orders["id"])
+
+    def submit(self, row: int, cols: Sequence[int], quantities: Sequence[int],
+               prices: Sequence[float], order_type: Optional[str] = None) -> np.ndarray:
+        """Queue signed ``quantities`` for ``cols`` on bar ``row``; return the order ids.
+
+        ``prices`` are the signal prices; limit and stop levels are set
+        ``limit_offset``/``stop_offset`` away from them (below/above for a
+        BUY limit/stop, the other way round for a SELL).
+        """
+        cols = np.asarray(cols, dtype=np.int64)
+        quantities = np.asarray(quantities, dtype=np.int64)
+        prices = np.asarray(prices, dtype=float)
+        keep = quantities != 0
+        cols, quantities, prices = cols[keep], quantities[keep], prices[keep]
+        n = len(cols)
+        kind = ORDER_TYPES[order_type or self.order_type]
+        sign = np.sign(quantities).astype(np.int8)
+        ids = np.arange(self._next_id, self._next_id + n)
+        self._next_id += n
+        new = {
+            "id": ids,
+            "col": cols,
+            "sign": sign,
+            "type": np.full(n, kind, dtype=np.int8),
+            "remaining": np.abs(quantities),
+            "limit": prices * (1 - sign * self.limit_offset) if kind == LIMIT else np.full(n, np.nan),
+            "stop": prices * (1 + sign * self.stop_offset) if kind == STOP else np.full(n, np.nan),
+            "triggered": np.zeros(n, dtype=bool),
+            "active_from": np.full(n, row if kind == MARKET else row + 1),
+            "expires": np.full(n, row + self.ttl_bars if self.ttl_bars is not None else NEVER),
+        }
+        for name, dtype in _FIELDS.items():
+            column = np.asarray(new[name], dtype=dtype)
+            self._orders[name] = np.concatenate([self._orders[name], column]) if len(self._orders[name]) else column
+        self.stats["submitted"] += n
+        return ids
+
+    def _capacity(self, volume: np.ndarray) -> np.ndarray:
+        """Shares each symbol can fill on this bar."""
+        if self.volume_share is None:
+            return np.full(self.n_symbols, np.inf)
+        return np.where(np.isfinite(volume), np.floor(np.nan_to_num(volume) * self.volume_share), np.inf)
+
+    def match(self, row: int, bars: Dict[str, np.ndarray]) -> Fills:
+        """Match every working order against bar ``row``.
+
+        ``bars`` holds one ``open``/``high``/``low``/``close``/``volume``
+        value per symbol (see ``bar_arrays``).
+        """
+        o = self._orders
+        col, sign, kind = o["col"], o["sign"], o["type"]
+        bar_close = bars["close"][col]
+        live = (o["active_from"] <= row) & np.isfinite(bar_close) & (bar_close > 0)
+
+        # Market orders fill at the close
+        at_close = live & (kind == MARKET)
+        price = bar_close
+        hit = limit = None
+        if not at_close.all():  # resting orders need the bar's range
+            buy = sign > 0
+            bar_open, bar_high, bar_low = (bars[name][col] for name in ("open", "high", "low"))
+
+            # Stops that trigger on this bar fill at the stop, or the worse open on a gap;
+            # stops triggered on earlier bars work as market orders
+            stop = live & (kind == STOP)
+            at_close |= stop & o["triggered"]
+            hit = stop & ~o["triggered"] & np.where(buy, bar_high >= o["stop"], bar_low <= o["stop"])
+            o["triggered"] |= hit
+            price = np.where(hit, np.where(buy, np.fmax(bar_open, o["stop"]), np.fmin(bar_open, o["stop"])), price)
+
+            # Limits fill at the limit, or the better open on a gap; no slippage
+            limit = live & (kind == LIMIT) & np.where(buy, bar_low <= o["limit"], bar_high >= o["limit"])
+            price = np.where(limit, np.where(buy, np.fmin(bar_open, o["limit"]), np.fmax(bar_open, o["limit"])), price)
+        slipped = at_close if hit is None else at_close | hit
+        if self.slippage:
+            price = np.where(slipped, price * (1 + sign * self.slippage), price)
+        want = np.where(slipped if limit is None else slipped | limit, o["remaining"], 0)
+
+        # Share each symbol's volume between its orders in submission order
+        if self.volume_share is None:
+            fill = want
+        else:
+            order = np.argsort(col, kind="stable")
+            grouped_col, grouped_want = col[order], want[order]
+            before = np.cumsum(grouped_want) - grouped_want
+            first = np.r_[True, grouped_col[1:] != grouped_col[:-1]] if len(order) else np.empty(0, dtype=bool)
+            used = before - before[first][np.cumsum(first) - 1]
+            capacity = self._capacity(bars["volume"])[grouped_col]
+            fill = np.empty_like(want)
+            fill[order] = np.clip(capacity - used, 0, grouped_want).astype(np.int64)
+
+        filled = fill > 0
+        o["remaining"] = o["remaining"] - fill
+        fills = Fills(o["id"][filled], col[filled], (sign * fill)[filled], price[filled])
+        self.stats["filled"] += int(np.count_nonzero(filled & (o["remaining"] == 0)))
+        self.stats["partial_fills"] += int(np.count_nonzero(filled & (o["remaining"] > 0)))
+
+        # Drop what is done or expired; the rest carries over to the next bar
+        expired = (o["remaining"] > 0) & (o["expires"] <= row)
+        self.stats["expired"] += int(np.count_nonzero(expired))
+        keep = (o["remaining"] > 0) & ~expired
+        if not keep.all():
+            for name in _FIELDS:
+                o[name] = o[name][keep]
+        return fills
@@ -0,0 +1,159 @@
+"""Memory-mapped columnar cache of loaded backtest bars.
+
+Each cached slice is a directory of ``.npy`` files, one per column (OHLCV
+plus any numeric feature columns) for the whole (timestamp, symbol) panel,
+plus the timestamp and symbol levels and their codes. ``open`` maps the
+arrays read-only instead of parsing anything, so repeated
+``BacktestEngine.load_data`` calls start in
+milliseconds and every process opening the same slice shares its pages
+through the OS page cache.
+
+Entries are keyed by the requested slice and a fingerprint (path, size,
+mtime) of the source files, so they go stale automatically when the
+underlying data changes. Stale entries are evicted least-recently-used
+first once the cache exceeds ``max_mb`` or ``max_entries``.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+import numpy as np
+import pandas as pd
+
+CACHE_DIR = Path(__file__).resolve().parents[2] / "data" / "cache" / "bars"
+COLUMNS = ["open", "high", "low", "close", "volume"]
+
+
+def fingerprint(paths: Iterable[Path]) -> str:
+    """Digest of the path, size and modification time of each source file."""
+    digest = hashlib.sha1()
+    for path in sorted(Path(p) for p in paths):
+        stat = path.stat()
+        digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return digest.hexdigest()
+
+
+class BarCache:
+    def __init__(self, root: Path = CACHE_DIR, max_mb: float = 2048, max_entries: int = 32):
+        self.root = Path(root)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.max_entries = max_entries
+
+    @staticmethod
+    def key(start: pd.Timestamp, end: pd.Timestamp, symbols: Optional[Iterable[str]], sources: Iterable[Path]) -> str:
+        """Cache key for a slice of the given source files."""
+        spec = {
+            "start": pd.Timestamp(start).isoformat(),
+            "end": pd.Timestamp(end).isoformat(),
+            "symbols": sorted(symbols) if symbols is not None else None,
+            "sources": fingerprint(sources),
+        }
+        return hashlib.sha1(json.dumps(spec, sort_keys=True).encode()).hexdigest()[:20]
+
+    def path(self, key: str) -> Path:
+        return self.root / key
+
+    def write(self, key: str, df: pd.DataFrame) -> Path:
+        """Store a (timestamp, symbol) indexed frame of numeric columns under ``key``."""
+        df = df.sort_index()
+        ts_codes, ts_levels = pd.factorize(df.index.get_level_values("timestamp"), sort=True)
+        sym_codes, sym_levels = pd.factorize(df.index.get_level_values("symbol"), sort=True)
+
+        # Build in a scratch directory and rename it into place, so readers
+        # never see a half-written entry
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.root / f".{key}.{uuid.uuid4().hex[:8]}"
+        tmp.mkdir()
+        np.save(tmp / "timestamps.npy", np.asarray(ts_levels, dtype="datetime64[ns]"))
+        np.save(tmp / "timestamp_codes.npy", ts_codes.astype(np.int32))
+        np.save(tmp / "symbol_codes.npy", sym_codes.astype(np.int32))
+        columns = [str(c) for c in df.columns]
+        for col in columns:
+            dtype = np.int64 if col == "volume" else np.float64
+            np.save(tmp / f"{col}.npy", df[col].to_numpy(dtype=dtype))
+        with open(tmp / "meta.json", "w") as f:
+            json.dump({"symbols": [str(s) for s in sym_levels], "columns": columns, "rows": len(df)}, f)
+
+        target = self.path(key)
+        try:
+            os.rename(tmp, target)
+        except OSError:
+            # Another process cached the same slice first
+            shutil.rmtree(tmp, ignore_errors=True)
+        os.utime(target)
+        self.evict(keep=key)
+        return target
+
+    def evict(self, keep: Optional[str] = None) -> int:
+        """Drop least-recently-used entries beyond the size and count limits; return how many.
+
+        ``keep`` is never evicted. Processes that still map an evicted
+        entry keep reading it; the files go away when they unmap.
+        """
+        if not self.root.exists():
+            return 0
+        entries = []
+        for path in self.root.iterdir():
+            if path.name.startswith(".") or not path.is_dir():
+                continue  # entries still being written
+            try:
+                size = sum(f.stat().st_size for f in path.iterdir())
+                entries.append((path.stat().st_mtime_ns, size, path))
+            except FileNotFoundError:
+                continue
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        count = len(entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes and count <= self.max_entries:
+                break
+            if path.name == keep:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            count -= 1
+            removed += 1
+        return removed
+
+    def arrays(self, key: str) -> Optional[Dict[str, np.ndarray]]:
+        """Read-only memory-mapped arrays for ``key``, or None if not cached."""
+        path = self.path(key)
+        if not (path / "meta.json").exists():
+            return None
+        with open(path / "meta.json") as f:
+            meta = json.load(f)
+        arrays = {
+            name: np.load(path / f"{name}.npy", mmap_mode="r")
+            for name in ["timestamps", "timestamp_codes", "symbol_codes"] + meta.get("columns", COLUMNS)
+        }
+        arrays["symbols"] = np.asarray(meta["symbols"], dtype=object)
+        arrays["columns"] = meta.get("columns", COLUMNS)
+        try:
+            os.utime(path)  # mark as recently used
+        except OSError:
+            pass
+        return arrays
+
+    def open(self, key: str) -> Optional[pd.DataFrame]:
+        """The cached frame for ``key`` backed by memory-mapped columns, or None."""
+        arrays = self.arrays(key)
+        if arrays is None:
+            return None
+        index = pd.MultiIndex(
+            levels=[pd.DatetimeIndex(arrays["timestamps"]), pd.Index(arrays["symbols"])],
+            codes=[arrays["timestamp_codes"], arrays["symbol_codes"]],
+            names=["timestamp", "symbol"],
+            verify_integrity=False,
+        )
+        df = pd.DataFrame({col: arrays[col] for col in arrays["columns"]}, copy=False)
+        df.index = index
+        return df
+
+    def clear(self):
+        """Remove every cached entry."""
+        shutil.rmtree(self.root, ignore_errors=True)
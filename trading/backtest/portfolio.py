@@ -1,7 +1,7 @@
 """Portfolio management for backtesting."""
 
 from dataclasses import dataclass, field
-from typing import Dict, List
+from typing import Dict, List, Optional
 import pandas as pd
 from pathlib import Path
 import yaml
@@ -58,10 +58,16 @@ class Portfolio:
             self.positions[symbol] = Position(symbol=symbol)
         return self.positions[symbol]
     
-    def execute_trade(self, symbol: str, quantity: int, price: float, timestamp: pd.Timestamp):
-        """Execute a trade and update portfolio."""
+    def execute_trade(self, symbol: str, quantity: int, price: float, timestamp: pd.Timestamp,
+                      slippage: Optional[float] = None):
+        """Execute a trade and update portfolio.
+
+        ``slippage`` overrides the portfolio's rate, e.g. ``0.0`` for prices
+        that already include it.
+        """
         # Apply slippage
-        executed_price = price * (1 + self.slippage if quantity > 0 else 1 - self.slippage)
+        slippage = self.slippage if slippage is None else slippage
+        executed_price = price * (1 + slippage if quantity > 0 else 1 - slippage)
         
         # Calculate commission
         commission = abs(quantity * executed_price * self.commission_rate)
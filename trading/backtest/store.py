@@ -0,0 +1,180 @@
+"""Partitioned Parquet market-data store for backtesting.
+
+Bars are stored as ``symbol=<symbol>/month=<YYYY-MM>.parquet`` under
+``data/market`` with typed columns, sorted by timestamp and written in
+one-day row groups. Loads prune partitions by symbol and month from the
+directory layout and push the timestamp filter down to row-group
+statistics, so load time scales with the slice requested rather than the
+size of the archive. Writes merge into existing partitions and deduplicate
+on timestamp, so overlapping snapshots can be ingested repeatedly.
+
+Usage:
+    python -m trading.backtest.store ingest [--raw-dir DIR] [--history]
+"""
+
+import argparse
+import os
+from pathlib import Path
+from typing import Iterable, List, Optional
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None  # store unavailable; load_data falls back to raw snapshots
+
+MARKET_DIR = Path(__file__).resolve().parents[2] / "data" / "market"
+RAW_DIR = Path(__file__).resolve().parents[2] / "data" / "raw"
+BAR_COLUMNS = ["timestamp", "open", "high", "low", "close", "volume"]
+ROW_GROUP_ROWS = 24 * 60  # one day of minute bars
+
+if pa is not None:
+    SCHEMA = pa.schema([
+        ("timestamp", pa.timestamp("ns")),
+        ("open", pa.float64()),
+        ("high", pa.float64()),
+        ("low", pa.float64()),
+        ("close", pa.float64()),
+        ("volume", pa.int64()),
+    ])
+
+
+def _require_pyarrow():
+    if pq is None:
+        raise ImportError("Install pyarrow to use the market-data store: pip install pyarrow")
+
+
+def _encode(symbol: str) -> str:
+    return symbol.replace(":", "~").replace("/", "_")
+
+
+def _decode(name: str) -> str:
+    return name.replace("~", ":")
+
+
+def read_snapshot(path: Path) -> pd.DataFrame:
+    """Read a raw CSV or Parquet snapshot into flat (timestamp, symbol, OHLCV) rows."""
+    if path.suffix == ".parquet":
+        df = pd.read_parquet(path)
+        if "timestamp" not in df.columns:
+            df = df.reset_index()
+    else:
+        df = pd.read_csv(path)
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    return df
+
+
+class MarketDataStore:
+    def __init__(self, root: Path = MARKET_DIR):
+        self.root = Path(root)
+
+    def symbols(self) -> List[str]:
+        if not self.root.exists():
+            return []
+        return sorted(_decode(p.name[len("symbol="):]) for p in self.root.glob("symbol=*") if p.is_dir())
+
+    def has_data(self) -> bool:
+        return any(self.root.glob("symbol=*/month=*.parquet")) if self.root.exists() else False
+
+    def _partition(self, symbol: str, month: pd.Period) -> Path:
+        return self.root / f"symbol={_encode(symbol)}" / f"month={month}.parquet"
+
+    def partitions(self, start: pd.Timestamp, end: pd.Timestamp, symbols: Optional[Iterable[str]] = None) -> List[Path]:
+        """Partition files that can hold bars between ``start`` and ``end``."""
+        symbols = self.symbols() if symbols is None else list(symbols)
+        months = pd.period_range(start.to_period("M"), end.to_period("M"), freq="M")
+        return [
+            path
+            for sym in symbols
+            for month in months
+            if (path := self._partition(sym, month)).exists()
+        ]
+
+    def write(self, df: pd.DataFrame) -> int:
+        """Merge bars into their (symbol, month) partitions; return new rows written.
+
+        ``df`` is flat or (timestamp, symbol) indexed. Existing rows with the
+        same timestamp are replaced by the incoming ones.
+        """
+        _require_pyarrow()
+        if "timestamp" not in df.columns:
+            df = df.reset_index()
+        if df.empty:
+            return 0
+        df = df.assign(timestamp=pd.to_datetime(df["timestamp"]))
+        added = 0
+        for (sym, month), part in df.groupby(["symbol", df["timestamp"].dt.to_period("M")], sort=False):
+            path = self._partition(sym, month)
+            part = part[BAR_COLUMNS]
+            existing = 0
+            if path.exists():
+                current = pq.read_table(path).to_pandas()
+                existing = len(current)
+                part = pd.concat([current, part])
+            part = part.drop_duplicates("timestamp", keep="last").sort_values("timestamp")
+            part = part.astype({"open": "float64", "high": "float64", "low": "float64",
+                                "close": "float64", "volume": "int64"})
+
+            path.parent.mkdir(parents=True, exist_ok=True)
+            table = pa.Table.from_pandas(part, schema=SCHEMA, preserve_index=False)
+            tmp = path.with_suffix(".tmp")
+            pq.write_table(table, tmp, row_group_size=ROW_GROUP_ROWS)
+            os.replace(tmp, path)
+            added += len(part) - existing
+        return added
+
+    def load(self, start: pd.Timestamp, end: pd.Timestamp, symbols: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """Bars between ``start`` and ``end`` (inclusive) indexed by (timestamp, symbol)."""
+        _require_pyarrow()
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        filters = [("timestamp", ">=", start.to_pydatetime()), ("timestamp", "<=", end.to_pydatetime())]
+        frames = []
+        for path in self.partitions(start, end, symbols):
+            table = pq.read_table(path, filters=filters)
+            if table.num_rows:
+                df = table.to_pandas()
+                df["symbol"] = _decode(path.parent.name[len("symbol="):])
+                frames.append(df)
+        if not frames:
+            return pd.DataFrame(
+                columns=BAR_COLUMNS[1:],
+                index=pd.MultiIndex.from_arrays([[], []], names=["timestamp", "symbol"])
+            )
+        return pd.concat(frames, ignore_index=True).set_index(["timestamp", "symbol"]).sort_index()
+
+    def ingest_directory(self, raw_dir: Path = RAW_DIR) -> int:
+        """Import every CSV and Parquet snapshot in ``raw_dir``; return new rows."""
+        added = 0
+        for path in sorted(raw_dir.glob("*.csv")) + sorted(raw_dir.glob("*.parquet")):
+            added += self.write(read_snapshot(path))
+        return added
+
+    def ingest_barstore(self, store) -> int:
+        """Import every symbol held by a ``BarStore``; return new rows."""
+        added = 0
+        for sym in store.symbols():
+            df = store.load(sym)
+            df["symbol"] = sym
+            added += self.write(df)
+        return added
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Manage the partitioned market-data store")
+    sub = parser.add_subparsers(dest="command", required=True)
+    ingest = sub.add_parser("ingest", help="import raw snapshots and backfilled history")
+    ingest.add_argument("--raw-dir", type=Path, default=RAW_DIR, help="directory of raw CSV/Parquet snapshots")
+    ingest.add_argument("--history", action="store_true", help="also import the backfill history store")
+    args = parser.parse_args(argv)
+
+    store = MarketDataStore()
+    added = store.ingest_directory(args.raw_dir)
+    if args.history:
+        from ..barstore import BarStore, HISTORY_DIR
+        added += store.ingest_barstore(BarStore(HISTORY_DIR))
+    print(f"[Store] Ingested {added} new bars into {store.root}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""Parallel parameter sweeps over the backtester.
+
+A sweep takes a grid or random search space over settings keys (dotted
+for nested keys, e.g. ``backtest.position_fraction``), runs one
+vectorized backtest per parameter set on a process pool and collects each
+run's metrics into a single results table. The market data is loaded once
+and shared with the workers through the memory-mapped bar cache, so each
+worker maps the same pages instead of receiving a pickled copy.
+
+Usage:
+    python -m trading.backtest.sweep --start 2024-01-01 --end 2024-03-31 \\
+        --param sma_fast_period=5,10,15 --param sma_slow_period=20,30 --workers 8
+    python -m trading.backtest.sweep --space space.yaml --random 200 --out sweep.csv
+"""
+
+import argparse
+import copy
+import itertools
+import random
+import shutil
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import pandas as pd
+import yaml
+from .engine import BacktestEngine, CONFIG_DIR
+from .mmap_cache import BarCache
+
+# Settings the backtest reads, as accepted in a search space
+PARAMETERS = [
+    "sma_fast_period",
+    "sma_slow_period",
+    "rsi_period",
+    "ml_confidence_buy_threshold",
+    "ml_confidence_sell_threshold",
+    "default_signal_confidence",
+    "notional_cap",
+    "backtest.initial_capital",
+    "backtest.commission_rate",
+    "backtest.slippage",
+    "backtest.position_fraction",
+]
+
+# Worker state, set once per process by _init_worker
+_DATA: Optional[pd.DataFrame] = None
+_SETTINGS: Optional[dict] = None
+
+
+def grid(space: Dict[str, List[Any]]) -> List[dict]:
+    """Every combination of the listed values."""
+    keys = list(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+
+
+def random_search(space: Dict[str, Any], n: int, seed: int = 0) -> List[dict]:
+    """``n`` random parameter sets.
+
+    Each entry of ``space`` is either a list of choices or a ``{low, high}``
+    range, sampled as an integer when both bounds are integers.
+    """
+    rng = random.Random(seed)
+    combos = []
+    for _ in range(n):
+        params = {}
+        for key, spec in space.items():
+            if isinstance(spec, dict):
+                low, high = spec["low"], spec["high"]
+                params[key] = rng.randint(low, high) if isinstance(low, int) and isinstance(high, int) else rng.uniform(low, high)
+            else:
+                params[key] = rng.choice(list(spec))
+        combos.append(params)
+    return combos
+
+
+def apply_params(settings: dict, params: Dict[str, Any]) -> dict:
+    """Copy of ``settings`` with dotted ``params`` keys overridden."""
+    settings = copy.deepcopy(settings)
+    for key, value in params.items():
+        if key not in PARAMETERS:
+            raise ValueError(f"Unknown sweep parameter: {key}")
+        target = settings
+        *parents, leaf = key.split(".")
+        for part in parents:
+            target = target.setdefault(part, {})
+        target[leaf] = value
+    return settings
+
+
+def _init_worker(cache_root: str, key: str, settings: dict):
+    global _DATA, _SETTINGS
+    _DATA = BarCache(Path(cache_root)).open(key)
+    _SETTINGS = settings
+
+
+def _run_one(params: Dict[str, Any], use_ml: bool = False) -> dict:
+    """Run one backtest in a worker and flatten its metrics into a row."""
+    row = dict(params)
+    t0 = time.perf_counter()
+    try:
+        engine = BacktestEngine(settings=apply_params(_SETTINGS, params))
+        results = engine.run(_DATA, use_ml=use_ml, mode="vectorized")
+        row.update(results["performance_metrics"])
+        row.update(results["trade_metrics"])
+        row["total_trades"] = results["portfolio_summary"]["total_trades"]
+        row["error"] = None
+    except Exception as exc:
+        row["error"] = str(exc)
+    row["elapsed_s"] = round(time.perf_counter() - t0, 3)
+    return row
+
+
+def sweep(data: pd.DataFrame, combos: List[dict], max_workers: Optional[int] = None,
+          use_ml: bool = False, settings: Optional[dict] = None,
+          cache: Optional[BarCache] = None) -> pd.DataFrame:
+    """Backtest every parameter set in ``combos`` on ``data`` in parallel.
+
+    Returns one row per parameter set with the parameters, the
+    ``performance_metrics`` and ``trade_metrics`` entries, the trade count
+    and any error.
+    """
+    if settings is None:
+        with open(CONFIG_DIR / "settings.yaml", "r") as f:
+            settings = yaml.safe_load(f)
+    cache = cache or BarCache()
+
+    # Publish the data once; workers map it read-only
+    key = f"sweep-{uuid.uuid4().hex[:12]}"
+    cache.write(key, data)
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                 initargs=(str(cache.root), key, settings)) as pool:
+            rows = list(pool.map(_run_one, combos, itertools.repeat(use_ml), chunksize=max(1, len(combos) // 64)))
+    finally:
+        shutil.rmtree(cache.path(key), ignore_errors=True)
+    return pd.DataFrame(rows)
+
+
+def _parse_param(text: str):
+    key, _, values = text.partition("=")
+    return key, [yaml.safe_load(v) for v in values.split(",")]
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Run a parallel parameter sweep over the backtester")
+    parser.add_argument("--start", help="start date (default: backtest.start_date)")
+    parser.add_argument("--end", help="end date (default: backtest.end_date)")
+    parser.add_argument("--symbols", nargs="+", help="restrict to these symbols")
+    parser.add_argument("--space", type=Path, help="YAML search space: key -> list of values or {low, high}")
+    parser.add_argument("--param", action="append", default=[], help="grid values as key=v1,v2,...")
+    parser.add_argument("--random", type=int, help="sample this many random sets instead of the full grid")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, help="worker processes (default: all cores)")
+    parser.add_argument("--ml", action="store_true", help="use ML signals")
+    parser.add_argument("--out", type=Path, default=Path("sweep_results.csv"))
+    args = parser.parse_args(argv)
+
+    space: Dict[str, Any] = {}
+    if args.space:
+        with open(args.space) as f:
+            space.update(yaml.safe_load(f))
+    space.update(dict(_parse_param(p) for p in args.param))
+    if not space:
+        parser.error("give a search space with --space or --param")
+    combos = random_search(space, args.random, args.seed) if args.random else grid(space)
+
+    data = BacktestEngine.load_data(args.start, args.end, args.symbols)
+    results = sweep(data, combos, max_workers=args.workers, use_ml=args.ml)
+    results.to_csv(args.out, index=False)
+    print(f"[Sweep] {len(results)} runs written to {args.out}")
+    if "sharpe_ratio" in results:
+        print(results.sort_values("sharpe_ratio", ascending=False).head(10).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Columnar backtest core for the trading system.
+
+Signals are computed for the whole (timestamp, symbol) panel in one pass,
+turned into a dense timestamp x symbol order matrix and worked through
+the fill simulator on the bars with new or working orders only. Portfolio valuation
+between orders is done with array operations.
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Tuple
+from .portfolio import Portfolio
+from .fills import FillSimulator
+from .. import preprocess
+
+
+def to_matrix(data: pd.DataFrame, column: str) -> pd.DataFrame:
+    """Pivot a (timestamp, symbol) indexed frame into a timestamp x symbol matrix."""
+    return data[column].unstack(level="symbol").sort_index()
+
+
+def panel_features(data: pd.DataFrame, sma_fast_period: int, sma_slow_period: int,
+                   rsi_period: int = 14) -> pd.DataFrame:
+    """Return the panel as a flat frame with RSI and SMA columns.
+
+    Frames that already carry ``sma_fast``/``sma_slow`` (the output of
+    ``preprocess.transform``) are used as-is; raw bars get the indicators
+    computed panel-wide on their own frequency.
+    """
+    feat = data.reset_index() if "timestamp" not in data.columns else data.copy()
+    feat = feat.sort_values(["symbol", "timestamp"], kind="mergesort").reset_index(drop=True)
+    if "sma_fast" not in feat.columns or "sma_slow" not in feat.columns:
+        feat = preprocess.add_indicators(feat, rsi_period, sma_fast_period, sma_slow_period)
+    return feat
+
+
+def order_matrix(events: pd.DataFrame, index: pd.Index, columns: pd.Index) -> np.ndarray:
+    """Dense timestamp x symbol matrix of order directions (+1 BUY, -1 SELL, 0 none)."""
+    orders = np.zeros((len(index), len(columns)), dtype=np.int8)
+    if events.empty:
+        return orders
+    rows = index.get_indexer(events["timestamp"])
+    cols = columns.get_indexer(events["symbol"])
+    valid = (rows >= 0) & (cols >= 0)
+    direction = np.where(events["side"].to_numpy() == "BUY", 1, -1).astype(np.int8)
+    orders[rows[valid], cols[valid]] = direction[valid]
+    return orders
+
+
+def simulate(
+    portfolio: Portfolio,
+    close: np.ndarray,
+    orders: np.ndarray,
+    timestamps: pd.Index,
+    symbols: pd.Index,
+    notional_cap: float,
+    position_fraction: float = 0.1,
+    bars: Optional[Dict[str, np.ndarray]] = None,
+    fill_sim: Optional[FillSimulator] = None,
+) -> Tuple[np.ndarray, np.ndarray, List[dict], List[dict]]:
+    """Work the order matrix through ``fill_sim`` and return quantities, cash, fills and placed orders.
+
+    Orders are sized from the cash at their bar and handed to the fill
+    simulator, which matches all working orders against each bar in one
+    vectorized step (``bars`` as from ``fills.bar_matrices``; close-only
+    bars by default). Only bars with new or working orders are visited,
+    so the cost of the loop scales with the number of orders rather than
+    the number of bars. The default simulator fills market orders in full
+    at the close, with the portfolio's slippage.
+    """
+    quantities = np.zeros(orders.shape, dtype=np.int64)
+    cash = np.full(len(timestamps), np.nan)
+    fills: List[dict] = []
+    placed: List[dict] = []
+    if bars is None:
+        bars = {"open": close, "high": close, "low": close, "close": close,
+                "volume": np.full_like(close, np.nan, dtype=float)}
+    if fill_sim is None:
+        fill_sim = FillSimulator(len(symbols), slippage=portfolio.slippage)
+
+    order_rows = np.flatnonzero(orders.any(axis=1))
+    t = order_rows[0] if len(order_rows) else len(timestamps)
+    while t < len(timestamps):
+        cols = np.flatnonzero(orders[t])
+        if len(cols):
+            price = close[t, cols]
+            position_value = min(portfolio.cash * position_fraction, notional_cap)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                size = np.where(np.isfinite(price) & (price > 0), position_value / price, 0)
+            quantity = np.floor(size).astype(np.int64) * orders[t, cols]
+            fill_sim.submit(t, cols, quantity, price)
+            placed.extend({"row": t, "col": j, "price": p, "quantity": q}
+                          for j, p, q in zip(cols.tolist(), price.tolist(), quantity.tolist()) if q)
+
+        matched = fill_sim.match(t, {name: matrix[t] for name, matrix in bars.items()})
+        timestamp = timestamps[t]
+        for j, q, p in zip(matched.col.tolist(), matched.quantity.tolist(), matched.price.tolist()):
+            portfolio.execute_trade(
+                symbol=symbols[j],
+                quantity=q,
+                price=p,
+                timestamp=timestamp,
+                slippage=0.0
+            )
+            quantities[t, j] += q
+            fills.append({"row": t, "col": j, "price": p, "quantity": q})
+        if len(matched):
+            cash[t] = portfolio.cash
+
+        # Jump to the next bar with new orders unless orders are still working
+        if fill_sim.open_orders:
+            t += 1
+        else:
+            nxt = np.searchsorted(order_rows, t, side="right")
+            t = order_rows[nxt] if nxt < len(order_rows) else len(timestamps)
+
+    return quantities, cash, fills, placed
+
+
+def mark_to_market(close: np.ndarray, quantities: np.ndarray, cash: np.ndarray, starting_cash: float) -> np.ndarray:
+    """Portfolio value per timestamp from fills, forward-filled cash and last prices."""
+    positions = np.cumsum(quantities, axis=0)
+    prices = pd.DataFrame(close).ffill().to_numpy()
+    holdings = np.where(positions != 0, positions * np.nan_to_num(prices), 0.0).sum(axis=1)
+    cash_series = pd.Series(cash).ffill().fillna(starting_cash).to_numpy()
+    return cash_series + holdings
@@ -0,0 +1,190 @@
+"""Walk-forward and rolling-window backtests with parallel folds.
+
+History is split into train/test windows that either roll forward with a
+fixed train length or expand from the start of the data. Each fold
+optionally refits the ML model from ``intelligence.model`` on its train
+window and backtests its test window with the vectorized engine. Folds are
+independent and run on a process pool.
+
+Indicators are computed once for the whole history and sliced per fold:
+they only look backwards, so a test window sees correctly warmed-up values
+without any lookahead, and overlapping windows never recompute them.
+
+Usage:
+    python -m trading.backtest.walkforward --start 2024-01-01 --end 2024-12-31 \\
+        --train-days 60 --test-days 20 [--expanding] [--refit] --workers 8
+"""
+
+import argparse
+import shutil
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import List, Optional
+import numpy as np
+import pandas as pd
+import yaml
+from .engine import BacktestEngine, CONFIG_DIR
+from .mmap_cache import BarCache
+from . import vectorized
+
+# Worker state, set once per process by _init_worker
+_FEATURES: Optional[pd.DataFrame] = None
+_SETTINGS: Optional[dict] = None
+
+
+@dataclass
+class Fold:
+    fold: int
+    train_start: pd.Timestamp
+    train_end: pd.Timestamp     # exclusive; also the test start
+    test_end: pd.Timestamp      # exclusive
+
+
+def make_folds(start: pd.Timestamp, end: pd.Timestamp, train_days: int, test_days: int,
+               step_days: Optional[int] = None, expanding: bool = False) -> List[Fold]:
+    """Train/test windows covering ``start`` to ``end``.
+
+    Test windows start after ``train_days`` and advance by ``step_days``
+    (default ``test_days``). With ``expanding`` every train window starts at
+    ``start``; otherwise it rolls with a fixed length.
+    """
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    train, test = pd.Timedelta(days=train_days), pd.Timedelta(days=test_days)
+    step = pd.Timedelta(days=step_days or test_days)
+    folds = []
+    test_start = start + train
+    while test_start < end:
+        folds.append(Fold(
+            fold=len(folds),
+            train_start=start if expanding else test_start - train,
+            train_end=test_start,
+            test_end=min(test_start + test, end),
+        ))
+        test_start += step
+    return folds
+
+
+def _init_worker(cache_root: str, key: str, settings: dict):
+    global _FEATURES, _SETTINGS
+    _FEATURES = BarCache(Path(cache_root)).open(key)
+    _SETTINGS = settings
+
+
+def _window(features: pd.DataFrame, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+    timestamps = features.index.get_level_values("timestamp")
+    return features[(timestamps >= start) & (timestamps < end)]
+
+
+def _run_fold(fold: Fold, use_ml: bool = False, refit: bool = False) -> dict:
+    """Backtest one fold in a worker and flatten its metrics into a row."""
+    from ..intelligence import model as ml_model
+
+    row = asdict(fold)
+    try:
+        model = None
+        if refit:
+            train = _window(_FEATURES, fold.train_start, fold.train_end).reset_index()
+            model = ml_model.fit(train, ml_model.make_labels(train))
+        test = _window(_FEATURES, fold.train_end, fold.test_end)
+        engine = BacktestEngine(settings=_SETTINGS)
+        results = engine.run(test, use_ml=use_ml or refit, mode="vectorized", model=model)
+        row.update(results["performance_metrics"])
+        row.update(results["trade_metrics"])
+        row["total_trades"] = results["portfolio_summary"]["total_trades"]
+        row["bars"] = len(test)
+        row["error"] = None
+    except Exception as exc:
+        row["error"] = str(exc)
+    return row
+
+
+def aggregate(folds: pd.DataFrame) -> dict:
+    """Combine per-fold metrics: compounded return, trade count and fold means."""
+    ok = folds[folds["error"].isna()] if "error" in folds else folds
+    if ok.empty:
+        return {"folds": 0}
+    summary = {
+        "folds": len(ok),
+        "compounded_return": round((np.prod(1 + ok["total_return"] / 100) - 1) * 100, 2),
+        "total_trades": int(ok["total_trades"].sum()),
+        "positive_folds_pct": round((ok["total_return"] > 0).mean() * 100, 2),
+    }
+    for col in ["total_return", "sharpe_ratio", "max_drawdown", "volatility", "win_rate",
+                "avg_trade_return", "profit_factor"]:
+        summary[f"mean_{col}"] = round(float(ok[col].replace([np.inf, -np.inf], np.nan).mean()), 2)
+    return summary
+
+
+def walk_forward(data: pd.DataFrame, train_days: int, test_days: int, step_days: Optional[int] = None,
+                 expanding: bool = False, refit: bool = False, use_ml: bool = False,
+                 max_workers: Optional[int] = None, settings: Optional[dict] = None,
+                 cache: Optional[BarCache] = None) -> dict:
+    """Run a walk-forward backtest over ``data``.
+
+    Returns ``{"folds": DataFrame, "aggregate": dict}`` with one row of
+    metrics per fold and their combination.
+    """
+    if settings is None:
+        with open(CONFIG_DIR / "settings.yaml", "r") as f:
+            settings = yaml.safe_load(f)
+    cache = cache or BarCache()
+
+    # Compute indicators once for the whole history
+    features = vectorized.panel_features(
+        data,
+        sma_fast_period=settings.get("sma_fast_period", 10),
+        sma_slow_period=settings.get("sma_slow_period", 20),
+        rsi_period=settings.get("rsi_period", 14),
+    ).dropna().set_index(["timestamp", "symbol"]).sort_index()
+
+    timestamps = features.index.get_level_values("timestamp")
+    folds = make_folds(timestamps.min(), timestamps.max() + pd.Timedelta(microseconds=1),
+                       train_days, test_days, step_days, expanding)
+    if not folds:
+        raise ValueError("History is shorter than one train window")
+
+    key = f"walkforward-{uuid.uuid4().hex[:12]}"
+    cache.write(key, features)
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                 initargs=(str(cache.root), key, settings)) as pool:
+            rows = list(pool.map(_run_fold, folds, [use_ml] * len(folds), [refit] * len(folds)))
+    finally:
+        shutil.rmtree(cache.path(key), ignore_errors=True)
+
+    fold_df = pd.DataFrame(rows)
+    return {"folds": fold_df, "aggregate": aggregate(fold_df)}
+
+
+def main(argv: Optional[List[str]] = None):
+    with open(CONFIG_DIR / "settings.yaml", "r") as f:
+        wf_settings = yaml.safe_load(f).get("backtest", {}).get("walk_forward", {})
+
+    parser = argparse.ArgumentParser(description="Run a walk-forward backtest with parallel folds")
+    parser.add_argument("--start", help="start date (default: backtest.start_date)")
+    parser.add_argument("--end", help="end date (default: backtest.end_date)")
+    parser.add_argument("--symbols", nargs="+", help="restrict to these symbols")
+    parser.add_argument("--train-days", type=int, default=wf_settings.get("train_days", 60))
+    parser.add_argument("--test-days", type=int, default=wf_settings.get("test_days", 20))
+    parser.add_argument("--step-days", type=int, default=wf_settings.get("step_days"))
+    parser.add_argument("--expanding", action="store_true", default=wf_settings.get("expanding", False))
+    parser.add_argument("--refit", action="store_true", default=wf_settings.get("refit", False),
+                        help="refit the ML model on each train window")
+    parser.add_argument("--ml", action="store_true", help="use the saved ML model for signals")
+    parser.add_argument("--workers", type=int, help="worker processes (default: all cores)")
+    parser.add_argument("--out", type=Path, default=Path("walkforward_folds.csv"))
+    args = parser.parse_args(argv)
+
+    data = BacktestEngine.load_data(args.start, args.end, args.symbols)
+    result = walk_forward(data, args.train_days, args.test_days, args.step_days, args.expanding,
+                          args.refit, args.ml, args.workers)
+    result["folds"].to_csv(args.out, index=False)
+    print(f"[WalkForward] {len(result['folds'])} folds written to {args.out}")
+    for name, value in result["aggregate"].items():
+        print(f"  {name}: {value}")
+
+
+if __name__ == "__main__":
+    main()
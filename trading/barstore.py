@@ -0,0 +1,164 @@
+"""Persistent per-symbol minute-bar store used by ``datasource.fetch``.
+
+Each symbol has an append-only CSV under ``data/bars`` (only its last row,
+a minute that may still have been forming, is ever rewritten) and an entry in
+``index.json`` recording the first and last timestamp it holds, so a fetch
+only needs to request the missing tail from the broker. ``trading.backfill``
+uses a second store under ``data/history`` for long deduplicated histories.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, Optional
+import pandas as pd
+
+BAR_DIR = Path(__file__).resolve().parents[1] / "data" / "bars"
+HISTORY_DIR = Path(__file__).resolve().parents[1] / "data" / "history"
+BAR_COLUMNS = ["timestamp", "open", "high", "low", "close", "volume"]
+
+
+def _safe_name(symbol: str) -> str:
+    return symbol.replace(":", "_").replace("/", "_")
+
+
+class BarStore:
+    def __init__(self, root: Path = BAR_DIR):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.root / "index.json"
+        self.index: Dict[str, dict] = {}
+        if self.index_path.exists():
+            with open(self.index_path) as f:
+                self.index = json.load(f)
+
+    def _path(self, symbol: str) -> Path:
+        return self.root / f"{_safe_name(symbol)}.csv"
+
+    def _save_index(self):
+        """Write the index atomically so a crash never leaves it half-written."""
+        tmp = self.index_path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump(self.index, f, indent=2)
+        os.replace(tmp, self.index_path)
+
+    def symbols(self):
+        return sorted(self.index)
+
+    def first_timestamp(self, symbol: str) -> Optional[pd.Timestamp]:
+        entry = self.index.get(symbol)
+        return pd.Timestamp(entry["first_timestamp"]) if entry else None
+
+    def last_timestamp(self, symbol: str) -> Optional[pd.Timestamp]:
+        entry = self.index.get(symbol)
+        return pd.Timestamp(entry["last_timestamp"]) if entry else None
+
+    def _truncate_last_row(self, path: Path):
+        """Cut the file's last row off in place."""
+        with open(path, "rb+") as f:
+            size = f.seek(0, os.SEEK_END)
+            block = 4096
+            while True:
+                start = max(size - block, 0)
+                f.seek(start)
+                cut = f.read().rstrip(b"\n").rfind(b"\n")
+                if cut >= 0 or start == 0:
+                    break
+                block *= 2
+            f.truncate(start + cut + 1)
+
+    def merge(self, symbol: str, df: pd.DataFrame) -> int:
+        """Append bars from the stored tail on; return how many were added.
+
+        ``df`` has a ``timestamp`` column plus OHLCV. The last stored bar is
+        usually fetched while its minute is still forming, so a bar at the
+        last stored timestamp replaces it; older bars are treated as already
+        held and skipped, which makes overlapping fetches idempotent.
+        """
+        if df is None or df.empty:
+            return 0
+        df = df[BAR_COLUMNS].drop_duplicates("timestamp", keep="last").sort_values("timestamp")
+        last = self.last_timestamp(symbol)
+        if last is not None:
+            df = df[df["timestamp"] >= last]
+        if df.empty:
+            return 0
+
+        path = self._path(symbol)
+        replaced = int(last is not None and df["timestamp"].iloc[0] == last and path.exists())
+        if replaced:
+            self._truncate_last_row(path)
+        df.to_csv(path, mode="a", header=not path.exists(), index=False)
+        entry = self.index.setdefault(symbol, {
+            "file": path.name,
+            "first_timestamp": df["timestamp"].iloc[0].isoformat(),
+            "rows": 0,
+        })
+        entry["last_timestamp"] = df["timestamp"].iloc[-1].isoformat()
+        entry["rows"] += len(df) - replaced
+        self._save_index()
+        return len(df) - replaced
+
+    def upsert(self, symbol: str, df: pd.DataFrame) -> int:
+        """Merge bars from anywhere in the history, deduplicating on timestamp.
+
+        Unlike ``merge`` this rewrites the symbol's file, so it suits
+        backfills that arrive out of order. Returns the number of new bars.
+        """
+        if df is None or df.empty:
+            return 0
+        existing = self.load(symbol)
+        combined = pd.concat([existing, df[BAR_COLUMNS]]) if not existing.empty else df[BAR_COLUMNS]
+        combined = combined.drop_duplicates("timestamp", keep="last").sort_values("timestamp")
+        added = len(combined) - len(existing)
+
+        path = self._path(symbol)
+        tmp = path.with_suffix(".tmp")
+        combined.to_csv(tmp, index=False)
+        os.replace(tmp, path)
+        self.index[symbol] = {
+            "file": path.name,
+            "first_timestamp": combined["timestamp"].iloc[0].isoformat(),
+            "last_timestamp": combined["timestamp"].iloc[-1].isoformat(),
+            "rows": len(combined),
+        }
+        self._save_index()
+        return added
+
+    def load(self, symbol: str, start: Optional[pd.Timestamp] = None, end: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        """Bars for ``symbol`` between ``start`` and ``end`` (inclusive)."""
+        path = self._path(symbol)
+        if symbol not in self.index or not path.exists():
+            return pd.DataFrame(columns=BAR_COLUMNS)
+        df = pd.read_csv(path, parse_dates=["timestamp"])
+        if start is not None:
+            df = df[df["timestamp"] >= start]
+        if end is not None:
+            df = df[df["timestamp"] <= end]
+        return df.reset_index(drop=True)
+
+    def trim(self, symbol: str, before: pd.Timestamp, slack: pd.Timedelta = pd.Timedelta(days=1)) -> int:
+        """Drop bars older than ``before``; return how many were removed.
+
+        The file is only rewritten once the oldest bar is more than ``slack``
+        past the cutoff, so a once-a-minute schedule rewrites it about once a
+        day rather than on every run.
+        """
+        first = self.first_timestamp(symbol)
+        if first is None or first >= before - slack:
+            return 0
+        df = self.load(symbol)
+        kept = df[df["timestamp"] >= before]
+        path = self._path(symbol)
+        tmp = path.with_suffix(".tmp")
+        kept.to_csv(tmp, index=False)
+        os.replace(tmp, path)
+        if kept.empty:
+            del self.index[symbol]
+            path.unlink()
+        else:
+            entry = self.index[symbol]
+            entry["first_timestamp"] = kept["timestamp"].iloc[0].isoformat()
+            entry["rows"] = len(kept)
+        self._save_index()
+        return len(df) - len(kept)
@@ -1,5 +1,7 @@
-from typing import Dict
+from typing import Dict, List
+import datetime as dt
 import json
+import logging
 from pathlib import Path
 
 try:
@@ -8,6 +10,11 @@ except ImportError:
     fyersModel = None
 
 CONFIG_DIR = Path(__file__).resolve().parents[2] / "config"
+BASKET_SIZE = 10  # orders per multi-order request accepted by the API
+# Order book status codes -> OrderBook statuses (7 = expired at the end of its validity)
+STATUS = {1: "CANCELLED", 2: "FILLED", 4: "SUBMITTED", 5: "REJECTED", 6: "SUBMITTED", 7: "CANCELLED"}
+
+logger = logging.getLogger(__name__)
 
 
 def _load_secrets() -> Dict:
@@ -23,9 +30,10 @@ class FyersBroker:
         sec = _load_secrets()
         self.client = fyersModel.FyersModel(client_id=sec["client_id"], token=sec["access_token"], is_async=False)
 
-    def place_order(self, symbol: str, side: str, qty: int = 1):
+    @staticmethod
+    def _order(symbol: str, side: str, qty: int = 1, price: float = None) -> Dict:
         side_num = 1 if side == "BUY" else -1
-        order = {
+        return {
             "symbol": symbol,
             "qty": qty,
             "type": 2,  # market
@@ -37,6 +45,70 @@ class FyersBroker:
             "disclosedQty": 0,
             "offlineOrder": False,
         }
-        resp = self.client.place_order(order)
+
+    def place_order(self, symbol: str, side: str, qty: int = 1, price: float = None):
+        resp = self.client.place_order(self._order(symbol, side, qty))
         print("[FYERS] Order resp", json.dumps(resp, indent=2))
         return resp
+
+    def place_orders(self, orders: List[Dict]) -> List[Dict]:
+        """Submit ``orders`` (symbol/side/qty dicts) through the multi-order endpoint.
+
+        Returns one response per order, in order; if a basket request fails
+        as a whole its response is repeated for every order in it.
+        """
+        responses = []
+        for i in range(0, len(orders), BASKET_SIZE):
+            chunk = orders[i:i + BASKET_SIZE]
+            resp = self.client.place_basket_orders([self._order(**o) for o in chunk])
+            items = resp.get("data") if isinstance(resp, dict) else None
+            if isinstance(items, list) and len(items) == len(chunk):
+                responses.extend(item.get("body", item) for item in items)
+            else:
+                logger.warning(f"[FYERS] Basket request failed: {resp}")
+                responses.extend([resp] * len(chunk))
+        logger.debug(f"[FYERS] Basket responses {json.dumps(responses)}")
+        return responses
+
+    def order_statuses(self, ids: List[str]) -> List[Dict]:
+        """Fill state of ``ids`` from one order book request.
+
+        Rows with a status code missing from ``STATUS`` are logged and left
+        out, so the order keeps its last known state.
+        """
+        wanted = {str(i) for i in ids}
+        resp = self.client.orderbook()
+        updates = []
+        for row in resp.get("orderBook") or []:
+            if str(row.get("id")) not in wanted:
+                continue
+            filled = int(row.get("filledQty", 0))
+            status = STATUS.get(row.get("status"))
+            if status is None:
+                logger.warning(f"[FYERS] Unknown status {row.get('status')!r} for order {row.get('id')}")
+                continue
+            if status == "SUBMITTED" and filled:
+                status = "PARTIAL"
+            updates.append({"id": str(row["id"]), "status": status, "filled_qty": filled,
+                            "avg_price": row.get("tradedPrice") or None})
+        return updates
+
+    def positions(self) -> Dict[str, int]:
+        """Signed net quantity per symbol of the open positions, carried-over ones included."""
+        return {row["symbol"]: int(row.get("netQty", 0)) for row in self.client.positions().get("netPositions") or []}
+
+    def order_history(self) -> List[tuple]:
+        """Today's trades as (timestamp, symbol, side, qty, price) rows.
+
+        The tradebook only covers the current day; ``positions`` has the
+        positions opened earlier.
+        """
+        rows = []
+        for trade in self.client.tradebook().get("tradeBook") or []:
+            try:
+                ts = dt.datetime.strptime(trade["orderDateTime"], "%d-%b-%Y %H:%M:%S").isoformat()
+            except (KeyError, ValueError):
+                ts = None
+            rows.append((ts, trade["symbol"], "BUY" if trade.get("side") == 1 else "SELL",
+                         int(trade.get("tradedQty", 0)), trade.get("tradePrice")))
+        return rows
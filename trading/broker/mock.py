@@ -1,32 +1,202 @@
-from pathlib import Path
-import sqlite3
+"""Paper-trading broker backed by SQLite.
+
+One broker holds one long-lived connection in WAL mode. Orders are
+buffered and written with ``executemany`` once ``flush_rows`` are pending
+or ``flush_seconds`` have passed (a background thread flushes on time),
+so paper trading is not bound by connection setup or one fsync per order.
+Order ids are taken in blocks from the table's AUTOINCREMENT sequence, so
+brokers sharing the file (in this process or another) never hand out the
+same id, and responses do not wait for the write. Ids left in a block
+when a broker closes are skipped.
+
+Orders fill immediately against the latest price seen for the symbol
+(``update_prices``), falling back to the order's reference price, with
+``slippage`` against the trader. Orders with no price at all are
+recorded as rejected.
+"""
+
+import atexit
 import datetime as dt
+import logging
+import sqlite3
+import threading
+import weakref
+from pathlib import Path
+from typing import Dict, List, Optional
 
 DB_PATH = Path(__file__).resolve().parents[2] / "data" / "orders.sqlite"
-DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+
+logger = logging.getLogger(__name__)
+
+_open_brokers: "weakref.WeakSet[MockBroker]" = weakref.WeakSet()
+
+COLUMNS = ["id", "ts", "symbol", "side", "qty", "price", "status", "fill_price"]
+SCHEMA = """CREATE TABLE IF NOT EXISTS orders (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts TEXT,
+    symbol TEXT,
+    side TEXT,
+    qty INTEGER,
+    price REAL,
+    status TEXT,
+    fill_price REAL
+)"""
+
+
+def _connect(path: Path) -> sqlite3.Connection:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")  # WAL stays consistent; only the last flush is at risk on power loss
+    conn.execute(SCHEMA)
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(orders)")}
+    for column, kind in [("price", "REAL"), ("status", "TEXT"), ("fill_price", "REAL")]:
+        if column not in existing:  # stores written by earlier versions
+            conn.execute(f"ALTER TABLE orders ADD COLUMN {column} {kind}")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_symbol ON orders (symbol)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_ts ON orders (ts)")
+    conn.commit()
+    return conn
 
 
-def _init():
-    with sqlite3.connect(DB_PATH) as conn:
-        conn.execute(
-            """CREATE TABLE IF NOT EXISTS orders (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                ts TEXT,
-                symbol TEXT,
-                side TEXT,
-                qty INTEGER
-            )"""
-        )
+@atexit.register
+def _close_open_brokers():
+    """Flush whatever the brokers still open at exit have buffered."""
+    for broker in list(_open_brokers):
+        broker.close()
 
-_init()
+
+def _flush_loop(ref: "weakref.ref[MockBroker]", stop: threading.Event, seconds: float):
+    """Flush ``ref``'s broker every ``seconds`` without keeping it alive."""
+    while not stop.wait(seconds):
+        broker = ref()
+        if broker is None:
+            return
+        try:
+            broker.flush()
+        except sqlite3.Error as e:
+            logger.error(f"[MOCK] Flush failed: {e}")
+        del broker
 
 
 class MockBroker:
-    def place_order(self, symbol: str, side: str, qty: int = 1):
-        with sqlite3.connect(DB_PATH) as conn:
-            conn.execute(
-                "INSERT INTO orders (ts, symbol, side, qty) VALUES (?,?,?,?)",
-                (dt.datetime.now().isoformat(), symbol, side, qty),
-            )
-        print(f"[MOCK] {side} {qty} {symbol}")
-        return {"status": "ok"}
+    def __init__(self, db_path: Path = None, slippage: float = 0.0, flush_rows: int = 500,
+                 flush_seconds: Optional[float] = 0.5):
+        self.db_path = Path(db_path or DB_PATH)
+        self.slippage = slippage
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self.prices: Dict[str, float] = {}
+        self._lock = threading.RLock()
+        self._conn = _connect(self.db_path)
+        self._next_id = self._end_id = 0  # reserved ids not yet handed out: [_next_id, _end_id)
+        self._pending: List[tuple] = []
+        self._stop = threading.Event()
+        self._flusher = None
+        if flush_seconds:
+            self._flusher = threading.Thread(target=_flush_loop, args=(weakref.ref(self), self._stop, flush_seconds),
+                                             name="mock-broker-flush", daemon=True)
+            self._flusher.start()
+        _open_brokers.add(self)
+
+    def update_prices(self, prices: Dict[str, float]):
+        """Latest bar prices that market orders fill against."""
+        self.prices.update(prices)
+
+    def _reserve_ids(self, n: int):
+        """Take the next ``n`` ids from the AUTOINCREMENT sequence in one write transaction."""
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            last = conn.execute(
+                "SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'orders'), 0), "
+                "COALESCE((SELECT MAX(id) FROM orders), 0))").fetchone()[0]
+            if conn.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = 'orders'", (last + n,)).rowcount == 0:
+                conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('orders', ?)", (last + n,))
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        self._next_id, self._end_id = last + 1, last + n + 1
+
+    def _fill(self, order: dict, ts: str) -> tuple:
+        """Row for ``order`` with its simulated fill."""
+        price = self.prices.get(order["symbol"], order.get("price"))
+        side = order["side"]
+        if price is None:
+            status, fill_price = "REJECTED", None
+        else:
+            status = "FILLED"
+            fill_price = price * (1 + self.slippage if side == "BUY" else 1 - self.slippage)
+        row = (self._next_id, ts, order["symbol"], side, order.get("qty", 1), order.get("price"), status, fill_price)
+        self._next_id += 1
+        return row
+
+    def place_order(self, symbol: str, side: str, qty: int = 1, price: float = None):
+        return self.place_orders([{"symbol": symbol, "side": side, "qty": qty, "price": price}])[0]
+
+    def place_orders(self, orders):
+        """Record and fill a batch of orders; one response per order."""
+        ts = dt.datetime.now().isoformat()
+        with self._lock:
+            if self._end_id - self._next_id < len(orders):
+                self._reserve_ids(max(len(orders), self.flush_rows))
+            rows = [self._fill(o, ts) for o in orders]
+            self._pending.extend(rows)
+            if len(self._pending) >= self.flush_rows:
+                self.flush()
+        logger.debug(f"[MOCK] {len(rows)} orders")
+        return [
+            {"status": "ok", "id": row[0], "fill_price": row[7]} if row[6] == "FILLED"
+            else {"status": "error", "id": row[0], "message": "no price to fill against"}
+            for row in rows
+        ]
+
+    def flush(self):
+        """Write buffered orders in one transaction; on failure they stay buffered for the next flush."""
+        with self._lock:
+            if not self._pending:
+                return
+            with self._conn:
+                self._conn.executemany(
+                    f"INSERT INTO orders ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                    self._pending)
+            self._pending = []
+
+    def close(self):
+        """Flush and close the connection."""
+        self._stop.set()
+        _open_brokers.discard(self)
+        with self._lock:
+            if self._conn is None:
+                return
+            self.flush()
+            self._conn.close()
+            self._conn = None
+
+    def __del__(self):
+        if getattr(self, "_conn", None) is not None:
+            self.close()
+
+    def order_statuses(self, ids):
+        """Fill state of the given order ids."""
+        ids = [int(i) for i in ids]
+        if not ids:
+            return []
+        with self._lock:
+            self.flush()
+            rows = self._conn.execute(
+                f"SELECT id, qty, status, fill_price FROM orders WHERE id IN ({','.join('?' * len(ids))})", ids
+            ).fetchall()
+        return [{"id": str(i), "status": status or "FILLED", "filled_qty": qty if status != "REJECTED" else 0,
+                 "avg_price": fill_price}
+                for i, qty, status, fill_price in rows]
+
+    def order_history(self):
+        """All filled orders as (timestamp, symbol, side, qty, price) rows."""
+        with self._lock:
+            self.flush()
+            return self._conn.execute(
+                "SELECT ts, symbol, side, qty, COALESCE(fill_price, price) FROM orders "
+                "WHERE status IS NULL OR status = 'FILLED' ORDER BY id"
+            ).fetchall()
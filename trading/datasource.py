@@ -1,8 +1,17 @@
 import os
+import contextvars
 import datetime as dt
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field, asdict
 from pathlib import Path
-from typing import List
+from typing import Iterator, List, Optional, Tuple
 import pandas as pd
+from .barstore import BarStore
+from .utils.ratelimit import TokenBucket
 
 try:
     from fyers_apiv3 import fyersModel
@@ -13,6 +22,29 @@ CONFIG_DIR = Path(__file__).resolve().parents[1] / "config"
 RAW_DIR = Path(__file__).resolve().parents[1] / "data" / "raw"
 RAW_DIR.mkdir(parents=True, exist_ok=True)
 
+logger = logging.getLogger(__name__)
+
+
+class ThrottledError(RuntimeError):
+    """Raised when the history endpoint reports rate limiting."""
+
+
+@dataclass
+class FetchResult:
+    """Outcome of one symbol's history request."""
+    symbol: str
+    status: str                 # ok | no_data | error
+    rows: int = 0
+    latency_ms: float = 0.0
+    attempts: int = 0
+    error: Optional[str] = None
+    data: Optional[pd.DataFrame] = field(default=None, repr=False)
+
+    def to_dict(self) -> dict:
+        result = asdict(self)
+        result.pop("data")
+        return result
+
 
 def _load_secrets() -> dict:
     import yaml
@@ -28,63 +60,228 @@ def _get_fyers_client():
     return fyers
 
 
-def fetch(symbols: List[str] = None, lookback_hours: int = None) -> pd.DataFrame:
-    """Fetch OHLCV minute bars for the past lookback_hours for each symbol."""
+def _is_throttled(resp: dict) -> bool:
+    return resp.get("code") in (429, -429) or "limit" in str(resp.get("message", "")).lower()
+
+
+def _history(fyers, sym: str, start: dt.datetime, end: dt.datetime) -> Optional[pd.DataFrame]:
+    """Request minute bars for one symbol; None when the endpoint has nothing."""
+    # Fyers history endpoint: max 60 days, resolution 1 data
+    resp = fyers.history({
+        "symbol": sym,
+        "resolution": "1",
+        "date_format": "1",
+        "range_from": start.date().strftime("%Y-%m-%d"),
+        "range_to": end.date().strftime("%Y-%m-%d"),
+        "cont_flag": "1"
+    })
+    if not isinstance(resp, dict):
+        raise RuntimeError(f"Invalid response for {sym}: {resp}")
+    if resp.get("s") == "ok" and resp.get("candles"):
+        df = pd.DataFrame(resp["candles"], columns=["timestamp", "open", "high", "low", "close", "volume"])
+        df["timestamp"] = pd.to_datetime(df["timestamp"], unit="s")
+        return df
+    if resp.get("s") == "no_data" or (resp.get("s") == "ok" and not resp.get("candles")):
+        return None
+    if _is_throttled(resp):
+        raise ThrottledError(f"Throttled fetching {sym}: {resp.get('message', resp)}")
+    raise RuntimeError(f"Invalid response for {sym}: {resp}")
+
+
+def _fetch_one(fyers, sym: str, start: dt.datetime, end: dt.datetime, limiter: TokenBucket,
+               max_retries: int, backoff_seconds: float) -> FetchResult:
+    """Fetch one symbol, retrying throttled requests with exponential backoff."""
+    t0 = time.perf_counter()
+    attempts = 0
+    while True:
+        attempts += 1
+        limiter.acquire()
+        try:
+            df = _history(fyers, sym, start, end)
+            return FetchResult(
+                symbol=sym,
+                status="ok" if df is not None else "no_data",
+                rows=0 if df is None else len(df),
+                latency_ms=(time.perf_counter() - t0) * 1000,
+                attempts=attempts,
+                data=df
+            )
+        except ThrottledError as exc:
+            if attempts > max_retries:
+                error = str(exc)
+                break
+            # Exponential backoff with jitter so workers do not retry in lockstep
+            time.sleep(backoff_seconds * 2 ** (attempts - 1) * (1 + random.random()))
+        except Exception as exc:
+            error = str(exc)
+            break
+    return FetchResult(symbol=sym, status="error", latency_ms=(time.perf_counter() - t0) * 1000,
+                       attempts=attempts, error=error)
+
+
+def fetch_iter(fyers, requests: List[Tuple[str, dt.datetime, dt.datetime]], max_workers: int = 8,
+               limiter: Optional[TokenBucket] = None, max_retries: int = 3,
+               backoff_seconds: float = 0.5) -> Iterator[Tuple[int, FetchResult]]:
+    """Run (symbol, start, end) history requests concurrently.
+
+    At most ``max_workers`` requests are in flight and every attempt,
+    including retries, takes a token from ``limiter``. Yields
+    ``(request index, result)`` pairs on the calling thread as requests
+    complete.
+    """
+    if limiter is None:
+        limiter = TokenBucket(rate=0)
+    if not requests:
+        return
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(requests)))) as pool:
+        futures = {
+            pool.submit(contextvars.copy_context().run, _fetch_one, fyers, sym, start, end, limiter,
+                        max_retries, backoff_seconds): i
+            for i, (sym, start, end) in enumerate(requests)
+        }
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+
+def fetch_many(fyers, requests: List[Tuple[str, dt.datetime, dt.datetime]], **kwargs) -> List[FetchResult]:
+    """Same as ``fetch_iter`` but waits for all requests and returns results in request order."""
+    results: List[Optional[FetchResult]] = [None] * len(requests)
+    for i, result in fetch_iter(fyers, requests, **kwargs):
+        results[i] = result
+    return results
+
+
+def fetch_settings(cfg: dict) -> dict:
+    """Concurrency and rate-limit keyword arguments for ``fetch_iter`` from settings."""
+    fetch_cfg = cfg.get("fetch", {})
+    return {
+        "max_workers": fetch_cfg.get("max_workers", 8),
+        "limiter": TokenBucket(
+            rate=fetch_cfg.get("rate_limit_per_sec", 10),
+            capacity=fetch_cfg.get("burst", fetch_cfg.get("rate_limit_per_sec", 10))
+        ),
+        "max_retries": fetch_cfg.get("max_retries", 3),
+        "backoff_seconds": fetch_cfg.get("backoff_seconds", 0.5),
+    }
+
+
+def fetch_window(lookback_hours: int) -> Tuple[dt.datetime, dt.datetime]:
+    """(start, end) of the history window ending now."""
+    end = dt.datetime.now()
+    return end - dt.timedelta(hours=lookback_hours), end
+
+
+def _request(sym: str, start: dt.datetime, end: dt.datetime,
+             store: Optional[BarStore]) -> Tuple[str, dt.datetime, dt.datetime]:
+    """History request for ``sym``; only the missing tail when the store covers the window start."""
+    range_from = start
+    last = store.last_timestamp(sym) if store is not None else None
+    if last is not None and last >= pd.Timestamp(start):
+        range_from = last.to_pydatetime()
+    return sym, range_from, end
+
+
+def _merge_result(res: FetchResult, store: Optional[BarStore], start: dt.datetime,
+                  end: dt.datetime) -> Optional[pd.DataFrame]:
+    """Merge one result into the store and return the symbol's window with a ``symbol`` column."""
+    df = res.data
+    if store is not None:
+        added = store.merge(res.symbol, df)
+        store.trim(res.symbol, pd.Timestamp(start))
+        df = store.load(res.symbol, pd.Timestamp(start), pd.Timestamp(end))
+        logger.debug(f"[DataSource] {res.symbol}: {added} new bars")
+    if res.status == "error":
+        logger.warning(f"[DataSource] Failed to fetch {res.symbol} after {res.attempts} attempts: {res.error}")
+    else:
+        logger.debug(f"[DataSource] {res.symbol}: {res.status}, {res.rows} rows in {res.latency_ms:.0f} ms")
+    res.data = None  # keep the report light
+    if df is None or df.empty:
+        return None
+    df = df.copy()
+    df["symbol"] = res.symbol
+    return df
+
+
+def fetch_symbol(fyers, sym: str, start: dt.datetime, end: dt.datetime, store: Optional[BarStore] = None,
+                 store_lock: Optional[threading.Lock] = None,
+                 **kwargs) -> Tuple[Optional[pd.DataFrame], FetchResult]:
+    """Fetch and merge one symbol's window on the calling thread.
+
+    ``kwargs`` are ``fetch_settings`` (limiter, retries, backoff); callers
+    fetching several symbols at once share one ``store_lock`` so the store
+    keeps a single writer. Returns the bars in ``fetch`` layout (None when
+    there are none) and the fetch result.
+    """
+    kwargs.pop("max_workers", None)
+    kwargs.setdefault("limiter", TokenBucket(rate=0))
+    kwargs.setdefault("max_retries", 3)
+    kwargs.setdefault("backoff_seconds", 0.5)
+    _, range_from, _ = _request(sym, start, end, store)
+    res = _fetch_one(fyers, sym, range_from, end, **kwargs)
+    if store_lock is None:
+        df = _merge_result(res, store, start, end)
+    else:
+        with store_lock:
+            df = _merge_result(res, store, start, end)
+    if df is None:
+        return None, res
+    return df.set_index(["timestamp", "symbol"]).sort_index(), res
+
+
+def fetch(symbols: List[str] = None, lookback_hours: int = None, store: Optional[BarStore] = None) -> pd.DataFrame:
+    """Fetch OHLCV minute bars for the past lookback_hours for each symbol.
+
+    With the bar cache enabled (``bar_cache.enabled`` or an explicit
+    ``store``) only the tail after the last stored bar is requested and
+    merged in; the returned window is then read back from the store.
+    """
+    df_all, _ = fetch_with_report(symbols, lookback_hours, store)
+    return df_all
+
+
+def fetch_with_report(symbols: List[str] = None, lookback_hours: int = None,
+                      store: Optional[BarStore] = None) -> Tuple[pd.DataFrame, List[FetchResult]]:
+    """Same as ``fetch`` but also returns a ``FetchResult`` per symbol."""
     import yaml
     # Load settings
     with open(CONFIG_DIR / "settings.yaml") as f:
         cfg = yaml.safe_load(f)
+    cache_cfg = cfg.get("bar_cache", {})
     
     # Get symbols and lookback_hours from config
     if symbols is None:
         symbols = cfg["symbols"]
     if lookback_hours is None:
         lookback_hours = cfg.get("lookback_hours", 24)  # default to 24 if not specified
+    if store is None and cache_cfg.get("enabled", False):
+        store = BarStore()
     
-    # Calculate date range for historical data
-    end = dt.datetime.now()
-    start = end - dt.timedelta(hours=lookback_hours)
-    
-    # Ensure we're not requesting future data and use only dates
-    if end.date() > dt.datetime.now().date():
-        end = dt.datetime.now()
-        start = end - dt.timedelta(hours=lookback_hours)
-    
-    print(f"[DataSource] Fetching data from {start.date()} to {end.date()} (lookback: {lookback_hours} hours)")
+    start, end = fetch_window(lookback_hours)
+    logger.info(f"[DataSource] Fetching data from {start.date()} to {end.date()} (lookback: {lookback_hours} hours)")
     
-    data_frames = []
     fyers = _get_fyers_client()
 
-    for sym in symbols:
-        try:
-            # Fyers history endpoint: max 60 days, resolution 1 data
-            resp = fyers.history({
-                "symbol": sym,
-                "resolution": "1",
-                "date_format": "1",
-                "range_from": start.date().strftime("%Y-%m-%d"),
-                "range_to": end.date().strftime("%Y-%m-%d"),
-                "cont_flag": "1"
-            })
-            if isinstance(resp, dict):
-                if resp.get("s") == "ok" and resp.get("candles"):
-                    df = pd.DataFrame(resp["candles"], columns=["timestamp", "open", "high", "low", "close", "volume"])
-                    df["symbol"] = sym
-                    df["timestamp"] = pd.to_datetime(df["timestamp"], unit="s")
-                    data_frames.append(df)
-                elif resp.get("s") == "no_data":
-                    print(f"[DataSource] No data available for {sym} in the specified date range")
-                else:
-                    print(f"[DataSource] Invalid response for {sym}: {resp}")
-        except Exception as exc:
-            print(f"[DataSource] Failed to fetch {sym}: {exc}")
+    requests = [_request(sym, start, end, store) for sym in symbols]
+    results = fetch_many(fyers, requests, **fetch_settings(cfg))
+
+    # Merge on the calling thread so the store is only ever written by one writer
+    data_frames = []
+    for res in results:
+        df = _merge_result(res, store, start, end)
+        if df is not None:
+            data_frames.append(df)
     
     if not data_frames:
         raise RuntimeError("No data fetched!")
     
     df_all = pd.concat(data_frames).set_index(["timestamp", "symbol"]).sort_index()
-    # Save as CSV
+    if store is None or cache_cfg.get("snapshot_csv", True):
+        save_snapshot(df_all, end)
+    return df_all, results
+
+
+def save_snapshot(df_all: pd.DataFrame, end: dt.datetime):
+    """Write the fetched window to ``data/raw`` as CSV (read by backtests)."""
     fname = RAW_DIR / f"raw_{end:%Y%m%d%H%M}.csv"
     df_all.to_csv(fname)
-    print(f"[DataSource] Saved raw data to {fname}")
-    return df_all
+    logger.info(f"[DataSource] Saved raw data to {fname}")
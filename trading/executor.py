@@ -1,30 +1,201 @@
+"""Order execution through one long-lived broker session.
+
+The broker (and with it the settings, secrets and API client) is built
+once and reused until ``broker`` changes in ``settings.yaml`` or
+``reset`` is called. ``execute`` takes a batch of signals and submits them
+together: through the broker's ``place_orders`` (a basket/multi-order
+endpoint) when it has one, otherwise concurrently through ``place_order``.
+It returns one response per signal, in signal order.
+
+With ``risk.enabled`` every order first passes ``risk.RiskEngine``
+(``position_limit`` and ``notional_cap``); rejected orders never reach the
+broker and get a ``{"status": "rejected"}`` response.
+
+``submit`` is the non-blocking variant: orders go to the shared
+``orders.OrderManager``, which batches them to the broker in the
+background and tracks their fills in its in-memory ``OrderBook``.
+"""
+
+import logging
+import threading
 import yaml
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Optional
 from .intelligence.rules import Signal
+from .orders import Order, OrderManager, is_ok
+from .risk import RiskEngine
 from .broker.fyers import FyersBroker
 from .broker.mock import MockBroker
 
 CONFIG_DIR = Path(__file__).resolve().parents[1] / "config"
+MAX_CONCURRENT_ORDERS = 8  # when the broker has no multi-order endpoint
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_config_cache: Optional[tuple] = None   # (settings mtime_ns, settings)
+_broker_cache: Optional[tuple] = None   # (broker name, broker)
+_manager: Optional[OrderManager] = None
+_risk: Optional[RiskEngine] = None
 
 
 def _load_config():
-    with open(CONFIG_DIR / "settings.yaml") as f:
-        return yaml.safe_load(f)
+    """Settings, re-read only when the file changes."""
+    global _config_cache
+    path = CONFIG_DIR / "settings.yaml"
+    mtime = path.stat().st_mtime_ns
+    if _config_cache is None or _config_cache[0] != mtime:
+        with open(path) as f:
+            _config_cache = (mtime, yaml.safe_load(f))
+    return _config_cache[1]
 
 
 def _get_broker():
+    """The shared broker session for the configured ``broker``."""
+    global _broker_cache
+    with _lock:
+        name = _load_config().get("broker")
+        if _broker_cache is None or _broker_cache[0] != name:
+            if _broker_cache is not None and hasattr(_broker_cache[1], "close"):
+                _broker_cache[1].close()
+            broker = FyersBroker() if name == "fyers" else MockBroker(**_load_config().get("paper", {}))
+            _broker_cache = (name, broker)
+            logger.info(f"[Executor] Opened {type(_broker_cache[1]).__name__} session")
+        return _broker_cache[1]
+
+
+def get_risk_engine() -> Optional[RiskEngine]:
+    """The shared risk engine, rebuilt from the broker's order history and positions on first use; None if disabled."""
+    global _risk
     cfg = _load_config()
-    if cfg.get("broker") == "fyers":
-        return FyersBroker()
-    return MockBroker()
+    if not cfg.get("risk", {}).get("enabled", True):
+        return None
+    broker = _get_broker()
+    with _lock:
+        if _risk is None:
+            history = broker.order_history() if hasattr(broker, "order_history") else []
+            positions = broker.positions() if hasattr(broker, "positions") else None
+            _risk = RiskEngine.from_history(history, cfg.get("position_limit", 100),
+                                            cfg.get("notional_cap", 100000), positions=positions)
+        return _risk
+
+
+def mark_prices(prices: Dict[str, float]):
+    """Latest prices: paper fills and the risk engine's fallback reference prices."""
+    broker = _get_broker()
+    if hasattr(broker, "update_prices"):
+        broker.update_prices(prices)
+    if _risk is not None:
+        for symbol, price in prices.items():
+            _risk.mark(symbol, price)
+
+
+def _release(order: Order):
+    """Hand the unfilled part of a finished order back to the risk engine."""
+    risk = _risk
+    if risk is not None and order.price is not None and order.qty > order.filled_qty:
+        risk.release(order.symbol, order.side, order.qty - order.filled_qty, order.price)
 
 
-def execute(signals: List[Signal]):
+def get_order_manager() -> OrderManager:
+    """The shared, started order manager on the current broker session."""
+    global _manager
+    broker = _get_broker()
+    with _lock:
+        if _manager is None or _manager.broker is not broker:
+            if _manager is not None:
+                _manager.stop()
+            cfg = _load_config().get("order_manager", {})
+            _manager = OrderManager(broker, batch_size=cfg.get("batch_size", 50),
+                                    poll_seconds=cfg.get("poll_seconds", 1.0), on_reject=_release).start()
+        return _manager
+
+
+def reset():
+    """Drop the cached settings, broker session, order manager and risk state (e.g. after a token refresh)."""
+    global _config_cache, _broker_cache, _manager, _risk
+    with _lock:
+        if _manager is not None:
+            _manager.stop()
+        if _broker_cache is not None and hasattr(_broker_cache[1], "close"):
+            _broker_cache[1].close()
+        _config_cache = _broker_cache = _manager = _risk = None
+
+
+def _submit_one(broker, order: dict) -> dict:
+    try:
+        return broker.place_order(**order)
+    except Exception as e:
+        logger.error(f"[Executor] Order {order} failed: {e}")
+        return {"status": "error", "message": str(e)}
+
+
+def _pre_trade(signals: List[Signal], qty: int):
+    """Risk-check each signal; return (order or None, rejection response or None) per signal."""
+    risk = get_risk_engine()
+    checked = []
+    for s in signals:
+        price = s.price
+        if risk is not None:
+            decision = risk.reserve(s.symbol, s.side, qty, s.price)
+            if not decision.accepted:
+                checked.append((None, {"status": "rejected", "message": decision.reason}))
+                continue
+            price = decision.price
+        checked.append(({"symbol": s.symbol, "side": s.side, "qty": qty, "price": price}, None))
+    return checked
+
+
+def execute(signals: List[Signal], qty: int = 1) -> List[dict]:
+    """Submit one order per signal as a batch; return the broker responses in signal order."""
     if not signals:
         print("[Executor] No signals.")
-        return
+        return []
     broker = _get_broker()
-    for s in signals:
-        print(f"[Executor] Executing {s.side} on {s.symbol} (conf {s.confidence:.2f})")
-        broker.place_order(symbol=s.symbol, side=s.side, qty=1)
+    checked = _pre_trade(signals, qty)
+    orders = [order for order, _ in checked if order is not None]
+    for s, (order, _) in zip(signals, checked):
+        if order is not None:
+            print(f"[Executor] Executing {s.side} on {s.symbol} (conf {s.confidence:.2f})")
+    if not orders:
+        sent = []
+    elif hasattr(broker, "place_orders"):
+        try:
+            sent = broker.place_orders(orders)
+        except Exception as e:
+            # Nothing reached the exchange we know of; fail every order so its reservation is released
+            logger.error(f"[Executor] Batch of {len(orders)} orders failed: {e}")
+            sent = [{"status": "error", "message": str(e)} for _ in orders]
+    elif len(orders) == 1:
+        sent = [_submit_one(broker, orders[0])]
+    else:
+        with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_ORDERS, len(orders))) as pool:
+            sent = list(pool.map(lambda order: _submit_one(broker, order), orders))
+
+    risk = _risk
+    responses = []
+    sent = iter(sent)
+    for order, rejection in checked:
+        if order is None:
+            responses.append(rejection)
+            continue
+        resp = next(sent)
+        if not is_ok(resp) and risk is not None and order["price"] is not None:
+            risk.release(order["symbol"], order["side"], qty, order["price"])
+        responses.append(resp)
+    return responses
+
+
+def submit(signals: List[Signal], qty: int = 1) -> List[Order]:
+    """Queue one order per signal without waiting for the broker; return the tracked orders."""
+    manager = get_order_manager()
+    placed = []
+    for s, (order, rejection) in zip(signals, _pre_trade(signals, qty)):
+        if order is None:
+            rejected = manager.book.new_order(s.symbol, s.side, qty, s.price)
+            manager.book.reject(rejected, rejection["message"])
+            placed.append(rejected)
+        else:
+            placed.append(manager.submit(order["symbol"], order["side"], qty, order["price"]))
+    return placed
@@ -0,0 +1,233 @@
+"""Content-addressed cache of computed feature blocks.
+
+``preprocess.features`` stores its output per symbol and fixed time block
+(``feature_store.block``, one day by default) under ``data/cache/features``.
+A block's key hashes the symbol, the block start, a digest of the raw bars
+it is computed from, the resolved indicator parameters and the source of
+the feature code.
+
+Warm-up is counted in bars of each timeframe, as the indicators see them
+(sessions and gaps included; see ``indicators.warmup_bars``). A block with
+that many bars before it in the data is computed from them and its own
+bars; recursive averages such as RSI have then forgotten their seed to
+within ``indicators.EWM_TOLERANCE``, so the block matches ``transform`` on
+any window that contains its warm-up, and a window that moves forward
+reuses it. A block with less history is computed from the start of the
+data, exactly as ``transform`` does. A run computes only the missing
+blocks, panel-wide in one call.
+
+Only blocks that can recur are written: complete blocks with their full
+warm-up. Every block a call used is also kept in memory for the next call
+on the same symbols, so a live process reads the disk only after a
+restart; the still-forming last block and blocks near the window start
+live there only.
+
+Entries are evicted least-recently-used first once the store exceeds
+``feature_store.max_mb`` or ``feature_store.max_entries``, which keeps disk
+use bounded under a once-a-minute schedule.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+STORE_DIR = Path(__file__).resolve().parents[1] / "data" / "cache" / "features"
+RAW_COLUMNS = ["timestamp", "open", "high", "low", "close", "volume"]
+
+
+def code_version(files: Iterable[Path]) -> str:
+    """Digest of the given source files."""
+    digest = hashlib.sha1()
+    for path in files:
+        digest.update(Path(path).read_bytes())
+    return digest.hexdigest()[:16]
+
+
+class FeatureStore:
+    def __init__(self, root: Path = STORE_DIR, max_mb: float = 512, max_entries: int = 5000,
+                 version: str = "", block: str = "1D", warmup: Optional[Dict[str, int]] = None):
+        self.root = Path(root)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.max_entries = max_entries
+        self.version = version
+        self.block = pd.Timedelta(block)
+        self.warmup = dict(warmup or {})  # timeframe -> bars; none: every block from the data start
+        self._lock = threading.Lock()
+        self._usage: Optional[List[int]] = None  # [bytes, entries] since the last scan
+        self._recent: Dict[str, Dict[str, pd.DataFrame]] = {}  # per symbol, the blocks of the last call
+
+    def key(self, symbol: str, bars: pd.DataFrame, params: dict, block_start: Optional[pd.Timestamp] = None) -> str:
+        """Key of the feature block computed from one symbol's raw ``bars``."""
+        content = pd.util.hash_pandas_object(bars[RAW_COLUMNS], index=False).to_numpy()
+        times = bars["timestamp"].to_numpy(dtype="datetime64[ns]")
+        return self._key(symbol, times, content, params, block_start)
+
+    def _key(self, symbol: str, times: np.ndarray, row_hashes: np.ndarray, params: dict,
+             block_start: Optional[pd.Timestamp]) -> str:
+        spec = {
+            "symbol": symbol,
+            "block": block_start.isoformat() if block_start is not None else None,
+            "start": pd.Timestamp(times[0]).isoformat() if len(times) else None,
+            "end": pd.Timestamp(times[-1]).isoformat() if len(times) else None,
+            "rows": len(times),
+            "bars": hashlib.sha1(row_hashes.tobytes()).hexdigest(),
+            "params": params,
+            "version": self.version,
+        }
+        return hashlib.sha1(json.dumps(spec, sort_keys=True, default=str).encode()).hexdigest()[:24]
+
+    def _path(self, key: str) -> Path:
+        return self.root / f"{key}.parquet"
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        path = self._path(key)
+        try:
+            block = pd.read_parquet(path)
+        except (OSError, ValueError):
+            return None  # missing, or evicted/corrupt mid-read
+        os.utime(path)  # mark as recently used
+        return block
+
+    def put(self, key: str, block: pd.DataFrame):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.root / f".{key}.{uuid.uuid4().hex[:8]}.tmp"
+        block.to_parquet(tmp, index=False)
+        size = tmp.stat().st_size
+        os.replace(tmp, self._path(key))
+        with self._lock:
+            if self._usage is not None:
+                self._usage[0] += size
+                self._usage[1] += 1
+
+    def _over_limits(self) -> bool:
+        """Whether the store may be over its limits (always true before the first scan)."""
+        with self._lock:
+            return self._usage is None or self._usage[0] > self.max_bytes or self._usage[1] > self.max_entries
+
+    def evict(self) -> int:
+        """Drop least-recently-used blocks beyond the size and count limits; return how many."""
+        if not self.root.exists():
+            return 0
+        entries = []
+        for path in self.root.glob("*.parquet"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes and len(entries) - removed <= self.max_entries:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        with self._lock:
+            self._usage = [total, len(entries) - removed]
+        return removed
+
+    def _blocks(self, symbol: str, bars: pd.DataFrame, params: dict, warmup: Dict[str, int]):
+        """(block start, key, durable, row slice of the warm-up plus block bars) for each block holding bars.
+
+        The slice starts ``warmup[timeframe]`` bars of every timeframe
+        before the block, or at the first row when there are fewer.
+        """
+        times = bars["timestamp"].to_numpy(dtype="datetime64[ns]")
+        row_hashes = pd.util.hash_pandas_object(bars[RAW_COLUMNS], index=False).to_numpy()
+        last = pd.Timestamp(times[-1])
+        starts = pd.date_range(pd.Timestamp(times[0]).floor(self.block), last, freq=self.block)
+        begins, ends = np.searchsorted(times, np.stack([starts.to_numpy(), (starts + self.block).to_numpy()]))
+        los, warm = begins.copy(), np.full(len(starts), bool(warmup))
+        for timeframe, count in warmup.items():
+            # First row of every bar on this timeframe, as resampling forms them
+            buckets = pd.DatetimeIndex(times).floor(timeframe).asi8
+            firsts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+            before = np.searchsorted(firsts, begins)  # bars before each block
+            warm &= before >= count
+            los = np.minimum(los, firsts[np.maximum(before - count, 0)])
+        los[~warm] = 0
+        for start, lo, begin, hi, full in zip(starts, los, begins, ends, warm):
+            if begin == hi:
+                continue  # no bars in this block
+            durable = full and last >= start + self.block
+            yield start, self._key(symbol, times[lo:hi], row_hashes[lo:hi], params, start), durable, slice(lo, hi)
+
+    def get_or_compute(self, raw_df: pd.DataFrame, compute: Callable[[pd.DataFrame], pd.DataFrame],
+                       params: dict, warmup: Optional[Dict[str, int]] = None) -> Tuple[pd.DataFrame, int]:
+        """Features for ``raw_df`` from cached blocks, computing only the missing ones.
+
+        ``compute`` maps raw bars (flat, any set of symbols) to features in
+        ``transform`` layout; ``warmup`` (default: the store's) is how many
+        bars of each timeframe before a block its features depend on.
+        Returns the features sorted by (symbol, timestamp) and the number of
+        symbols with computed blocks.
+        """
+        warmup = self.warmup if warmup is None else warmup
+        df = raw_df.reset_index() if "timestamp" not in raw_df.columns else raw_df
+        blocks: Dict[Tuple[str, pd.Timestamp], Optional[pd.DataFrame]] = {}
+        missing = []
+        recent: Dict[str, Dict[str, pd.DataFrame]] = {}
+        bars: Dict[str, pd.DataFrame] = {}
+        for sym, grp in df.groupby("symbol", sort=True):
+            grp = bars[sym] = grp.sort_values("timestamp", kind="mergesort")
+            memo = self._recent.get(sym, {})
+            recent[sym] = {}
+            for i, (start, key, durable, rows) in enumerate(self._blocks(sym, grp, params, warmup)):
+                block = memo.get(key)
+                if block is None and durable:
+                    block = self.get(key)
+                if block is not None:
+                    recent[sym][key] = block
+                blocks[(sym, start)] = block
+                if block is None:
+                    missing.append((sym, i, start, key, durable, rows))
+
+        if missing:
+            # Features are causal, so a run of consecutive missing blocks comes out of one pass
+            # from the first one's warm-up; later blocks in it get at least their own. Each pass
+            # runs under a symbol name of its own, all of them in one call.
+            names: List[str] = []
+            passes: Dict[str, List[int]] = {}  # name -> [first row, end row]
+            previous = None
+            for sym, i, start, _, _, rows in missing:
+                if previous != (sym, i - 1):
+                    names.append(f"{sym}|{start.isoformat()}")
+                    passes[names[-1]] = [rows.start, rows.stop]
+                else:
+                    names.append(names[-1])
+                    passes[names[-1]][1] = rows.stop
+                previous = (sym, i)
+            computed = compute(pd.concat(
+                [bars[name.rpartition("|")[0]].iloc[lo:hi].assign(symbol=name) for name, (lo, hi) in passes.items()],
+                ignore_index=True))
+            by_name = dict(tuple(computed.groupby("symbol", sort=False)))
+            empty = computed.iloc[:0]
+            for name, (sym, _, start, key, durable, rows) in zip(names, missing):
+                block = by_name.get(name, empty)
+                ts = block["timestamp"]
+                block = block[(ts >= start) & (ts < start + self.block)].assign(symbol=sym)
+                blocks[(sym, start)] = block
+                recent[sym][key] = block
+                if durable:
+                    self.put(key, block)
+            if self._over_limits():
+                self.evict()
+        self._recent.update(recent)
+        computed_symbols = len({sym for sym, *_ in missing})
+        logger.debug(f"Feature store: {len(blocks) - len(missing)} blocks cached, {len(missing)} computed")
+
+        frames = [blocks[k] for k in sorted(blocks)]
+        if not frames:
+            return compute(df), 0
+        return pd.concat(frames, ignore_index=True), computed_symbols
@@ -0,0 +1,233 @@
+"""Incremental, stateful feature engine for live mode.
+
+``preprocess.transform`` resamples the full lookback window and recomputes
+every indicator on each run. ``IncrementalFeatureEngine`` instead keeps per
+symbol state - running sums for the SMAs, Wilder averages for RSI and the
+partial hourly bar - and folds in only the minute bars it has not seen yet,
+at O(1) cost per bar. The last minute of each symbol stays provisional:
+fetches end with the still-forming minute, so a later bar with the same
+timestamp replaces it.
+
+Given the same minute-bar history, the features produced here match
+``preprocess.transform`` to within ``TOLERANCE`` (relative). The only source
+of difference is floating-point summation order in the rolling means.
+"""
+
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Deque, Dict, List, Optional
+import numpy as np
+import pandas as pd
+import yaml
+
+CONFIG_DIR = Path(__file__).resolve().parents[1] / "config"
+
+# Load settings
+with open(CONFIG_DIR / "settings.yaml", "r") as f:
+    settings = yaml.safe_load(f)
+
+TOLERANCE = 1e-9
+FEATURE_COLUMNS = ["timestamp", "open", "high", "low", "close", "volume", "rsi", "sma_fast", "sma_slow", "symbol"]
+
+
+class _RollingSum:
+    """Sum of the last ``window`` committed values."""
+
+    def __init__(self, window: int):
+        self.window = window
+        self.values: Deque[float] = deque()
+        self.total = 0.0
+
+    def push(self, value: float):
+        if self.window <= 0:
+            return
+        self.values.append(value)
+        self.total += value
+        if len(self.values) > self.window:
+            self.total -= self.values.popleft()
+
+
+@dataclass
+class _SymbolState:
+    """Rolling indicator state for one symbol."""
+    symbol: str
+    rsi_period: int
+    sma_fast_period: int
+    sma_slow_period: int
+    last_ts: Optional[pd.Timestamp] = None
+    last_bar: Optional[tuple] = None  # (open, high, low, close, volume) of the provisional last minute
+    bars: int = 0                     # committed hourly bars
+    last_close: float = np.nan        # close of the last committed bar
+    avg_up: float = 0.0               # Wilder averages up to the last committed bar
+    avg_down: float = 0.0
+    partial: Optional[dict] = None    # hourly bar currently being built
+    before_last: Optional[dict] = None  # the partial hour without the last minute
+    fast_sum: _RollingSum = field(init=False)
+    slow_sum: _RollingSum = field(init=False)
+    history: Deque[dict] = field(default_factory=deque)
+
+    def __post_init__(self):
+        # The bar being evaluated contributes its own close, so the running
+        # sums only cover the previous period - 1 committed closes.
+        self.fast_sum = _RollingSum(self.sma_fast_period - 1)
+        self.slow_sum = _RollingSum(self.sma_slow_period - 1)
+
+    def seen(self, ts: pd.Timestamp, bar: tuple) -> bool:
+        """Whether the minute ``ts`` with values ``bar`` adds nothing to the state."""
+        return self.last_ts is not None and (ts < self.last_ts or (ts == self.last_ts and bar == self.last_bar))
+
+    def add_minute(self, ts: pd.Timestamp, o: float, h: float, l: float, c: float, v: float) -> Optional[pd.Timestamp]:
+        """Fold one minute bar into the partial hour; return the hour it closed, if any.
+
+        A bar at the last timestamp replaces the provisional last minute.
+        """
+        hour = ts.floor("h")
+        closed = None
+        if ts == self.last_ts:
+            self.partial = self.before_last
+        elif self.partial is not None and hour != self.partial["timestamp"]:
+            closed = self.partial["timestamp"]
+            self._commit()
+        self.before_last = None if self.partial is None else dict(self.partial)
+        if self.partial is None:
+            self.partial = {"timestamp": hour, "open": o, "high": h, "low": l, "close": c, "volume": v}
+        else:
+            p = self.partial
+            p["high"] = max(p["high"], h)
+            p["low"] = min(p["low"], l)
+            p["close"] = c
+            p["volume"] += v
+        self.last_ts = ts
+        self.last_bar = (o, h, l, c, v)
+        return closed
+
+    def _wilder(self, close: float):
+        """Wilder averages after appending ``close`` as the next bar."""
+        alpha = 1.0 / self.rsi_period
+        if self.bars == 0:
+            return 0.0, 0.0
+        diff = close - self.last_close
+        up, down = max(diff, 0.0), max(-diff, 0.0)
+        return (1 - alpha) * self.avg_up + alpha * up, (1 - alpha) * self.avg_down + alpha * down
+
+    def features(self, bar: dict, index: int, avg_up: float, avg_down: float, fast_total: float, slow_total: float) -> dict:
+        """Feature row for ``bar`` sitting at position ``index`` in the hourly series."""
+        close = bar["close"]
+        count = index + 1
+        row = dict(bar)
+        if count >= self.rsi_period:
+            row["rsi"] = 100.0 if avg_down == 0 else 100.0 - 100.0 / (1.0 + avg_up / avg_down)
+        else:
+            row["rsi"] = np.nan
+        row["sma_fast"] = (fast_total + close) / self.sma_fast_period if count >= self.sma_fast_period else np.nan
+        row["sma_slow"] = (slow_total + close) / self.sma_slow_period if count >= self.sma_slow_period else np.nan
+        row["symbol"] = self.symbol
+        return row
+
+    def partial_features(self) -> Optional[dict]:
+        if self.partial is None:
+            return None
+        avg_up, avg_down = self._wilder(self.partial["close"])
+        return self.features(self.partial, self.bars, avg_up, avg_down, self.fast_sum.total, self.slow_sum.total)
+
+    def _commit(self):
+        """Move the partial hour into the committed state."""
+        row = self.partial_features()
+        close = self.partial["close"]
+        self.avg_up, self.avg_down = self._wilder(close)
+        self.fast_sum.push(close)
+        self.slow_sum.push(close)
+        self.last_close = close
+        self.bars += 1
+        self.history.append(row)
+        self.partial = None
+
+
+class IncrementalFeatureEngine:
+    """Keeps hourly RSI/SMA features up to date from streaming minute bars."""
+
+    def __init__(self, rsi_period: int = None, sma_fast_period: int = None,
+                 sma_slow_period: int = None, history_bars: int = None):
+        self.rsi_period = rsi_period or settings.get("rsi_period", 14)
+        self.sma_fast_period = sma_fast_period or settings.get("sma_fast_period", 10)
+        self.sma_slow_period = sma_slow_period or settings.get("sma_slow_period", 20)
+        # Committed feature rows kept per symbol for frame(); defaults to the lookback window
+        self.history_bars = history_bars or settings.get("lookback_hours", 480)
+        self.states: Dict[str, _SymbolState] = {}
+
+    def _state(self, symbol: str) -> _SymbolState:
+        if symbol not in self.states:
+            self.states[symbol] = _SymbolState(
+                symbol=symbol,
+                rsi_period=self.rsi_period,
+                sma_fast_period=self.sma_fast_period,
+                sma_slow_period=self.sma_slow_period,
+                history=deque(maxlen=self.history_bars),
+            )
+        return self.states[symbol]
+
+    def update(self, raw_df: pd.DataFrame) -> pd.DataFrame:
+        """Fold new minute bars into the state and return the hourly rows that changed.
+
+        ``raw_df`` has the layout returned by ``datasource.fetch``. Bars
+        before the last timestamp already seen for a symbol are ignored, so
+        overlapping re-fetches are safe; a bar at that timestamp with new
+        values revises the provisional last minute. Rows that are still
+        warming up (any indicator NaN) are omitted, as ``transform`` drops
+        them too.
+        """
+        df = raw_df.reset_index() if "timestamp" not in raw_df.columns else raw_df
+        changed: List[dict] = []
+        for sym, grp in df.groupby("symbol", sort=True):
+            state = self._state(sym)
+            grp = grp.sort_values("timestamp", kind="mergesort")
+            if state.last_ts is not None:
+                grp = grp[grp["timestamp"] >= state.last_ts]
+            if grp.empty:
+                continue
+            cols = [grp[c].to_numpy() for c in ("open", "high", "low", "close", "volume")]
+            touched = False
+            for ts, o, h, l, c, v in zip(pd.DatetimeIndex(grp["timestamp"]), *cols):
+                bar = (float(o), float(h), float(l), float(c), v)
+                if state.seen(ts, bar):
+                    continue
+                touched = True
+                if state.add_minute(ts, *bar) is not None:
+                    changed.append(state.history[-1])
+            if touched:
+                changed.append(state.partial_features())
+        return self._to_frame(changed)
+
+    def add_bar(self, symbol: str, ts: pd.Timestamp, o: float, h: float, l: float, c: float,
+                v: float) -> Optional[pd.Timestamp]:
+        """Fold a single streamed minute bar; return the hour it closed, if any.
+
+        Bars before the symbol's last timestamp are ignored; a bar at that
+        timestamp revises the provisional last minute.
+        """
+        state = self._state(symbol)
+        if state.seen(ts, (o, h, l, c, v)):
+            return None
+        return state.add_minute(ts, o, h, l, c, v)
+
+    def frame(self, symbols: Optional[List[str]] = None) -> pd.DataFrame:
+        """Full feature frame (committed history plus partial hour) in ``transform`` layout.
+
+        ``symbols`` restricts the frame to those symbols.
+        """
+        rows: List[dict] = []
+        for sym in sorted(self.states if symbols is None else set(symbols) & set(self.states)):
+            state = self.states[sym]
+            rows.extend(state.history)
+            partial = state.partial_features()
+            if partial is not None:
+                rows.append(partial)
+        return self._to_frame(rows)
+
+    @staticmethod
+    def _to_frame(rows: List[dict]) -> pd.DataFrame:
+        if not rows:
+            return pd.DataFrame(columns=FEATURE_COLUMNS)
+        feat_df = pd.DataFrame(rows, columns=FEATURE_COLUMNS).dropna()
+        return feat_df.reset_index(drop=True)
@@ -0,0 +1,255 @@
+"""Registry of technical indicators computed as a dependency graph.
+
+Each indicator declares the columns or other indicators it reads and its
+parameters, which are either literals or ``Setting`` references resolved
+from ``config/settings.yaml``. ``compute`` expands the requested names into
+their dependency graph and evaluates it in topological order on a
+(symbol, timestamp) sorted panel:
+
+* only nodes reachable from the requested names are evaluated, so unused
+  indicators cost nothing;
+* nodes are identified by kernel, resolved inputs and resolved parameters
+  rather than by name, so a shared intermediate (e.g. the rolling mean of
+  close used by both ``sma_slow`` and the Bollinger bands, or two SMAs
+  configured with the same period) is computed once.
+
+Kernels are grouped by symbol and receive whole columns, so each node is a
+single vectorized call for the entire panel. ``warmup_bars`` tells how many
+bars of history a value depends on: an indicator's largest integer
+parameter (its window) unless it declares ``warmup``.
+
+Adding an indicator:
+
+    @register("momentum", inputs=("close",), window=Setting("momentum_period", 10))
+    def momentum(ctx, close, window):
+        return close - ctx.group(close).shift(window).to_numpy()
+"""
+
+import math
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+BASE_COLUMNS = ("open", "high", "low", "close", "volume")
+EWM_TOLERANCE = 1e-12  # weight left on an EWM's seed after its warm-up
+
+
+@dataclass(frozen=True)
+class Setting:
+    """Parameter taken from the settings, with a default when unset."""
+    key: str
+    default: Any
+
+
+@dataclass
+class Indicator:
+    name: str
+    func: Callable[..., np.ndarray]
+    inputs: Tuple[str, ...]
+    params: Dict[str, Any] = field(default_factory=dict)
+    output: bool = True  # False for intermediates that are not feature columns
+    warmup: Optional[Callable[..., int]] = None  # bars of input history needed, from the resolved params
+
+
+REGISTRY: Dict[str, Indicator] = {}
+
+
+def register(name: str, inputs: Tuple[str, ...], output: bool = True,
+             warmup: Optional[Callable[..., int]] = None, **params):
+    """Decorator adding a kernel ``func(ctx, *inputs, **params)`` to the registry."""
+    def decorator(func):
+        REGISTRY[name] = Indicator(name=name, func=func, inputs=tuple(inputs), params=params, output=output,
+                                   warmup=warmup)
+        return func
+    return decorator
+
+
+def outputs() -> List[str]:
+    """Names of the registered indicators that can be emitted as features."""
+    return [name for name, ind in REGISTRY.items() if ind.output]
+
+
+class Context:
+    """Grouping of a (symbol, timestamp) sorted panel handed to kernels."""
+
+    def __init__(self, symbols: pd.Series):
+        self.codes, _ = pd.factorize(symbols)
+
+    def group(self, values: np.ndarray):
+        return pd.Series(values).groupby(self.codes, sort=False)
+
+
+@dataclass
+class Node:
+    key: tuple
+    names: List[str]
+    indicator: Indicator
+    inputs: Tuple[tuple, ...]
+    params: Dict[str, Any]
+
+
+def _resolve(value, settings: dict):
+    return settings.get(value.key, value.default) if isinstance(value, Setting) else value
+
+
+def plan(names: Iterable[str], settings: Optional[dict] = None) -> List[Node]:
+    """Topologically ordered nodes needed for ``names``, shared nodes merged."""
+    settings = settings or {}
+    nodes: Dict[tuple, Node] = {}
+
+    def visit(name: str, path: Tuple[str, ...]) -> tuple:
+        if name in BASE_COLUMNS:
+            return ("column", name)
+        if name in path:
+            raise ValueError(f"Indicator dependency cycle: {' -> '.join(path + (name,))}")
+        if name not in REGISTRY:
+            raise KeyError(f"Unknown indicator: {name}")
+        ind = REGISTRY[name]
+        inputs = tuple(visit(dep, path + (name,)) for dep in ind.inputs)
+        params = {k: _resolve(v, settings) for k, v in ind.params.items()}
+        key = (ind.func.__module__, ind.func.__qualname__, inputs, tuple(sorted(params.items())))
+        if key in nodes:
+            if name not in nodes[key].names:
+                nodes[key].names.append(name)
+        else:
+            nodes[key] = Node(key=key, names=[name], indicator=ind, inputs=inputs, params=params)
+        return key
+
+    for name in names:
+        visit(name, ())
+    return list(nodes.values())
+
+
+def warmup_bars(nodes: List[Node]) -> int:
+    """Bars of history before a bar that the values of ``nodes`` (from ``plan``) depend on.
+
+    Summed along the longest dependency chain; recursive averages count
+    until their seed weighs less than ``EWM_TOLERANCE``.
+    """
+    need: Dict[tuple, int] = {}
+    for node in nodes:
+        if node.indicator.warmup is not None:
+            own = node.indicator.warmup(**node.params)
+        else:
+            own = max((v for v in node.params.values() if isinstance(v, int) and not isinstance(v, bool)),
+                      default=1)
+        need[node.key] = own + max((need.get(key, 0) for key in node.inputs), default=0)
+    return max(need.values(), default=0)
+
+
+def compute(panel: pd.DataFrame, names: Iterable[str], settings: Optional[dict] = None) -> pd.DataFrame:
+    """Copy of ``panel`` with the ``names`` indicator columns added.
+
+    ``panel`` is a flat frame sorted by (symbol, timestamp) with the OHLCV
+    columns.
+    """
+    names = list(names)
+    ctx = Context(panel["symbol"])
+    nodes = plan(names, settings)
+    values: Dict[tuple, np.ndarray] = {}
+    for node in nodes:
+        args = [
+            panel[key[1]].to_numpy(dtype=float) if key[0] == "column" else values[key]
+            for key in node.inputs
+        ]
+        values[node.key] = np.asarray(node.indicator.func(ctx, *args, **node.params), dtype=float)
+
+    panel = panel.copy()
+    for node in nodes:
+        for name in node.names:
+            if name in names:
+                panel[name] = values[node.key]
+    return panel
+
+
+def required(settings: dict, model=None, features: Iterable[str] = ()) -> List[str]:
+    """Indicators the downstream consumers need.
+
+    The union of the ``indicators`` setting (the dashboard features), the
+    rules' inputs, the registered indicators among ``model``'s feature
+    columns (a ``ModelArtifact`` or a fitted estimator) and ``features``
+    (e.g. the columns a model is about to be trained on). Higher-timeframe
+    columns such as ``rsi_1d`` count as their indicator.
+    """
+    from .intelligence.artifact import ModelArtifact
+    from .intelligence.rules import REQUIRED_COLUMNS
+
+    names = list(settings.get("indicators", ["rsi", "sma_fast", "sma_slow"])) + list(REQUIRED_COLUMNS)
+    if isinstance(model, ModelArtifact):
+        model_columns = list(model.schema.features)
+    else:
+        model_columns = list(getattr(model, "feature_names_in_", []))
+    timeframes = set(settings.get("timeframes", []))
+    for column in [*model_columns, *features]:
+        base, _, suffix = column.rpartition("_")
+        names.append(base if column not in REGISTRY and suffix in timeframes else column)
+    # Keep the configured order, drop duplicates
+    return [n for i, n in enumerate(names) if n in REGISTRY and n not in names[:i]]
+
+
+# Kernels
+
+
+@register("close_diff", inputs=("close",), output=False)
+def close_diff(ctx, close):
+    return ctx.group(close).diff().to_numpy()
+
+
+@register("gain", inputs=("close_diff",), output=False)
+def gain(ctx, diff):
+    return np.where(diff > 0, diff, 0.0)
+
+
+@register("loss", inputs=("close_diff",), output=False)
+def loss(ctx, diff):
+    return np.where(diff < 0, -diff, 0.0)
+
+
+def wilder_mean(ctx, values, window):
+    return ctx.group(values).ewm(alpha=1 / window, min_periods=window, adjust=False).mean().to_numpy()
+
+
+def ewm_warmup(window):
+    return max(window, math.ceil(math.log(EWM_TOLERANCE) / math.log(1 - 1 / window))) if window > 1 else 1
+
+
+def rolling_mean(ctx, values, window):
+    return ctx.group(values).rolling(window).mean().to_numpy()
+
+
+def rolling_std(ctx, values, window):
+    return ctx.group(values).rolling(window).std().to_numpy()
+
+
+register("avg_gain", inputs=("gain",), output=False, warmup=ewm_warmup,
+         window=Setting("rsi_period", 14))(wilder_mean)
+register("avg_loss", inputs=("loss",), output=False, warmup=ewm_warmup,
+         window=Setting("rsi_period", 14))(wilder_mean)
+
+
+@register("rsi", inputs=("avg_gain", "avg_loss"))
+def rsi(ctx, avg_gain, avg_loss):
+    """RSI as in ``ta.momentum.rsi`` with ``fillna=False``."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(avg_loss == 0, 100, 100 - 100 / (1 + avg_gain / avg_loss))
+
+
+register("sma_fast", inputs=("close",), window=Setting("sma_fast_period", 10))(rolling_mean)
+register("sma_slow", inputs=("close",), window=Setting("sma_slow_period", 20))(rolling_mean)
+register("close_std", inputs=("close",), output=False, window=Setting("sma_slow_period", 20))(rolling_std)
+
+
+@register("bb_upper", inputs=("sma_slow", "close_std"), width=Setting("bollinger_width", 2.0))
+def bb_upper(ctx, mid, std, width):
+    return mid + width * std
+
+
+@register("bb_lower", inputs=("sma_slow", "close_std"), width=Setting("bollinger_width", 2.0))
+def bb_lower(ctx, mid, std, width):
+    return mid - width * std
+
+
+@register("returns", inputs=("close",))
+def returns(ctx, close):
+    return ctx.group(close).pct_change().to_numpy()
@@ -1,3 +1,3 @@
-from .predict import predict
+from .predict import predict, predict_table
 
-__all__ = ["predict"] 
\ No newline at end of file
+__all__ = ["predict", "predict_table"] 
\ No newline at end of file
@@ -0,0 +1,119 @@
+"""Model artifact: fitted estimator plus the feature schema it was trained on.
+
+An artifact is a directory holding
+
+* ``schema.json`` - the ordered feature columns, their training dtypes, the
+  estimator class, a version hash of the schema and weights and free-form
+  training metadata;
+* ``weights.joblib`` - the estimator, dumped uncompressed so ``joblib`` can
+  memory-map its numpy arrays (coefficients, tree node arrays) on load.
+
+Loading with ``mmap_mode="r"`` maps the arrays instead of copying them, so
+process-pool workers start quickly and share the pages through the OS page
+cache. At inference the incoming frame is checked against the schema and
+its columns are selected in schema order, a column-wise operation with no
+per-row cost; extra columns are ignored and missing or non-numeric ones
+raise ``SchemaError``.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from dataclasses import dataclass, asdict, field
+from pathlib import Path
+from typing import Dict, List, Optional
+import joblib
+import numpy as np
+import pandas as pd
+
+SCHEMA_FILE = "schema.json"
+WEIGHTS_FILE = "weights.joblib"
+NON_FEATURE_COLUMNS = ("timestamp", "symbol")
+
+
+class SchemaError(ValueError):
+    """Feature frame does not match the schema a model was trained on."""
+
+
+@dataclass
+class FeatureSchema:
+    features: List[str]
+    dtypes: Dict[str, str]
+
+    @classmethod
+    def from_frame(cls, feat_df: pd.DataFrame) -> "FeatureSchema":
+        features = [c for c in feat_df.columns if c not in NON_FEATURE_COLUMNS]
+        return cls(features=features, dtypes={c: str(feat_df[c].dtype) for c in features})
+
+    def matrix(self, feat_df: pd.DataFrame) -> np.ndarray:
+        """``feat_df``'s features in schema order as a float64 matrix."""
+        missing = [c for c in self.features if c not in feat_df.columns]
+        if missing:
+            raise SchemaError(f"Missing feature columns: {missing}")
+        X = feat_df[self.features]
+        non_numeric = [c for c, dtype in X.dtypes.items() if not pd.api.types.is_numeric_dtype(dtype)]
+        if non_numeric:
+            raise SchemaError(f"Non-numeric feature columns: {non_numeric}")
+        return X.to_numpy(dtype=np.float64)
+
+
+@dataclass
+class ModelArtifact:
+    estimator: object
+    schema: FeatureSchema
+    version: str = ""
+    metadata: dict = field(default_factory=dict)  # e.g. training data and CV results
+
+    def predict_proba(self, feat_df: pd.DataFrame) -> np.ndarray:
+        """P(BUY) for every row of ``feat_df``."""
+        return self.estimator.predict_proba(self.schema.matrix(feat_df))[:, 1]
+
+
+def _digest(schema: FeatureSchema, weights: Path) -> str:
+    digest = hashlib.sha1(json.dumps(asdict(schema), sort_keys=True).encode())
+    with open(weights, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def save(artifact: ModelArtifact, path: Path) -> str:
+    """Write ``artifact`` to the directory ``path``, replacing it atomically; return its version."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.parent / f".{path.name}.{uuid.uuid4().hex[:8]}"
+    tmp.mkdir()
+    joblib.dump(artifact.estimator, tmp / WEIGHTS_FILE)
+    version = _digest(artifact.schema, tmp / WEIGHTS_FILE)
+    with open(tmp / SCHEMA_FILE, "w") as f:
+        json.dump({
+            **asdict(artifact.schema),
+            "estimator": type(artifact.estimator).__name__,
+            "version": version,
+            "metadata": artifact.metadata,
+        }, f, indent=2, default=str)
+
+    old = None
+    if path.exists():
+        old = path.parent / f".{path.name}.old.{uuid.uuid4().hex[:8]}"
+        os.rename(path, old)
+    os.rename(tmp, path)
+    if old is not None:
+        shutil.rmtree(old, ignore_errors=True)
+    artifact.version = version
+    return version
+
+
+def load(path: Path, mmap_mode: Optional[str] = "r", verify: bool = False) -> ModelArtifact:
+    """Read an artifact; numpy arrays in the weights are memory-mapped by default."""
+    path = Path(path)
+    with open(path / SCHEMA_FILE) as f:
+        meta = json.load(f)
+    schema = FeatureSchema(features=meta["features"], dtypes=meta["dtypes"])
+    if verify and _digest(schema, path / WEIGHTS_FILE) != meta["version"]:
+        raise SchemaError(f"Artifact {path} does not match its version hash")
+    estimator = joblib.load(path / WEIGHTS_FILE, mmap_mode=mmap_mode)
+    return ModelArtifact(estimator=estimator, schema=schema, version=meta["version"],
+                         metadata=meta.get("metadata", {}))
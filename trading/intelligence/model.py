@@ -1,17 +1,85 @@
 import joblib
 import pathlib
+import threading
+from typing import List
 import pandas as pd
+from . import artifact
+from .artifact import FeatureSchema, ModelArtifact
 
-MODEL_PATH = pathlib.Path(__file__).resolve().parents[2] / "models" / "model.joblib"
+MODEL_DIR = pathlib.Path(__file__).resolve().parents[2] / "models"
+ARTIFACT_PATH = MODEL_DIR / "model"          # artifact directory (schema + weights)
+MODEL_PATH = MODEL_DIR / "model.joblib"      # legacy pickled estimator
 
+# Loaded models by path, with the file version they were loaded at
+_cache = {}
+_cache_lock = threading.Lock()
 
-def load_model():
-    if not MODEL_PATH.exists():
-        raise FileNotFoundError("Model file missing; train it first.")
-    return joblib.load(MODEL_PATH)
+
+def load_model(path: pathlib.Path = None):
+    """Load the model, reusing the in-process copy until the file changes.
+
+    Without ``path`` the artifact in ``models/model`` is preferred, with
+    the legacy ``models/model.joblib`` as a fallback. Artifacts come back as
+    ``ModelArtifact`` with memory-mapped weights.
+    """
+    if path is None:
+        path = ARTIFACT_PATH if (ARTIFACT_PATH / artifact.SCHEMA_FILE).exists() else MODEL_PATH
+    path = pathlib.Path(path)
+    is_artifact = path.is_dir()
+    try:
+        stat = (path / artifact.SCHEMA_FILE if is_artifact else path).stat()
+    except FileNotFoundError:
+        raise FileNotFoundError("Model file missing; train it first.") from None
+    version = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached is None or cached[0] != version:
+            model = artifact.load(path) if is_artifact else joblib.load(path)
+            cached = _cache[path] = (version, model)
+        return cached[1]
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
+
+
+def make_labels(feat_df: pd.DataFrame, horizon: int = 1) -> pd.Series:
+    """1 where a symbol's close is higher ``horizon`` bars later, else 0 (NaN at the tail)."""
+    future = feat_df.groupby("symbol")["close"].shift(-horizon)
+    labels = (future > feat_df["close"]).astype(float)
+    return labels.where(future.notna())
+
+
+def fit(feat_df: pd.DataFrame, labels: pd.Series, estimator=None) -> ModelArtifact:
+    """Fit a binary classifier on the feature columns; rows with missing labels are skipped.
+
+    Returns the estimator as a ``ModelArtifact`` with the feature schema of
+    ``feat_df``, so later inputs are validated and reordered against it.
+    """
+    if estimator is None:
+        from sklearn.linear_model import LogisticRegression
+        estimator = LogisticRegression(max_iter=1000)
+    schema = FeatureSchema.from_frame(feat_df)
+    X = schema.matrix(feat_df)
+    mask = labels.notna().to_numpy() & ~pd.isna(X).any(axis=1)
+    estimator.fit(X[mask], labels[mask].astype(int).to_numpy())
+    return ModelArtifact(estimator=estimator, schema=schema)
+
+
+def feature_columns(model, feat_df: pd.DataFrame) -> List[str]:
+    """Columns of ``feat_df`` the model scores."""
+    if isinstance(model, ModelArtifact):
+        return list(model.schema.features)
+    # Legacy estimators: trust the training column names when sklearn kept them
+    feat_cols = list(getattr(model, "feature_names_in_", []))
+    if not feat_cols:
+        feat_cols = [c for c in feat_df.columns if c not in ("timestamp", "symbol")]
+    return feat_cols
 
 
 def predict_proba(model, feat_df: pd.DataFrame):
-    feat_cols = [c for c in feat_df.columns if c not in ("timestamp", "symbol")]
-    X = feat_df[feat_cols]
+    if isinstance(model, ModelArtifact):
+        return model.predict_proba(feat_df)
+    X = feat_df[feature_columns(model, feat_df)]
     return model.predict_proba(X)[:, 1]  # assume binary classifier returns P(BUY)
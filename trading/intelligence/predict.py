@@ -1,7 +1,7 @@
 from typing import List
+import numpy as np
 import pandas as pd
 from . import rules, model as ml_model
-from dataclasses import asdict
 from pathlib import Path
 import yaml
 
@@ -12,21 +12,45 @@ CONFIG_DIR = Path(__file__).resolve().parents[2] / "config"
 with open(CONFIG_DIR / "settings.yaml", "r") as f:
     settings = yaml.safe_load(f)
 
-def predict(feat_df: pd.DataFrame, use_ml: bool = False) -> List[rules.Signal]:
-    if use_ml:
-        mdl = ml_model.load_model()
-        proba = ml_model.predict_proba(mdl, feat_df)
-        last_rows = feat_df.assign(confidence=proba).iloc[-len(proba):]
-        sigs = []
-        
-        # Get ML thresholds from settings
+def predict_table(feat_df: pd.DataFrame, buy_threshold: float = None, sell_threshold: float = None,
+                  model=None) -> pd.DataFrame:
+    """Score a whole feature panel in one ``predict_proba`` call.
+
+    Returns a signal table (``rules.SIGNAL_COLUMNS``, ordered by timestamp
+    then symbol) with a BUY for every row whose probability is above
+    ``buy_threshold`` and a SELL for every row below ``sell_threshold``.
+    Rows with a missing or non-finite feature are skipped.
+    """
+    if buy_threshold is None:
         buy_threshold = settings.get("ml_confidence_buy_threshold", 0.55)
+    if sell_threshold is None:
         sell_threshold = settings.get("ml_confidence_sell_threshold", 0.45)
-        
-        for _, row in last_rows.iterrows():
-            side = "BUY" if row.confidence > buy_threshold else "SELL" if row.confidence < sell_threshold else None
-            if side:
-                sigs.append(rules.Signal(symbol=row.symbol, side=side, confidence=float(row.confidence), timestamp=row.timestamp))
-        return sigs
+    if feat_df.empty:
+        return rules._empty_signal_table()
+
+    mdl = model if model is not None else ml_model.load_model()
+    # Rows still warming up (NaN indicators) are not scored; most estimators reject NaN
+    columns = [c for c in ml_model.feature_columns(mdl, feat_df) if c in feat_df.columns]
+    scorable = np.isfinite(feat_df[columns].to_numpy(dtype=float)).all(axis=1)
+    if not scorable.all():
+        feat_df = feat_df[scorable]
+        if feat_df.empty:
+            return rules._empty_signal_table()
+    proba = np.asarray(ml_model.predict_proba(mdl, feat_df), dtype=float)
+    side = np.select([proba > buy_threshold, proba < sell_threshold], [0, 1], default=-1)
+    mask = side >= 0
+    table = pd.DataFrame({
+        "timestamp": feat_df["timestamp"].to_numpy()[mask],
+        "symbol": feat_df["symbol"].to_numpy()[mask],
+        "side": pd.Categorical.from_codes(side[mask], categories=rules.SIDES),
+        "confidence": proba[mask],
+    })
+    return table.sort_values(["timestamp", "symbol"], kind="mergesort").reset_index(drop=True)
+
+
+def predict(feat_df: pd.DataFrame, use_ml: bool = False,
+            buy_threshold: float = None, sell_threshold: float = None, model=None) -> List[rules.Signal]:
+    if use_ml:
+        return rules.signals_from_table(predict_table(feat_df, buy_threshold, sell_threshold, model))
     else:
         return rules.generate_signals(feat_df)
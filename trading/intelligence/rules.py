@@ -1,6 +1,7 @@
 from dataclasses import dataclass
+import numpy as np
 import pandas as pd
-from typing import List
+from typing import List, Mapping, Optional
 from pathlib import Path
 import yaml
 
@@ -11,12 +12,28 @@ CONFIG_DIR = Path(__file__).resolve().parents[2] / "config"
 with open(CONFIG_DIR / "settings.yaml", "r") as f:
     settings = yaml.safe_load(f)
 
+SIDES = ["BUY", "SELL"]
+SIGNAL_COLUMNS = ["timestamp", "symbol", "side", "confidence"]
+REQUIRED_COLUMNS = ["sma_fast", "sma_slow"]  # indicators the crossover rule reads
+
 @dataclass
 class Signal:
     symbol: str
     side: str  # "BUY" | "SELL"
     confidence: float
     timestamp: pd.Timestamp
+    price: Optional[float] = None  # reference price (close of the signalling bar)
+
+
+def crossover(prev: Mapping, last: Mapping) -> Optional[str]:
+    """Side of the SMA crossover between two consecutive bars, or None."""
+    # bullish crossover
+    if prev["sma_fast"] < prev["sma_slow"] and last["sma_fast"] > last["sma_slow"]:
+        return "BUY"
+    # bearish crossover
+    if prev["sma_fast"] > prev["sma_slow"] and last["sma_fast"] < last["sma_slow"]:
+        return "SELL"
+    return None
 
 
 def generate_signals(feat_df: pd.DataFrame) -> List[Signal]:
@@ -28,11 +45,61 @@ def generate_signals(feat_df: pd.DataFrame) -> List[Signal]:
         if len(grp) < 2:
             continue
         last = grp.iloc[-1]
-        prev = grp.iloc[-2]
-        # bullish crossover
-        if prev["sma_fast"] < prev["sma_slow"] and last["sma_fast"] > last["sma_slow"]:
-            signals.append(Signal(symbol=sym, side="BUY", confidence=default_confidence, timestamp=last["timestamp"]))
-        # bearish crossover
-        if prev["sma_fast"] > prev["sma_slow"] and last["sma_fast"] < last["sma_slow"]:
-            signals.append(Signal(symbol=sym, side="SELL", confidence=default_confidence, timestamp=last["timestamp"]))
+        side = crossover(grp.iloc[-2], last)
+        if side is not None:
+            price = float(last["close"]) if "close" in last else None
+            signals.append(Signal(symbol=sym, side=side, confidence=default_confidence, timestamp=last["timestamp"],
+                                  price=price))
     return signals
+
+
+def generate_signal_table(feat_df: pd.DataFrame, confidence: float = None) -> pd.DataFrame:
+    """Every SMA crossover across the whole feature history.
+
+    Unlike ``generate_signals`` this looks at all consecutive bar pairs per
+    symbol, so one call covers a full backtest or replay. Returns a table
+    with columns ``timestamp``, ``symbol``, ``side`` (categorical BUY/SELL)
+    and ``confidence``, ordered by timestamp then symbol.
+    """
+    if confidence is None:
+        confidence = settings.get("default_signal_confidence", 0.6)
+    if feat_df.empty:
+        return _empty_signal_table()
+
+    df = feat_df.sort_values(["symbol", "timestamp"], kind="mergesort")
+    symbol = df["symbol"].to_numpy()
+    fast = df["sma_fast"].to_numpy(dtype=float)
+    slow = df["sma_slow"].to_numpy(dtype=float)
+
+    # Compare each bar with the previous bar of the same symbol
+    prev_fast = np.r_[np.nan, fast[:-1]]
+    prev_slow = np.r_[np.nan, slow[:-1]]
+    same_symbol = np.r_[False, symbol[1:] == symbol[:-1]]
+    bullish = same_symbol & (prev_fast < prev_slow) & (fast > slow)
+    bearish = same_symbol & (prev_fast > prev_slow) & (fast < slow)
+    hit = bullish | bearish
+
+    table = pd.DataFrame({
+        "timestamp": df["timestamp"].to_numpy()[hit],
+        "symbol": symbol[hit],
+        "side": pd.Categorical(np.where(bullish[hit], "BUY", "SELL"), categories=SIDES),
+        "confidence": np.full(int(hit.sum()), confidence, dtype=float),
+    })
+    return table.sort_values(["timestamp", "symbol"], kind="mergesort").reset_index(drop=True)
+
+
+def signals_from_table(table: pd.DataFrame) -> List[Signal]:
+    """Convert a signal table into ``Signal`` objects for the executor."""
+    return [
+        Signal(symbol=sym, side=str(side), confidence=float(conf), timestamp=pd.Timestamp(ts))
+        for ts, sym, side, conf in zip(table["timestamp"], table["symbol"], table["side"], table["confidence"])
+    ]
+
+
+def _empty_signal_table() -> pd.DataFrame:
+    return pd.DataFrame({
+        "timestamp": pd.Series(dtype="datetime64[ns]"),
+        "symbol": pd.Series(dtype=object),
+        "side": pd.Categorical([], categories=SIDES),
+        "confidence": pd.Series(dtype=float),
+    })
@@ -0,0 +1,194 @@
+"""Train the signal model and write the artifact ``load_model`` reads.
+
+Bars are loaded with ``BacktestEngine.load_data`` and turned into features
+with ``preprocess.features``, so unchanged symbols come from the feature
+store. Labels are ``model.make_labels`` (next-bar direction by default).
+
+Cross-validation uses expanding time-series folds over the sorted unique
+timestamps, so every symbol at a given bar lands on the same side of the
+split. The last ``horizon`` train bars before each test window are purged
+because their labels look into it. Folds run in parallel on a process
+pool; the final model is then fitted on all rows and saved together with
+the CV metrics and a digest of the training data. Estimators are seeded,
+so rerunning on the same data gives the same artifact weights.
+
+Usage:
+    python -m trading.intelligence.train --start 2024-01-01 --end 2024-06-30 \\
+        [--symbols NSE:TCS-EQ ...] [--estimator random_forest] [--workers 8]
+"""
+
+import argparse
+import hashlib
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Tuple
+import numpy as np
+import pandas as pd
+import yaml
+from . import artifact, model as ml_model
+from .artifact import FeatureSchema, ModelArtifact
+
+logger = logging.getLogger(__name__)
+
+CONFIG_DIR = Path(__file__).resolve().parents[2] / "config"
+
+# Worker state, set once per process by _init_worker
+_X: Optional[np.ndarray] = None
+_Y: Optional[np.ndarray] = None
+_TRAINING: Optional[dict] = None
+
+
+def make_estimator(name: str = "logistic", seed: int = 0, params: Optional[dict] = None):
+    """A fresh, seeded scikit-learn classifier."""
+    params = dict(params or {})
+    if name == "logistic":
+        from sklearn.linear_model import LogisticRegression
+        return LogisticRegression(max_iter=1000, random_state=seed, **params)
+    if name == "random_forest":
+        from sklearn.ensemble import RandomForestClassifier
+        return RandomForestClassifier(random_state=seed, n_jobs=1, **params)
+    if name == "gradient_boosting":
+        from sklearn.ensemble import HistGradientBoostingClassifier
+        return HistGradientBoostingClassifier(random_state=seed, **params)
+    raise ValueError(f"Unknown estimator: {name}")
+
+
+def time_series_folds(timestamps: np.ndarray, n_splits: int = 5,
+                      gap: int = 1) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """Expanding-window (train, test) row indices over the unique ``timestamps``.
+
+    The unique bars are cut into ``n_splits + 1`` blocks; fold k trains on
+    the first k blocks minus the last ``gap`` bars and tests on block k+1.
+    """
+    unique = np.unique(timestamps)
+    block = len(unique) // (n_splits + 1)
+    if block <= gap:
+        raise ValueError(f"Not enough bars ({len(unique)}) for {n_splits} folds")
+    folds = []
+    for k in range(1, n_splits + 1):
+        train_end = unique[k * block - gap]
+        test_start = unique[k * block]
+        test_end = unique[(k + 1) * block] if k < n_splits else None
+        train = np.flatnonzero(timestamps < train_end)
+        in_test = timestamps >= test_start
+        if test_end is not None:
+            in_test &= timestamps < test_end
+        folds.append((train, np.flatnonzero(in_test)))
+    return folds
+
+
+def _init_worker(X: np.ndarray, y: np.ndarray, training: dict):
+    global _X, _Y, _TRAINING
+    _X, _Y, _TRAINING = X, y, training
+
+
+def _run_fold(fold: int, train_idx: np.ndarray, test_idx: np.ndarray) -> dict:
+    """Fit on one fold's train rows and score its test rows."""
+    from sklearn.metrics import accuracy_score, log_loss, roc_auc_score
+
+    estimator = make_estimator(_TRAINING.get("estimator", "logistic"), _TRAINING.get("seed", 0),
+                               _TRAINING.get("params"))
+    estimator.fit(_X[train_idx], _Y[train_idx])
+    proba = estimator.predict_proba(_X[test_idx])[:, 1]
+    y_test = _Y[test_idx]
+    both_classes = len(np.unique(y_test)) == 2
+    return {
+        "fold": fold,
+        "train_rows": len(train_idx),
+        "test_rows": len(test_idx),
+        "accuracy": float(accuracy_score(y_test, proba > 0.5)),
+        "roc_auc": float(roc_auc_score(y_test, proba)) if both_classes else None,
+        "log_loss": float(log_loss(y_test, proba, labels=[0, 1])),
+        "base_rate": float(y_test.mean()),
+    }
+
+
+def _digest(df: pd.DataFrame) -> str:
+    return hashlib.sha1(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes()).hexdigest()[:16]
+
+
+def train(feat_df: pd.DataFrame, training: Optional[dict] = None,
+          max_workers: Optional[int] = None) -> ModelArtifact:
+    """Cross-validate and fit a model on ``feat_df`` (``preprocess.transform`` layout)."""
+    training = dict(training or {})
+    horizon = training.get("horizon", 1)
+    feat_df = feat_df.sort_values(["symbol", "timestamp"], kind="mergesort").reset_index(drop=True)
+    labels = ml_model.make_labels(feat_df, horizon=horizon)
+
+    schema = FeatureSchema.from_frame(feat_df)
+    X = schema.matrix(feat_df)
+    keep = labels.notna().to_numpy() & np.isfinite(X).all(axis=1)
+    X, y = X[keep], labels.to_numpy()[keep].astype(np.int64)
+    timestamps = feat_df["timestamp"].to_numpy()[keep]
+
+    folds = time_series_folds(timestamps, training.get("n_splits", 5), gap=horizon)
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                             initargs=(X, y, training)) as pool:
+        cv = list(pool.map(_run_fold, range(len(folds)), *zip(*folds)))
+    for row in cv:
+        logger.info(f"Fold {row['fold']}: accuracy {row['accuracy']:.3f}, AUC {row['roc_auc']}")
+
+    estimator = make_estimator(training.get("estimator", "logistic"), training.get("seed", 0),
+                               training.get("params"))
+    estimator.fit(X, y)
+    metrics = pd.DataFrame(cv)
+    return ModelArtifact(estimator=estimator, schema=schema, metadata={
+        "training": training,
+        "rows": int(len(y)),
+        "symbols": sorted(feat_df["symbol"].unique()),
+        "start": str(feat_df["timestamp"].min()),
+        "end": str(feat_df["timestamp"].max()),
+        "data_digest": _digest(feat_df),
+        "cv": cv,
+        "cv_mean": {c: float(metrics[c].mean()) for c in ["accuracy", "roc_auc", "log_loss"]
+                    if metrics[c].notna().any()},
+    })
+
+
+def retrain(start: Optional[str] = None, end: Optional[str] = None, symbols: Optional[List[str]] = None,
+            out: Path = None, max_workers: Optional[int] = None,
+            estimator: Optional[str] = None) -> ModelArtifact:
+    """Load bars, compute features, train and save the artifact; the scheduled job."""
+    from .. import preprocess
+    from ..backtest.engine import BacktestEngine
+
+    with open(CONFIG_DIR / "settings.yaml", "r") as f:
+        settings = yaml.safe_load(f)
+    training = dict(settings.get("training", {}))
+    if estimator:
+        training["estimator"] = estimator
+    if start is None and training.get("lookback_days"):
+        end = end or pd.Timestamp.now().normalize()
+        start = pd.Timestamp(end) - pd.Timedelta(days=training["lookback_days"])
+
+    raw = BacktestEngine.load_data(start, end, symbols)
+    feat_df, computed = preprocess.features(raw, extra=training.get("features") or ())
+    logger.info(f"Features for {feat_df['symbol'].nunique()} symbols ({computed} computed)")
+
+    fitted = train(feat_df, training, max_workers=max_workers or training.get("max_workers"))
+    version = artifact.save(fitted, out or ml_model.ARTIFACT_PATH)
+    logger.info(f"Saved model artifact {version}: CV {fitted.metadata['cv_mean']}")
+    return fitted
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Train the signal model with time-series cross-validation")
+    parser.add_argument("--start", help="start date (default: training.lookback_days or backtest.start_date)")
+    parser.add_argument("--end", help="end date (default: today or backtest.end_date)")
+    parser.add_argument("--symbols", nargs="+", help="restrict to these symbols")
+    parser.add_argument("--estimator", choices=["logistic", "random_forest", "gradient_boosting"],
+                        help="override training.estimator")
+    parser.add_argument("--out", type=Path, help="artifact directory (default: models/model)")
+    parser.add_argument("--workers", type=int, help="worker processes for CV folds (default: all cores)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    fitted = retrain(args.start, args.end, args.symbols, args.out, args.workers, args.estimator)
+    print(f"[Train] Saved model {fitted.version} trained on {fitted.metadata['rows']} rows")
+    for name, value in fitted.metadata["cv_mean"].items():
+        print(f"  cv {name}: {value:.4f}")
+
+
+if __name__ == "__main__":
+    main()
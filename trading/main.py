@@ -1,15 +1,24 @@
 import yaml
 import datetime as dt
+import threading
+import pandas as pd
+from apscheduler.events import EVENT_JOB_MAX_INSTANCES, EVENT_JOB_MISSED
 from apscheduler.schedulers.background import BackgroundScheduler
 from pathlib import Path
-from . import datasource, preprocess, intelligence, executor
-from .utils.logging_utils import get_logger, get_pipeline_context
+from . import datasource, preprocess, intelligence, executor, stages
+from .utils.logging_utils import get_logger, PipelineContext
+from .utils.scheduling import RunGuard
 from .utils.pipeline_tracker import PipelineTracker
 from .backtest import BacktestEngine
+from .incremental import IncrementalFeatureEngine
 
 CONFIG_DIR = Path(__file__).resolve().parents[1] / "config"
 logger = get_logger(__name__)
 
+# Long-lived feature state for feature_engine: "incremental", shared by overlapping runs
+_feature_engine = None
+_feature_lock = threading.Lock()
+
 
 def _load_config():
     with open(CONFIG_DIR / "settings.yaml") as f:
@@ -18,29 +27,97 @@ def _load_config():
     return config
 
 
+def _compute_features(raw, cfg):
+    """Compute features with the configured engine (batch transform or incremental)."""
+    global _feature_engine
+    if cfg.get("feature_engine", "batch") != "incremental":
+        return preprocess.transform(raw)
+    with _feature_lock:
+        if _feature_engine is None:
+            _feature_engine = IncrementalFeatureEngine()
+        changed = _feature_engine.update(raw)
+        logger.debug(f"Incremental features updated {len(changed)} bars")
+        return _feature_engine.frame()
+
+
+def _symbol_features(raw, cfg):
+    """Features for one symbol's bars, for the staged pipeline."""
+    global _feature_engine
+    if cfg.get("feature_engine", "batch") != "incremental":
+        return preprocess.features(raw)[0]
+    with _feature_lock:
+        if _feature_engine is None:
+            _feature_engine = IncrementalFeatureEngine()
+        _feature_engine.update(raw)
+        return _feature_engine.frame(raw.index.get_level_values("symbol").unique().tolist())
+
+
+def _run_staged(cfg, tracker):
+    """Run the four steps as concurrent per-symbol stages (``live_pipeline.engine: staged``)."""
+    run = stages.live_pipeline(cfg, lambda raw: _symbol_features(raw, cfg))
+    work = [stages.SymbolWork(sym) for sym in cfg["symbols"]]
+    run.run(work)
+    tracker.save_stage_stats(run.stats())
+    logger.info(f"✓ Stages: {run.stats()}")
+
+    tracker.save_fetch_report([w.fetch.to_dict() for w in work if w.fetch is not None])
+    raw = [w.raw for w in work if w.raw is not None]
+    if not raw:
+        raise RuntimeError("No data fetched!")
+    raw = pd.concat(raw).sort_index()
+    tracker.save_raw_data(raw)
+    if not cfg.get("bar_cache", {}).get("enabled", False) or cfg.get("bar_cache", {}).get("snapshot_csv", True):
+        datasource.save_snapshot(raw, dt.datetime.now())
+    feats = [w.features for w in work if w.features is not None]
+    if feats:
+        tracker.save_features(pd.concat(feats, ignore_index=True))
+    for w in work:
+        for sig in w.signals:
+            tracker.add_signal({
+                "timestamp": sig.timestamp.isoformat(),
+                "symbol": sig.symbol,
+                "side": sig.side,
+                "confidence": sig.confidence
+            })
+        for trade in w.trades:
+            tracker.add_trade(trade)
+    logger.info(f"✓ {sum(len(w.signals) for w in work)} signals, {sum(len(w.trades) for w in work)} trades")
+
+
 def pipeline():
     """Execute one iteration of the trading pipeline"""
-    # Reset pipeline context for new run
-    get_pipeline_context().reset()
+    # Each run logs under its own id and file, even if runs overlap
+    with PipelineContext():
+        _pipeline()
+
+
+def _pipeline():
+    cfg = _load_config()
     tracker = PipelineTracker()
     logger.info(f"Starting pipeline {tracker.pipeline_id}")
     
     try:
+        if cfg.get("live_pipeline", {}).get("engine", "sequential") == "staged":
+            _run_staged(cfg, tracker)
+            tracker.complete_pipeline()
+            return
+
         # Step 1: Fetch market data
         logger.info("Step 1: Fetching market data...")
-        raw = datasource.fetch()
+        raw, fetch_report = datasource.fetch_with_report()
+        tracker.save_fetch_report([r.to_dict() for r in fetch_report])
         tracker.save_raw_data(raw)
         logger.info(f"✓ Fetched data for {len(raw.index.get_level_values('symbol').unique())} symbols")
         
         # Step 2: Compute technical features
         logger.info("Step 2: Computing technical features...")
-        feats = preprocess.transform(raw)
+        feats = _compute_features(raw, cfg)
         tracker.save_features(feats)
         logger.info(f"✓ Generated {len([c for c in feats.columns if c not in ['timestamp', 'symbol']])} features")
         
         # Step 3: Generate trading signals
         logger.info("Step 3: Generating trading signals...")
-        signals = intelligence.predict(feats, use_ml=False)
+        signals = intelligence.predict(feats, use_ml=cfg.get("use_ml", False))
         for sig in signals:
             tracker.add_signal({
                 "timestamp": sig.timestamp.isoformat(),
@@ -52,19 +129,20 @@ def pipeline():
         
         # Step 4: Execute trades
         logger.info("Step 4: Executing trades...")
-        for sig in signals:
-            try:
-                resp = executor.execute([sig])
-                tracker.add_trade({
-                    "signal": {
-                        "timestamp": sig.timestamp.isoformat(),
-                        "symbol": sig.symbol,
-                        "side": sig.side
-                    },
-                    "execution": resp
-                })
-            except Exception as e:
-                logger.error(f"Failed to execute trade for {sig.symbol}: {e}")
+        try:
+            responses = executor.execute(signals)
+        except Exception as e:
+            logger.error(f"Failed to execute {len(signals)} trades: {e}")
+            responses = []
+        for sig, resp in zip(signals, responses):
+            tracker.add_trade({
+                "signal": {
+                    "timestamp": sig.timestamp.isoformat(),
+                    "symbol": sig.symbol,
+                    "side": sig.side
+                },
+                "execution": resp
+            })
         logger.info("✓ Trade execution complete")
         
         tracker.complete_pipeline()
@@ -75,6 +153,29 @@ def pipeline():
         raise
 
 
+def run_stream(cfg):
+    """Streaming live mode: features and rules updated on every bar from the feed."""
+    from . import stream
+    feed = stream.make_feed(cfg)
+    # Hand orders to the background order manager so the bar loop never waits on the broker
+    execute = executor.submit if cfg.get("order_manager", {}).get("enabled", False) else executor.execute
+    streaming = stream.StreamingPipeline(feed, execute=execute, mark_prices=executor.mark_prices)
+    if cfg.get("stream", {}).get("warm_up", True):
+        logger.info("Warming up indicators from history...")
+        streaming.warm_up(datasource.fetch())
+    logger.info("Streaming bars. Press Ctrl+C to exit.")
+    try:
+        bars = streaming.run()
+        logger.info(f"Feed ended after {bars} bars")
+    except KeyboardInterrupt:
+        logger.info("Shutting down...")
+        feed.close()
+    if streaming.latencies_ms:
+        latencies = sorted(streaming.latencies_ms)
+        logger.info(f"Bar-to-executor latency: median {latencies[len(latencies) // 2]:.2f} ms, "
+                    f"max {latencies[-1]:.2f} ms")
+
+
 def run_backtest(start_date: str = None, end_date: str = None, use_ml: bool = False) -> dict:
     """Run backtest mode with historical data."""
     logger.info("Starting backtest mode...")
@@ -125,6 +226,9 @@ def main():
         logger.info("Backtest completed successfully")
         return results
     
+    elif cfg.get("live_engine", "cron") == "stream":
+        run_stream(cfg)
+
     else:
         # Run in live mode
         logger.info("Initializing scheduler...")
@@ -134,10 +238,33 @@ def main():
             cron_expr = cron_expr[5:]  # Remove the 'cron:' prefix
         minute, hour, dom, month, dow = cron_expr.strip().split()
         
-        sched.add_job(pipeline, "cron", 
+        # Overlapping runs are skipped or queued by the guard, not stacked up
+        sched_cfg = cfg.get("scheduler", {})
+        guard = RunGuard(pipeline, max_instances=sched_cfg.get("max_instances", 1),
+                         policy=sched_cfg.get("overlap", "skip"), max_queued=sched_cfg.get("max_queued", 1))
+        sched.add_job(guard, "cron", id="pipeline",
                      minute=minute, hour=hour, 
                      day=dom, month=month, 
-                     day_of_week=dow)
+                     day_of_week=dow,
+                     max_instances=guard.capacity,
+                     coalesce=sched_cfg.get("coalesce", True),
+                     misfire_grace_time=sched_cfg.get("misfire_grace_time", 30))
+        sched.add_listener(
+            lambda event: guard.record_skip("missed" if event.code == EVENT_JOB_MISSED else "scheduler limit")
+            if event.job_id == "pipeline" else None,
+            EVENT_JOB_MISSED | EVENT_JOB_MAX_INSTANCES)
+        
+        # Optional batch retraining of the ML model
+        train_cron = cfg.get("training", {}).get("schedule")
+        if train_cron:
+            from .intelligence import train
+            t_minute, t_hour, t_dom, t_month, t_dow = train_cron.strip().split()
+            sched.add_job(RunGuard(train.retrain), "cron", id="retrain",
+                          minute=t_minute, hour=t_hour,
+                          day=t_dom, month=t_month,
+                          day_of_week=t_dow,
+                          max_instances=2, coalesce=True)
+            logger.info(f"Model retraining scheduled with cron: '{train_cron}'")
         
         sched.start()
         logger.info(f"Scheduler started with cron: '{cron_expr}'")
@@ -145,7 +272,7 @@ def main():
         
         # Run pipeline immediately on startup
         logger.info("Running initial pipeline...")
-        pipeline()
+        guard()
         
         try:
             import time
@@ -154,6 +281,7 @@ def main():
         except KeyboardInterrupt:
             logger.info("Shutting down...")
             sched.shutdown()
+            logger.info(f"Pipeline runs: {guard.metrics()}")
             logger.info("System stopped.")
 
 if __name__ == "__main__":
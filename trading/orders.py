@@ -0,0 +1,328 @@
+"""Non-blocking order submission and an in-memory order book.
+
+``OrderManager.submit`` records the order in the ``OrderBook`` and queues
+it; a background thread drains the queue in batches through the broker's
+``place_orders`` and records the acknowledgements. Fill state is
+reconciled in batches as well: a second thread polls the broker's
+``order_statuses`` for every open order at once, and push sources (an
+order websocket) can hand lists of updates to ``apply_updates``.
+
+Position and exposure checks read ``OrderBook`` instead of calling the
+broker API: ``position`` is the signed filled quantity per symbol and
+``open_quantity`` the signed quantity still working. Working orders are
+indexed separately, so these checks cost the number of open orders, and
+only the last ``keep_closed`` finished orders are kept for lookups.
+"""
+
+import collections
+import itertools
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass, asdict
+from typing import Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PENDING = "PENDING"        # accepted locally, not yet sent
+SUBMITTED = "SUBMITTED"    # acknowledged by the broker, working
+PARTIAL = "PARTIAL"
+FILLED = "FILLED"
+CANCELLED = "CANCELLED"
+REJECTED = "REJECTED"
+TERMINAL = {FILLED, CANCELLED, REJECTED}
+
+
+def is_ok(response) -> bool:
+    """Whether a broker response accepted the order."""
+    return isinstance(response, dict) and (response.get("s") == "ok" or response.get("status") == "ok")
+
+
+@dataclass
+class Order:
+    order_id: str
+    symbol: str
+    side: str              # "BUY" | "SELL"
+    qty: int
+    price: Optional[float] = None  # reference price the order was risk-checked at
+    status: str = PENDING
+    broker_id: Optional[str] = None
+    filled_qty: int = 0
+    avg_price: Optional[float] = None
+    created_at: float = 0.0
+    acked_at: Optional[float] = None
+    updated_at: Optional[float] = None
+    response: Optional[dict] = None
+    error: Optional[str] = None
+
+    @property
+    def sign(self) -> int:
+        return 1 if self.side == "BUY" else -1
+
+    @property
+    def is_open(self) -> bool:
+        return self.status not in TERMINAL
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class OrderBook:
+    """Thread-safe order state indexed by order id, broker id and symbol.
+
+    Finished orders stay available through ``get``/``by_broker_id``/
+    ``for_symbol`` until ``keep_closed`` newer ones have finished.
+    ``on_reject(order)`` is called, outside the lock, for every sent order
+    that ends without filling completely: rejected on submission, or
+    cancelled, rejected or expired later. Its unfilled part is
+    ``order.qty - order.filled_qty``.
+    """
+
+    def __init__(self, keep_closed: int = 10000, on_reject: Callable[[Order], None] = None):
+        self.on_reject = on_reject
+        self._lock = threading.RLock()
+        self._changed = threading.Condition(self._lock)
+        self._orders: Dict[str, Order] = {}
+        self._by_broker_id: Dict[str, str] = {}
+        self._by_symbol: Dict[str, Dict[str, None]] = {}
+        self._open: Dict[str, Dict[str, Order]] = {}  # symbol -> order id -> working order
+        self._closed: "collections.deque[str]" = collections.deque()
+        self.keep_closed = keep_closed
+        self._position: Dict[str, int] = {}
+        self._ids = itertools.count(1)
+
+    def new_order(self, symbol: str, side: str, qty: int, price: Optional[float] = None) -> Order:
+        with self._lock:
+            order = Order(order_id=f"o{next(self._ids)}", symbol=symbol, side=side, qty=qty, price=price,
+                          created_at=time.time())
+            self._orders[order.order_id] = order
+            self._by_symbol.setdefault(symbol, {})[order.order_id] = None
+            self._open.setdefault(symbol, {})[order.order_id] = order
+            return order
+
+    def _close(self, order: Order):
+        """Move a finished order out of the working set, dropping the oldest finished ones."""
+        working = self._open.get(order.symbol)
+        if working is None or working.pop(order.order_id, None) is None:
+            return
+        if not working:
+            del self._open[order.symbol]
+        self._closed.append(order.order_id)
+        while len(self._closed) > self.keep_closed:
+            old = self._orders.pop(self._closed.popleft())
+            self._by_broker_id.pop(old.broker_id, None)
+            same_symbol = self._by_symbol[old.symbol]
+            del same_symbol[old.order_id]
+            if not same_symbol:
+                del self._by_symbol[old.symbol]
+
+    def get(self, order_id: str) -> Optional[Order]:
+        with self._lock:
+            return self._orders.get(order_id)
+
+    def by_broker_id(self, broker_id: str) -> Optional[Order]:
+        with self._lock:
+            order_id = self._by_broker_id.get(str(broker_id))
+            return self._orders.get(order_id) if order_id else None
+
+    def for_symbol(self, symbol: str) -> List[Order]:
+        with self._lock:
+            return [self._orders[i] for i in self._by_symbol.get(symbol, [])]
+
+    def open_orders(self) -> List[Order]:
+        with self._lock:
+            return [o for working in self._open.values() for o in working.values()]
+
+    def position(self, symbol: str) -> int:
+        """Signed filled quantity for ``symbol``."""
+        with self._lock:
+            return self._position.get(symbol, 0)
+
+    def positions(self) -> Dict[str, int]:
+        with self._lock:
+            return {sym: qty for sym, qty in self._position.items() if qty}
+
+    def open_quantity(self, symbol: str) -> int:
+        """Signed quantity of ``symbol`` orders still working (sent or not)."""
+        with self._lock:
+            return sum(o.sign * (o.qty - o.filled_qty) for o in self._open.get(symbol, {}).values())
+
+    def _unfilled(self, orders: List[Order]):
+        if self.on_reject is None:
+            return
+        for order in orders:
+            try:
+                self.on_reject(order)
+            except Exception as e:
+                logger.error(f"[Orders] on_reject failed for {order.order_id}: {e}")
+
+    def acknowledge(self, order: Order, response: dict):
+        """Record the broker's response to a submission."""
+        with self._lock:
+            order.response = response
+            order.acked_at = order.updated_at = time.time()
+            broker_id = response.get("id") if isinstance(response, dict) else None
+            if is_ok(response) and broker_id is not None:
+                order.broker_id = str(broker_id)
+                self._by_broker_id[order.broker_id] = order.order_id
+                order.status = SUBMITTED
+            else:
+                order.status = REJECTED
+                order.error = str(response.get("message", response)) if isinstance(response, dict) else str(response)
+                self._close(order)
+            self._changed.notify_all()
+        if order.status == REJECTED:
+            self._unfilled([order])
+
+    def reject(self, order: Order, reason: str):
+        """Mark an order that was never sent as rejected (``on_reject`` is not called)."""
+        with self._lock:
+            order.status = REJECTED
+            order.error = reason
+            order.updated_at = time.time()
+            self._close(order)
+            self._changed.notify_all()
+
+    def apply_updates(self, updates: Iterable[dict]) -> int:
+        """Apply broker status updates (``id``, ``status``, ``filled_qty``, ``avg_price``); return how many changed an order."""
+        changed = 0
+        unfilled = []
+        with self._lock:
+            now = time.time()
+            for update in updates:
+                order = self.by_broker_id(update["id"])
+                if order is None or not order.is_open:
+                    continue
+                filled = int(update.get("filled_qty", order.filled_qty))
+                status = update.get("status", order.status)
+                if filled == order.filled_qty and status == order.status:
+                    continue
+                self._position[order.symbol] = self._position.get(order.symbol, 0) + \
+                    order.sign * (filled - order.filled_qty)
+                order.filled_qty = filled
+                order.avg_price = update.get("avg_price", order.avg_price)
+                order.status = status
+                order.updated_at = now
+                if not order.is_open:
+                    self._close(order)
+                    if status != FILLED:
+                        unfilled.append(order)
+                changed += 1
+            if changed:
+                self._changed.notify_all()
+        self._unfilled(unfilled)
+        return changed
+
+    def wait(self, order_ids: Iterable[str], statuses=TERMINAL, timeout: float = None) -> bool:
+        """Block until every order is in one of ``statuses``; False on timeout.
+
+        Orders already dropped from the book count as done.
+        """
+        order_ids = list(order_ids)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            while not all(i not in self._orders or self._orders[i].status in statuses for i in order_ids):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._changed.wait(remaining)
+            return True
+
+
+class OrderManager:
+    """Submits orders in the background and keeps ``book`` reconciled with the broker.
+
+    ``broker`` needs ``place_orders(orders) -> responses`` and, for polling,
+    ``order_statuses(broker_ids) -> updates`` (see ``OrderBook.apply_updates``).
+    ``on_reject(order)`` is installed on ``book`` (see ``OrderBook``).
+    """
+
+    def __init__(self, broker, book: OrderBook = None, batch_size: int = 50,
+                 poll_seconds: Optional[float] = 1.0, on_reject: Callable[[Order], None] = None):
+        self.broker = broker
+        self.book = book or OrderBook()
+        if on_reject is not None:
+            self.book.on_reject = on_reject
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self._queue: "queue.Queue[Optional[Order]]" = queue.Queue()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self.batches = 0
+
+    def start(self) -> "OrderManager":
+        if self._threads:
+            return self
+        self._stop.clear()
+        self._threads = [threading.Thread(target=self._submit_loop, name="order-submit", daemon=True)]
+        if self.poll_seconds and hasattr(self.broker, "order_statuses"):
+            self._threads.append(threading.Thread(target=self._poll_loop, name="order-poll", daemon=True))
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self, timeout: float = 5.0):
+        """Send what is queued, then stop the background threads."""
+        self._stop.set()
+        self._queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    def submit(self, symbol: str, side: str, qty: int = 1, price: Optional[float] = None) -> Order:
+        """Queue an order and return it at once (status PENDING)."""
+        order = self.book.new_order(symbol, side, qty, price)
+        self._queue.put(order)
+        return order
+
+    def submit_many(self, orders: Iterable[dict]) -> List[Order]:
+        return [self.submit(o["symbol"], o["side"], o.get("qty", 1), o.get("price")) for o in orders]
+
+    def _submit_loop(self):
+        while True:
+            first = self._queue.get()
+            batch = [] if first is None else [first]
+            while len(batch) < self.batch_size:
+                try:
+                    order = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if order is not None:
+                    batch.append(order)
+            if batch:
+                self._send(batch)
+            if self._stop.is_set() and self._queue.empty():
+                return
+
+    def _send(self, batch: List[Order]):
+        try:
+            responses = self.broker.place_orders(
+                [{"symbol": o.symbol, "side": o.side, "qty": o.qty, "price": o.price} for o in batch])
+        except Exception as e:
+            logger.error(f"[Orders] Batch of {len(batch)} orders failed: {e}")
+            responses = [{"status": "error", "message": str(e)}] * len(batch)
+        for order, resp in zip(batch, responses):
+            self.book.acknowledge(order, resp)
+        self.batches += 1
+
+    def reconcile(self) -> int:
+        """Poll the broker once for all open orders; return how many changed."""
+        broker_ids = [o.broker_id for o in self.book.open_orders() if o.broker_id is not None]
+        if not broker_ids:
+            return 0
+        return self.book.apply_updates(self.broker.order_statuses(broker_ids))
+
+    def _poll_loop(self):
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                self.reconcile()
+            except Exception as e:
+                logger.warning(f"[Orders] Reconcile failed: {e}")
@@ -1,6 +1,9 @@
+import numpy as np
 import pandas as pd
 from pathlib import Path
 import yaml
+from typing import Dict, Iterable, List, Optional, Tuple
+from . import indicators
 
 # Fix path resolution to point to the correct directories
 FEATURE_DIR = Path(__file__).resolve().parents[1] / "data" / "features"
@@ -11,38 +14,230 @@ FEATURE_DIR.mkdir(exist_ok=True, parents=True)
 with open(CONFIG_DIR / "settings.yaml", "r") as f:
     settings = yaml.safe_load(f)
 
-def transform(raw_df: pd.DataFrame) -> pd.DataFrame:
-    """Generate feature set aggregated to 60-minute bars with TA indicators."""
-    import ta
+OHLCV_AGG = {
+    "open": "first",
+    "high": "max",
+    "low": "min",
+    "close": "last",
+    "volume": "sum",
+}
+
+
+def resample_panel(raw_df: pd.DataFrame, freq: str = "1h") -> pd.DataFrame:
+    """Resample every symbol to ``freq`` OHLCV bars in one grouped aggregation.
+
+    Returns a flat frame sorted by (symbol, timestamp) holding only the
+    buckets that contain bars, like ``resample(...).agg(...).dropna()`` per
+    symbol would.
+    """
+    df = raw_df.reset_index() if "timestamp" not in raw_df.columns else raw_df
+    bucket = pd.to_datetime(df["timestamp"]).dt.floor(freq).rename("timestamp")
+    # Sorting by (symbol, timestamp) also orders the buckets and keeps bars in
+    # time order within each one for first/last
+    symbol_codes, _ = pd.factorize(df["symbol"], sort=True)
+    order = np.lexsort((df["timestamp"].to_numpy(), symbol_codes))
+    df = df.iloc[order]
+    hourly = (
+        df[list(OHLCV_AGG)]
+        .groupby([df["symbol"], bucket.iloc[order]], sort=False)
+        .agg(OHLCV_AGG)
+        .dropna()
+    )
+    return hourly.reset_index()
+
 
-    # Get technical analysis parameters from settings
-    rsi_period = settings.get("rsi_period", 14)
-    sma_fast_period = settings.get("sma_fast_period", 10)
-    sma_slow_period = settings.get("sma_slow_period", 20)
+def add_indicators(panel: pd.DataFrame, rsi_period: int, sma_fast_period: int,
+                   sma_slow_period: int, names: Optional[List[str]] = None) -> pd.DataFrame:
+    """Add indicator columns to a (symbol, timestamp) sorted flat panel.
+
+    ``names`` defaults to the indicators the rules, model and dashboard
+    need (``indicators.required``). They are evaluated as one dependency
+    graph with grouped rolling/EWM kernels, so every symbol is processed in
+    a single call per node.
+    """
+    params = dict(settings, rsi_period=rsi_period, sma_fast_period=sma_fast_period,
+                  sma_slow_period=sma_slow_period)
+    if names is None:
+        names = indicators.required(settings)
+    return indicators.compute(panel, names, params)
+
+
+def compute_features(raw_df: pd.DataFrame, rsi_period: int, sma_fast_period: int,
+                     sma_slow_period: int, names: Optional[List[str]] = None) -> pd.DataFrame:
+    """Hourly bars with TA indicators for all symbols, computed panel-wide."""
+    if names is None:
+        names = indicators.required(settings)
+    panel = add_indicators(resample_panel(raw_df), rsi_period, sma_fast_period, sma_slow_period, names)
+    columns = ["timestamp", *OHLCV_AGG, *names, "symbol"]
+    return panel[columns].dropna().reset_index(drop=True)
+
+
+def compute_features_per_symbol(raw_df: pd.DataFrame, rsi_period: int, sma_fast_period: int,
+                                sma_slow_period: int) -> pd.DataFrame:
+    """Reference implementation of ``compute_features`` looping over symbols."""
+    import ta
 
-    # Reset index for processing
     df = raw_df.reset_index()
-    # Resample to hourly OHLCV per symbol
     feats = []
     for sym, grp in df.groupby("symbol"):
         grp = grp.set_index("timestamp").sort_index()
-        hourly = grp.resample("1h").agg({
-            "open": "first",
-            "high": "max",
-            "low": "min",
-            "close": "last",
-            "volume": "sum",
-        }).dropna()
+        hourly = grp.resample("1h").agg(OHLCV_AGG).dropna()
         hourly["rsi"] = ta.momentum.rsi(hourly["close"], window=rsi_period, fillna=False)
         hourly["sma_fast"] = hourly["close"].rolling(sma_fast_period).mean()
         hourly["sma_slow"] = hourly["close"].rolling(sma_slow_period).mean()
         hourly["symbol"] = sym
         feats.append(hourly.dropna())
-    feat_df = pd.concat(feats).reset_index().rename(columns={"index": "timestamp"})
-    
-    # Save as CSV
-    fname = FEATURE_DIR / f"features_{pd.Timestamp.now():%Y%m%d%H%M}.csv"
-    feat_df.to_csv(fname, index=False)
-    print(f"[Preprocess] Saved features to {fname}")
+    return pd.concat(feats).reset_index().rename(columns={"index": "timestamp"})
+
+
+def build_pyramid(raw_df: pd.DataFrame, timeframes: List[str]) -> Dict[str, pd.DataFrame]:
+    """OHLCV bars for every timeframe, each level aggregated from the one below.
+
+    ``timeframes`` are pandas frequencies in ascending order, each a whole
+    multiple of the previous one (e.g. ``["5min", "15min", "1h", "1d"]``).
+    Only the first level reads the minute bars; 15m is built from 5m, 1h
+    from 15m and so on.
+    """
+    deltas = [pd.Timedelta(tf) for tf in timeframes]
+    for lower, higher, tf in zip(deltas, deltas[1:], timeframes[1:]):
+        if higher <= lower or higher % lower:
+            raise ValueError(f"Timeframe {tf} is not a multiple of the one before it")
+    levels: Dict[str, pd.DataFrame] = {}
+    source = raw_df
+    for tf in timeframes:
+        source = levels[tf] = resample_panel(source, tf)
+    return levels
+
+
+def align_timeframes(base: pd.DataFrame, base_tf: str, higher: Dict[str, pd.DataFrame],
+                     columns: List[str]) -> pd.DataFrame:
+    """Join higher-timeframe ``columns`` onto ``base`` without lookahead.
+
+    Bars are labelled by their start, so a bar is complete at label plus its
+    timeframe. Each base bar gets the latest higher-timeframe bar that was
+    complete when the base bar closed; the columns are suffixed with the
+    timeframe (``rsi_1d``).
+    """
+    out = base.assign(_available=base["timestamp"] + pd.Timedelta(base_tf)).sort_values("_available")
+    for tf, frame in higher.items():
+        right = frame[["symbol", "timestamp", *columns]].rename(columns={c: f"{c}_{tf}" for c in columns})
+        right = right.assign(_available=right["timestamp"] + pd.Timedelta(tf)).drop(columns="timestamp")
+        out = pd.merge_asof(out, right.sort_values("_available"), on="_available", by="symbol",
+                            direction="backward")
+    out = out.drop(columns="_available")
+    return out.sort_values(["symbol", "timestamp"], kind="mergesort").reset_index(drop=True)
+
+
+def multi_timeframe_features(raw_df: pd.DataFrame, timeframes: List[str], rsi_period: int,
+                             sma_fast_period: int, sma_slow_period: int,
+                             names: Optional[List[str]] = None) -> pd.DataFrame:
+    """One wide feature frame on ``timeframes[0]`` with every higher timeframe joined on.
+
+    The base timeframe keeps the plain column names, so ``rules`` reads it
+    unchanged; higher timeframes contribute ``close`` and the indicators as
+    ``<column>_<timeframe>`` columns. Feature columns are float64 and
+    volume int64, and rows still warming up on any timeframe are dropped.
+    """
+    if names is None:
+        names = indicators.required(settings)
+    levels = {
+        tf: add_indicators(bars, rsi_period, sma_fast_period, sma_slow_period, names)
+        for tf, bars in build_pyramid(raw_df, timeframes).items()
+    }
+    base_tf, *higher_tfs = timeframes
+    wide = align_timeframes(levels[base_tf], base_tf, {tf: levels[tf] for tf in higher_tfs}, ["close", *names])
+
+    features = [*names, *(f"{c}_{tf}" for tf in higher_tfs for c in ["close", *names])]
+    wide = wide[["timestamp", *OHLCV_AGG, *features, "symbol"]].dropna().reset_index(drop=True)
+    return wide.astype({**{c: "float64" for c in ["open", "high", "low", "close", *features]},
+                        "volume": "int64"})
+
+
+_store = None
+
+
+def _feature_store(store_cfg: dict):
+    """Shared FeatureStore keyed to the current feature code."""
+    global _store
+    if _store is None:
+        from .feature_store import FeatureStore, code_version
+        _store = FeatureStore(
+            max_mb=store_cfg.get("max_mb", 512),
+            max_entries=store_cfg.get("max_entries", 5000),
+            version=code_version([Path(__file__), Path(indicators.__file__)]),
+            block=store_cfg.get("block", "1D"),
+        )
+    return _store
+
+
+def features(raw_df: pd.DataFrame, model=None, extra: Iterable[str] = ()) -> Tuple[pd.DataFrame, int]:
+    """Features for ``raw_df`` with the configured timeframes and indicators.
+
+    The indicators also cover ``model``'s feature columns (by default the
+    saved model when ``use_ml`` is set) and the ``extra`` ones, see
+    ``indicators.required``. With ``feature_store.enabled`` unchanged
+    blocks of each symbol are served from the feature store and only the
+    rest are computed. Returns the features and the number of symbols
+    computed (all of them without the store).
+    """
+    params = dict(
+        rsi_period=settings.get("rsi_period", 14),
+        sma_fast_period=settings.get("sma_fast_period", 10),
+        sma_slow_period=settings.get("sma_slow_period", 20),
+    )
+    timeframes = settings.get("timeframes", ["1h"])
+    if model is None and settings.get("use_ml", False):
+        from .intelligence import model as ml_model
+        model = ml_model.load_model()
+    names = indicators.required(settings, model, extra)
+
+    def compute(raw):
+        if len(timeframes) > 1:
+            return multi_timeframe_features(raw, timeframes, names=names, **params)
+        return compute_features(raw, names=names, **params)
+
+    store_cfg = settings.get("feature_store", {})
+    if not store_cfg.get("enabled", False):
+        feat_df = compute(raw_df)
+        return feat_df, feat_df["symbol"].nunique()
+
+    # Everything the output depends on besides the raw bars
+    nodes = indicators.plan(names, dict(settings, **params))
+    key_params = {
+        "timeframes": timeframes,
+        "indicators": names,
+        "nodes": [[node.names, node.params] for node in nodes],
+    }
+    store = _feature_store(store_cfg)
+    if store.block % pd.Timedelta(timeframes[-1]):
+        raise ValueError(f"feature_store.block {store_cfg.get('block')} is not a multiple of {timeframes[-1]}")
+    return store.get_or_compute(raw_df, compute, key_params, warmup=_warmup(nodes, timeframes, store_cfg))
+
+
+def _warmup(nodes, timeframes: List[str], store_cfg: dict) -> Dict[str, int]:
+    """Bars of each timeframe a feature block needs before its start.
+
+    ``feature_store.warmup`` if set, else what the indicators depend on
+    (``indicators.warmup_bars``), counted in bars rather than clock time
+    so session gaps do not shorten it.
+    """
+    bars = store_cfg.get("warmup") or indicators.warmup_bars(nodes)
+    return {tf: int(bars) for tf in timeframes}
+
+
+def transform(raw_df: pd.DataFrame) -> pd.DataFrame:
+    """Generate feature set aggregated to 60-minute bars with TA indicators.
+
+    With more than one entry in the ``timeframes`` setting the features are
+    the multi-timeframe frame on the first of them instead; see
+    ``features`` for the feature store.
+    """
+    feat_df, computed = features(raw_df)
+
+    # Save as CSV, unless every block was served from the feature store
+    if computed:
+        fname = FEATURE_DIR / f"features_{pd.Timestamp.now():%Y%m%d%H%M}.csv"
+        feat_df.to_csv(fname, index=False)
+        print(f"[Preprocess] Saved features to {fname}")
     
     return feat_df
@@ -0,0 +1,108 @@
+"""Pre-trade risk checks against ``position_limit`` and ``notional_cap``.
+
+``RiskEngine`` keeps two running counters in memory: the signed position
+per symbol (shares, including orders accepted but not yet filled) and the
+notional traded today. ``reserve`` checks an order against both and books
+it in O(1); an order the broker rejects, or the unfilled part of one
+that is cancelled or expires, is handed back with ``release``. The counters are rebuilt from the broker's order history at
+startup (``from_history``), with positions carried over from earlier
+sessions taken from the broker's open positions when it reports them,
+and the daily notional resets when the date changes.
+
+An order needs a reference price for the notional check: the signal's
+price, else the last price seen for the symbol. Orders with neither are
+rejected.
+"""
+
+import datetime as dt
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RiskDecision:
+    accepted: bool
+    reason: str = ""
+    price: Optional[float] = None
+
+
+class RiskEngine:
+    def __init__(self, position_limit: int, notional_cap: float,
+                 today: Callable[[], dt.date] = dt.date.today):
+        self.position_limit = position_limit
+        self.notional_cap = notional_cap
+        self._today = today
+        self._lock = threading.Lock()
+        self.day = today()
+        self.positions: Dict[str, int] = {}
+        self.notional = 0.0
+        self.prices: Dict[str, float] = {}
+        self.rejected = 0
+
+    @classmethod
+    def from_history(cls, rows: Iterable[tuple], position_limit: int, notional_cap: float,
+                     today: Callable[[], dt.date] = dt.date.today,
+                     positions: Optional[Dict[str, int]] = None) -> "RiskEngine":
+        """Engine seeded from past orders as (timestamp, symbol, side, qty, price) rows.
+
+        ``positions`` (signed net quantity per symbol, e.g. the broker's open
+        positions) replaces the positions summed from ``rows``, which only
+        cover the orders the history holds.
+        """
+        engine = cls(position_limit, notional_cap, today)
+        for ts, symbol, side, qty, price in rows:
+            sign = 1 if side == "BUY" else -1
+            if positions is None:
+                engine.positions[symbol] = engine.positions.get(symbol, 0) + sign * qty
+            if price is not None:
+                engine.prices[symbol] = price
+                if ts is not None and dt.datetime.fromisoformat(str(ts)).date() == engine.day:
+                    engine.notional += qty * price
+        if positions is not None:
+            engine.positions = {symbol: qty for symbol, qty in positions.items() if qty}
+        logger.info(f"[Risk] Rebuilt {len(engine.positions)} positions, notional today {engine.notional:.2f}")
+        return engine
+
+    def _roll(self):
+        today = self._today()
+        if today != self.day:
+            self.day = today
+            self.notional = 0.0
+
+    def mark(self, symbol: str, price: float):
+        """Record the latest price for ``symbol``."""
+        self.prices[symbol] = price
+
+    def reserve(self, symbol: str, side: str, qty: int, price: Optional[float] = None) -> RiskDecision:
+        """Accept and book the order, or reject it without changing any counter."""
+        sign = 1 if side == "BUY" else -1
+        with self._lock:
+            self._roll()
+            if price is None:
+                price = self.prices.get(symbol)
+            else:
+                self.prices[symbol] = price
+            if price is None:
+                decision = RiskDecision(False, "no reference price")
+            elif abs(self.positions.get(symbol, 0) + sign * qty) > self.position_limit:
+                decision = RiskDecision(False, f"position limit {self.position_limit} exceeded")
+            elif self.notional + qty * price > self.notional_cap:
+                decision = RiskDecision(False, f"notional cap {self.notional_cap} exceeded")
+            else:
+                self.positions[symbol] = self.positions.get(symbol, 0) + sign * qty
+                self.notional += qty * price
+                return RiskDecision(True, price=price)
+            self.rejected += 1
+        logger.warning(f"[Risk] Rejected {side} {qty} {symbol}: {decision.reason}")
+        return decision
+
+    def release(self, symbol: str, side: str, qty: int, price: float):
+        """Undo the reservation of ``qty`` shares that never reached the market."""
+        sign = 1 if side == "BUY" else -1
+        with self._lock:
+            self.positions[symbol] = self.positions.get(symbol, 0) - sign * qty
+            self.notional = max(self.notional - qty * price, 0.0)
@@ -0,0 +1,213 @@
+"""Live pipeline as concurrent stages connected by bounded queues.
+
+``main.pipeline`` normally runs fetch -> features -> signals -> execute for
+all symbols at once, so one slow history request or order holds up every
+other symbol. ``StagedPipeline`` instead moves one ``SymbolWork`` item per
+symbol through a chain of ``Stage`` objects. Each stage has its own worker
+count and a bounded ``asyncio.Queue`` in front of it; a worker blocks on
+``put`` when the next queue is full, so a slow stage pushes back on the
+ones before it instead of letting work pile up in memory. A symbol moves
+on as soon as its own work is done, independently of the others.
+
+Stage functions are ordinary blocking callables; they run on a thread pool
+sized to the total worker count, so the event loop only schedules. Every
+stage tracks its queue depth, items in flight, processed/failed counts and
+processing time (``StagedPipeline.stats``).
+"""
+
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, List, Optional
+import pandas as pd
+
+from . import datasource, executor, intelligence
+from .barstore import BarStore
+from .datasource import FetchResult
+from .intelligence.rules import Signal
+
+logger = logging.getLogger(__name__)
+
+STAGE_NAMES = ["fetch", "features", "signals", "execute"]
+
+
+class Stage:
+    """One step of a ``StagedPipeline``: ``func(item)`` on ``workers`` threads.
+
+    ``func`` returns the item to pass on, or None to drop it. ``maxsize``
+    bounds the queue in front of the stage (0 is unbounded).
+    """
+
+    def __init__(self, name: str, func: Callable, workers: int = 1, maxsize: int = 0):
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.maxsize = maxsize
+        self.queue: Optional[asyncio.Queue] = None
+        self.in_flight = 0
+        self.processed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self.queue.qsize() if self.queue is not None else 0,
+            "in_flight": self.in_flight,
+            "processed": self.processed,
+            "failed": self.failed,
+            "mean_ms": round(self.busy_seconds / self.processed * 1000, 3) if self.processed else 0.0,
+            "max_ms": round(self.max_seconds * 1000, 3),
+        }
+
+    async def _work(self, pool: ThreadPoolExecutor, out: Optional["Stage"], sink: list, errors: list):
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self.queue.get()
+            self.in_flight += 1
+            t0 = time.perf_counter()
+            try:
+                # Carry the run's context (pipeline id for logging) into the worker thread
+                ctx = contextvars.copy_context()
+                result = await loop.run_in_executor(pool, ctx.run, self.func, item)
+            except Exception as e:
+                self.failed += 1
+                errors.append((self.name, item, e))
+                logger.error(f"[Stages] {self.name} failed for {item}: {e}")
+                result = None
+            else:
+                self.processed += 1
+            finally:
+                elapsed = time.perf_counter() - t0
+                self.busy_seconds += elapsed
+                self.max_seconds = max(self.max_seconds, elapsed)
+                self.in_flight -= 1
+            try:
+                if result is not None:
+                    if out is None:
+                        sink.append(result)
+                    else:
+                        await out.queue.put(result)  # waits while the next stage is full
+            finally:
+                self.queue.task_done()
+
+
+class StagedPipeline:
+    """Moves items through ``stages`` in order; see the module docstring."""
+
+    def __init__(self, stages: List[Stage], monitor_seconds: Optional[float] = None):
+        self.stages = stages
+        self.monitor_seconds = monitor_seconds  # log stats() this often while running
+        self.results: list = []
+        self.errors: list = []
+
+    def stats(self) -> dict:
+        """Per-stage queue depth, items in flight, counts and processing times."""
+        return {stage.name: stage.stats() for stage in self.stages}
+
+    async def _monitor(self):
+        while True:
+            await asyncio.sleep(self.monitor_seconds)
+            logger.info(f"[Stages] {self.stats()}")
+
+    async def run_async(self, items: Iterable) -> list:
+        """Feed ``items`` through every stage; return what the last stage emitted."""
+        self.results, self.errors = [], []
+        for stage in self.stages:
+            stage.queue = asyncio.Queue(maxsize=stage.maxsize)
+        pool = ThreadPoolExecutor(max_workers=sum(stage.workers for stage in self.stages))
+        tasks = []
+        try:
+            for stage, out in zip(self.stages, [*self.stages[1:], None]):
+                tasks.extend(asyncio.create_task(stage._work(pool, out, self.results, self.errors))
+                             for _ in range(stage.workers))
+            if self.monitor_seconds:
+                tasks.append(asyncio.create_task(self._monitor()))
+            for item in items:
+                await self.stages[0].queue.put(item)
+            # Stage k is drained once everything before it is, since only k-1 feeds it
+            for stage in self.stages:
+                await stage.queue.join()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            pool.shutdown(wait=False)
+        return self.results
+
+    def run(self, items: Iterable) -> list:
+        """Blocking ``run_async`` on a fresh event loop."""
+        return asyncio.run(self.run_async(items))
+
+
+@dataclass
+class SymbolWork:
+    """One symbol's pass through the live pipeline."""
+    symbol: str
+    raw: Optional[pd.DataFrame] = None
+    fetch: Optional[FetchResult] = None
+    features: Optional[pd.DataFrame] = None
+    signals: List[Signal] = field(default_factory=list)
+    trades: List[dict] = field(default_factory=list)
+
+    def __repr__(self):
+        return f"SymbolWork({self.symbol})"
+
+
+def live_pipeline(cfg: dict, compute_features: Callable[[pd.DataFrame], pd.DataFrame],
+                  execute: Callable[[List[Signal]], List[dict]] = executor.execute) -> StagedPipeline:
+    """Fetch -> features -> signals -> execute stages for one live run.
+
+    ``compute_features`` maps one symbol's raw bars to its features. Stage
+    worker counts and the queue bound come from the ``live_pipeline``
+    settings; fetches share the ``fetch`` rate limiter and bar store.
+    """
+    stage_cfg = cfg.get("live_pipeline", {})
+    workers = stage_cfg.get("workers", {})
+    maxsize = stage_cfg.get("queue_size", 16)
+
+    start, end = datasource.fetch_window(cfg.get("lookback_hours", 24))
+    fyers = datasource._get_fyers_client()
+    store = BarStore() if cfg.get("bar_cache", {}).get("enabled", False) else None
+    fetch_kwargs = datasource.fetch_settings(cfg)
+    store_lock = threading.Lock()
+
+    def fetch(work: SymbolWork) -> Optional[SymbolWork]:
+        work.raw, work.fetch = datasource.fetch_symbol(fyers, work.symbol, start, end, store=store,
+                                                       store_lock=store_lock, **fetch_kwargs)
+        if work.raw is None:
+            return None
+        return work
+
+    def features(work: SymbolWork) -> Optional[SymbolWork]:
+        work.features = compute_features(work.raw)
+        return work if not work.features.empty else None
+
+    def signals(work: SymbolWork) -> SymbolWork:
+        work.signals = intelligence.predict(work.features, use_ml=cfg.get("use_ml", False))
+        return work
+
+    def execute_signals(work: SymbolWork) -> SymbolWork:
+        if not work.signals:
+            return work
+        try:
+            responses = execute(work.signals)
+        except Exception as e:
+            logger.error(f"Failed to execute trades for {work.symbol}: {e}")
+            return work
+        for sig, resp in zip(work.signals, responses):
+            work.trades.append({
+                "signal": {"timestamp": sig.timestamp.isoformat(), "symbol": sig.symbol, "side": sig.side},
+                "execution": resp,
+            })
+        return work
+
+    funcs = [fetch, features, signals, execute_signals]
+    return StagedPipeline([
+        Stage(name, func, workers=workers.get(name, 1), maxsize=maxsize)
+        for name, func in zip(STAGE_NAMES, funcs)
+    ], monitor_seconds=stage_cfg.get("monitor_seconds"))
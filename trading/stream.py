@@ -0,0 +1,304 @@
+"""Streaming live mode: minute bars from a feed, rules on every bar close.
+
+The cron pipeline in ``main`` re-downloads the lookback window and
+recomputes everything on each tick, so a signal waits for the next cron
+slot plus a full fetch. Here a ``Feed`` pushes minute bars as they form,
+``IncrementalFeatureEngine`` folds each one in at O(1) cost and the SMA
+crossover rule is evaluated as soon as an hourly bar is complete; any
+signal is handed to the executor from the same call.
+
+An hour counts as complete when its last minute arrives (the bar ending on
+the hour). If that minute is missing the hour is evaluated when the first
+bar of the next hour closes it instead.
+
+Feeds:
+
+* ``ReplayFeed`` - replays a raw frame (``datasource.fetch`` layout or a
+  ``data/raw`` CSV), as fast as possible or at a multiple of real time;
+* ``FyersFeed`` - Fyers market-data websocket ticks aggregated into minute
+  bars (needs ``fyers-apiv3``).
+"""
+
+import logging
+import queue
+from abc import ABC, abstractmethod
+import time
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Deque, Dict, Iterator, List, Optional
+import pandas as pd
+import yaml
+
+from . import executor
+from .incremental import IncrementalFeatureEngine
+from .intelligence.rules import Signal, crossover
+
+try:
+    from fyers_apiv3.FyersWebsocket import data_ws
+except ImportError:  # optional: only needed for the live websocket feed
+    data_ws = None
+
+logger = logging.getLogger(__name__)
+
+CONFIG_DIR = Path(__file__).resolve().parents[1] / "config"
+
+# Load settings
+with open(CONFIG_DIR / "settings.yaml", "r") as f:
+    settings = yaml.safe_load(f)
+
+HOUR = pd.Timedelta("1h")
+MINUTE = pd.Timedelta("1min")
+
+
+@dataclass
+class Bar:
+    """One completed minute bar."""
+    symbol: str
+    timestamp: pd.Timestamp
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+
+
+class Feed(ABC):
+    """Source of completed minute bars, in timestamp order per symbol."""
+
+    def subscribe(self, symbols: List[str]):
+        """Restrict the feed to ``symbols``."""
+
+    @abstractmethod
+    def __iter__(self) -> Iterator[Bar]:
+        """Yield completed bars until the feed is closed or exhausted."""
+
+    def close(self):
+        """Stop the feed; iteration ends after the bars already queued."""
+
+
+class ReplayFeed(Feed):
+    """Replays minute bars from a raw frame.
+
+    ``speed`` is a multiple of real time (60 plays one minute per second);
+    None replays without sleeping.
+    """
+
+    def __init__(self, raw_df: pd.DataFrame, speed: Optional[float] = None):
+        df = raw_df.reset_index() if "timestamp" not in raw_df.columns else raw_df
+        self.df = df.sort_values(["timestamp", "symbol"], kind="mergesort")
+        self.speed = speed
+        self.symbols: Optional[List[str]] = None
+        self._closed = False
+
+    @classmethod
+    def from_file(cls, path: Path, speed: Optional[float] = None) -> "ReplayFeed":
+        path = Path(path)
+        if path.suffix == ".parquet":
+            return cls(pd.read_parquet(path), speed)
+        return cls(pd.read_csv(path, parse_dates=["timestamp"]), speed)
+
+    def subscribe(self, symbols: List[str]):
+        self.symbols = list(symbols)
+
+    def __iter__(self) -> Iterator[Bar]:
+        df = self.df if self.symbols is None else self.df[self.df["symbol"].isin(self.symbols)]
+        cols = [df[c].tolist() for c in ("symbol", "open", "high", "low", "close", "volume")]
+        previous = None
+        for ts, sym, o, h, l, c, v in zip(pd.DatetimeIndex(df["timestamp"]), *cols):
+            if self._closed:
+                return
+            if self.speed and previous is not None and ts > previous:
+                time.sleep((ts - previous).total_seconds() / self.speed)
+            previous = ts
+            yield Bar(sym, ts, float(o), float(h), float(l), float(c), v)
+
+    def close(self):
+        self._closed = True
+
+
+class MinuteBarBuilder:
+    """Aggregates trade ticks into minute bars.
+
+    ``cum_volume`` is the day's cumulative traded volume, as exchanges
+    publish it; each bar gets the difference across its minute.
+    """
+
+    def __init__(self):
+        self.partial: Dict[str, dict] = {}
+        self.last_volume: Dict[str, float] = {}
+
+    def add(self, symbol: str, ts: pd.Timestamp, price: float, cum_volume: float) -> Optional[Bar]:
+        """Fold one tick; return the previous minute's bar if this tick closed it."""
+        minute = ts.floor("min")
+        volume = max(cum_volume - self.last_volume.get(symbol, cum_volume), 0.0)
+        self.last_volume[symbol] = cum_volume
+        bar = self.partial.get(symbol)
+        done = None
+        if bar is not None and minute > bar["timestamp"]:
+            done = self._emit(symbol)
+            bar = None
+        if bar is None:
+            self.partial[symbol] = {"timestamp": minute, "open": price, "high": price, "low": price,
+                                    "close": price, "volume": volume}
+        else:
+            bar["high"] = max(bar["high"], price)
+            bar["low"] = min(bar["low"], price)
+            bar["close"] = price
+            bar["volume"] += volume
+        return done
+
+    def flush(self, now: pd.Timestamp) -> List[Bar]:
+        """Emit the bars whose minute ended at or before ``now`` (no tick needed)."""
+        due = [sym for sym, bar in self.partial.items() if bar["timestamp"] + MINUTE <= now]
+        return [self._emit(sym) for sym in sorted(due)]
+
+    def _emit(self, symbol: str) -> Bar:
+        bar = self.partial.pop(symbol)
+        return Bar(symbol=symbol, **bar)
+
+
+class FyersFeed(Feed):
+    """Minute bars built from the Fyers data websocket (``SymbolUpdate`` ticks).
+
+    The websocket calls back on its own thread; ticks are queued and bars
+    are built on the consuming thread. A minute bar is emitted by the first
+    tick of the next minute or, for quiet symbols, ``flush_after`` seconds
+    after the minute ended.
+    """
+
+    def __init__(self, symbols: List[str] = None, flush_after: float = 2.0):
+        if data_ws is None:
+            raise ImportError("Install fyers-apiv3 for the streaming feed: pip install fyers-apiv3")
+        self.symbols = list(symbols or settings["symbols"])
+        self.flush_after = pd.Timedelta(seconds=flush_after)
+        self.builder = MinuteBarBuilder()
+        self._ticks: "queue.Queue" = queue.Queue()
+        self._socket = None
+        self._closed = False
+
+    def subscribe(self, symbols: List[str]):
+        self.symbols = list(symbols)
+
+    def _connect(self):
+        from .datasource import _load_secrets
+        secrets = _load_secrets()
+
+        def on_open():
+            self._socket.subscribe(symbols=self.symbols, data_type="SymbolUpdate")
+            self._socket.keep_running()
+
+        self._socket = data_ws.FyersDataSocket(
+            access_token=f"{secrets['client_id']}:{secrets['access_token']}",
+            litemode=False,
+            reconnect=True,
+            on_connect=on_open,
+            on_message=self._ticks.put,
+            on_error=lambda msg: logger.warning(f"[Stream] Websocket error: {msg}"),
+            on_close=lambda msg: logger.info(f"[Stream] Websocket closed: {msg}"),
+        )
+        self._socket.connect()
+
+    def __iter__(self) -> Iterator[Bar]:
+        self._connect()
+        while not self._closed:
+            try:
+                msg = self._ticks.get(timeout=0.5)
+            except queue.Empty:
+                msg = None
+            if isinstance(msg, dict) and "ltp" in msg and "symbol" in msg:
+                ts = pd.Timestamp(msg.get("last_traded_time") or msg.get("exch_feed_time") or time.time(), unit="s")
+                bar = self.builder.add(msg["symbol"], ts, float(msg["ltp"]), float(msg.get("vol_traded_today", 0)))
+                if bar is not None:
+                    yield bar
+            # Same clock as the history endpoint: epoch seconds as naive timestamps
+            now = pd.Timestamp(time.time(), unit="s") - self.flush_after
+            yield from self.builder.flush(now)
+
+    def close(self):
+        self._closed = True
+        if self._socket is not None:
+            self._socket.close_connection()
+
+
+class StreamingPipeline:
+    """Runs feed bars through the incremental features, rules and executor."""
+
+    def __init__(self, feed: Feed, engine: IncrementalFeatureEngine = None,
+                 execute: Callable[[List[Signal]], object] = executor.execute,
+                 confidence: float = None, bar_interval: pd.Timedelta = MINUTE,
+                 mark_prices: Optional[Callable[[Dict[str, float]], None]] = None):
+        self.feed = feed
+        self.mark_prices = mark_prices  # e.g. executor.mark_prices, so paper fills use the latest bar
+        self.engine = engine or IncrementalFeatureEngine()
+        self.execute = execute
+        self.confidence = confidence if confidence is not None else settings.get("default_signal_confidence", 0.6)
+        self.bar_interval = pd.Timedelta(bar_interval)
+        self.latencies_ms: Deque[float] = deque(maxlen=10000)  # bar arrival to executor hand-off
+        self._evaluated: Dict[str, pd.Timestamp] = {}          # last hour evaluated per symbol
+
+    def warm_up(self, raw_df: pd.DataFrame):
+        """Seed the indicator state with history (``datasource.fetch`` layout)."""
+        self.engine.update(raw_df)
+
+    def on_bar(self, bar: Bar) -> List[Signal]:
+        """Fold in one minute bar; evaluate and execute if it completed an hour."""
+        t0 = time.perf_counter()
+        closed = self.engine.add_bar(bar.symbol, bar.timestamp, bar.open, bar.high, bar.low,
+                                     bar.close, bar.volume)
+        state = self.engine.states[bar.symbol]
+        if self.mark_prices is not None:
+            self.mark_prices({bar.symbol: bar.close})
+        pairs = []
+        # The hour's last minute never arrived: evaluate it now that it is closed
+        if closed is not None and self._evaluated.get(bar.symbol) != closed and len(state.history) >= 2:
+            pairs.append((state.history[-2], state.history[-1]))
+            self._evaluated[bar.symbol] = closed
+        partial = state.partial
+        if (partial is not None and state.history and self._evaluated.get(bar.symbol) != partial["timestamp"]
+                and bar.timestamp + self.bar_interval >= partial["timestamp"] + HOUR):
+            pairs.append((state.history[-1], state.partial_features()))
+            self._evaluated[bar.symbol] = partial["timestamp"]
+
+        signals = []
+        for prev, last in pairs:
+            side = crossover(prev, last)
+            if side is not None:
+                signals.append(Signal(symbol=bar.symbol, side=side, confidence=self.confidence,
+                                      timestamp=last["timestamp"], price=last["close"]))
+        if signals:
+            self.latencies_ms.append((time.perf_counter() - t0) * 1000)
+            logger.info(f"[Stream] {len(signals)} signal(s) for {bar.symbol} at {bar.timestamp} "
+                        f"in {self.latencies_ms[-1]:.2f} ms")
+            try:
+                self.execute(signals)
+            except Exception as e:
+                logger.error(f"[Stream] Failed to execute signals for {bar.symbol}: {e}")
+        return signals
+
+    def run(self, max_bars: int = None) -> int:
+        """Consume the feed until it ends, is closed or ``max_bars`` were seen; return the bar count."""
+        count = 0
+        try:
+            for bar in self.feed:
+                self.on_bar(bar)
+                count += 1
+                if max_bars is not None and count >= max_bars:
+                    break
+        finally:
+            self.feed.close()
+        return count
+
+
+def make_feed(cfg: dict) -> Feed:
+    """Feed selected by the ``stream`` settings."""
+    stream_cfg = cfg.get("stream", {})
+    kind = stream_cfg.get("feed", "fyers")
+    if kind == "replay":
+        feed = ReplayFeed.from_file(stream_cfg["replay_path"], stream_cfg.get("replay_speed"))
+    elif kind == "fyers":
+        feed = FyersFeed(flush_after=stream_cfg.get("flush_after_seconds", 2.0))
+    else:
+        raise ValueError(f"Unknown stream feed: {kind}")
+    feed.subscribe(cfg["symbols"])
+    return feed
@@ -1,5 +1,7 @@
+import contextvars
 import logging
 import sys
+import threading
 from pathlib import Path
 from datetime import datetime
 import uuid
@@ -8,72 +10,119 @@ import uuid
 LOGS_DIR = Path(__file__).resolve().parents[2] / "logs"
 LOGS_DIR.mkdir(exist_ok=True, parents=True)
 
+# Context of the pipeline run executing in the current thread/task
+_current = contextvars.ContextVar("pipeline_context", default=None)
+_setup_lock = threading.Lock()
+_installed = False
+
+
+class _RunFilter(logging.Filter):
+    """Pass only records logged under one pipeline id."""
+
+    def __init__(self, pipeline_id):
+        super().__init__()
+        self.pipeline_id = pipeline_id
+
+    def filter(self, record):
+        return getattr(record, "pipeline_id", None) == self.pipeline_id
+
+
+def _install():
+    """Console handler and the record factory that tags records with the current pipeline id."""
+    global _installed
+    with _setup_lock:
+        if _installed:
+            return
+        console_formatter = logging.Formatter(
+            '%(asctime)s [%(levelname)s] %(name)s - %(message)s',
+            datefmt='%H:%M:%S'
+        )
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setFormatter(console_formatter)
+        console_handler.setLevel(logging.INFO)
+
+        root_logger = logging.getLogger()
+        root_logger.setLevel(logging.DEBUG)
+        root_logger.addHandler(console_handler)
+
+        old_factory = logging.getLogRecordFactory()
+
+        def record_factory(*args, **kwargs):
+            record = old_factory(*args, **kwargs)
+            record.pipeline_id = get_pipeline_context().pipeline_id
+            return record
+        logging.setLogRecordFactory(record_factory)
+        _installed = True
+
+
 class PipelineContext:
+    """Pipeline id and log file of one run.
+
+    Use as a context manager around a run: records logged inside it, also
+    from threads started with a copy of the context, carry its id and go to
+    its own log file, so overlapping runs never share or reset each other's
+    handlers. Outside any run the process-wide default context applies.
+    """
     _instance = None
-    
+
     @classmethod
     def get_instance(cls):
         if cls._instance is None:
             cls._instance = PipelineContext()
+            cls._instance._open()
         return cls._instance
-    
+
     def __init__(self):
-        self.reset()
-    
-    def reset(self):
-        """Reset context for new pipeline run"""
+        _install()
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         self.pipeline_id = f"pipeline_{timestamp}_{uuid.uuid4().hex[:6]}"
         self.log_file = LOGS_DIR / f"{self.pipeline_id}.log"
-        self._setup_logging()
-    
-    def _setup_logging(self):
-        """Setup logging configuration"""
-        # Remove existing handlers
-        logging.getLogger().handlers = []
-        
-        # Create formatters
+        self._handler = None
+        self._token = None
+
+    def reset(self):
+        """Start a new id and log file in place (the default context between runs)"""
+        self._close()
+        self.__init__()
+        self._open()
+
+    def _open(self):
+        """Attach this run's file handler"""
         file_formatter = logging.Formatter(
             '%(asctime)s [%(levelname)s] %(name)s - Pipeline %(pipeline_id)s - %(message)s',
             datefmt='%Y-%m-%d %H:%M:%S'
         )
-        console_formatter = logging.Formatter(
-            '%(asctime)s [%(levelname)s] %(name)s - %(message)s',
-            datefmt='%H:%M:%S'
-        )
-        
-        # File handler
-        file_handler = logging.FileHandler(self.log_file)
-        file_handler.setFormatter(file_formatter)
-        file_handler.setLevel(logging.DEBUG)
-        
-        # Console handler
-        console_handler = logging.StreamHandler(sys.stdout)
-        console_handler.setFormatter(console_formatter)
-        console_handler.setLevel(logging.INFO)
-        
-        # Setup root logger
-        root_logger = logging.getLogger()
-        root_logger.setLevel(logging.DEBUG)
-        root_logger.addHandler(file_handler)
-        root_logger.addHandler(console_handler)
-    
+        self._handler = logging.FileHandler(self.log_file)
+        self._handler.setFormatter(file_formatter)
+        self._handler.setLevel(logging.DEBUG)
+        self._handler.addFilter(_RunFilter(self.pipeline_id))
+        logging.getLogger().addHandler(self._handler)
+
+    def _close(self):
+        if self._handler is not None:
+            logging.getLogger().removeHandler(self._handler)
+            self._handler.close()
+            self._handler = None
+
+    def __enter__(self):
+        self._open()
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, *exc):
+        _current.reset(self._token)
+        self._close()
+        return False
+
     def get_logger(self, name):
-        """Get a logger with pipeline context"""
-        logger = logging.getLogger(name)
-        # Add pipeline_id to all log records
-        old_factory = logging.getLogRecordFactory()
-        def record_factory(*args, **kwargs):
-            record = old_factory(*args, **kwargs)
-            record.pipeline_id = self.pipeline_id
-            return record
-        logging.setLogRecordFactory(record_factory)
-        return logger
+        """Get a logger; records carry the pipeline id of the run they are logged in"""
+        return logging.getLogger(name)
 
 # Global access to pipeline context
 def get_pipeline_context():
-    return PipelineContext.get_instance()
+    """Context of the current run, or the process default outside of runs"""
+    return _current.get() or PipelineContext.get_instance()
 
 def get_logger(name):
     """Convenience function to get a logger"""
-    return get_pipeline_context().get_logger(name) 
\ No newline at end of file
+    return get_pipeline_context().get_logger(name)
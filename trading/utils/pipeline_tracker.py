@@ -43,6 +43,13 @@ class PipelineTracker:
         self._save_metadata()
         logger.debug(f"Saved raw data for {len(self.metadata['raw_data']['symbols'])} symbols")
     
+    def save_fetch_report(self, results):
+        """Save per-symbol fetch results (status, rows, latency, attempts)"""
+        self.metadata["fetch"] = results
+        self._save_metadata()
+        failed = [r["symbol"] for r in results if r["status"] == "error"]
+        logger.debug(f"Saved fetch report for {len(results)} symbols ({len(failed)} failed)")
+    
     def save_features(self, df: pd.DataFrame):
         """Save computed features"""
         file_path = self.pipeline_dir / "features.csv"
@@ -57,6 +64,12 @@ class PipelineTracker:
         self._save_metadata()
         logger.debug(f"Saved features: {', '.join(self.metadata['features']['feature_columns'])}")
     
+    def save_stage_stats(self, stats):
+        """Save per-stage queue depth, counts and processing times"""
+        self.metadata["stages"] = stats
+        self._save_metadata()
+        logger.debug(f"Saved stats for {len(stats)} stages")
+    
     def add_signal(self, signal_dict):
         """Add a trading signal"""
         self.metadata["signals"].append(signal_dict)
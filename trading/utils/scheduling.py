@@ -0,0 +1,105 @@
+import threading
+import time
+from typing import Callable, Optional
+from .logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+POLICIES = ("skip", "queue")
+
+
+class RunGuard:
+    """Limits how many runs of a scheduled job execute at once.
+
+    A tick that arrives while ``max_instances`` runs are active is dropped
+    under ``policy="skip"``; under ``policy="queue"`` it waits for a free
+    slot, with at most ``max_queued`` ticks waiting and any beyond that
+    dropped. Dropped ticks are counted in ``metrics()`` and logged instead of
+    piling up threads and duplicate orders.
+
+    Add the guard itself as the scheduler job with ``max_instances=capacity``
+    so every tick reaches it; ``record_skip`` counts ticks the scheduler
+    drops itself (missed or over its own limit).
+    """
+
+    def __init__(self, func: Callable, name: str = None, max_instances: int = 1, policy: str = "skip",
+                 max_queued: int = 1, clock: Callable[[], float] = time.monotonic):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown overlap policy: {policy}")
+        self.func = func
+        self.name = name or getattr(func, "__name__", "job")
+        self.max_instances = max(1, max_instances)
+        self.policy = policy
+        self.max_queued = max_queued if policy == "queue" else 0
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._active = 0
+        self._waiting = 0
+        self._metrics = {"started": 0, "completed": 0, "failed": 0, "skipped": 0, "queued": 0,
+                         "last_duration_s": None, "max_duration_s": 0.0, "max_wait_s": 0.0}
+
+    @property
+    def capacity(self) -> int:
+        """Ticks that may be inside the guard at once (running or waiting), plus one to reject."""
+        return self.max_instances + self.max_queued + 1
+
+    def metrics(self) -> dict:
+        with self._cond:
+            return dict(self._metrics, active=self._active, waiting=self._waiting)
+
+    def record_skip(self, reason: str = "scheduler"):
+        with self._cond:
+            self._metrics["skipped"] += 1
+            skipped = self._metrics["skipped"]
+        logger.warning(f"[Scheduler] {self.name} tick skipped ({reason}); {skipped} skipped so far")
+
+    def _enter(self) -> Optional[float]:
+        """Take a run slot; return the seconds waited, or None if the tick is dropped."""
+        with self._cond:
+            if self._active < self.max_instances:
+                self._active += 1
+                return 0.0
+            if self._waiting >= self.max_queued:
+                self._metrics["skipped"] += 1
+                skipped = self._metrics["skipped"]
+                reason = f"{self._active} run(s) active"
+            else:
+                self._waiting += 1
+                self._metrics["queued"] += 1
+                t0 = self._clock()
+                while self._active >= self.max_instances:
+                    self._cond.wait()
+                self._waiting -= 1
+                self._active += 1
+                waited = self._clock() - t0
+                self._metrics["max_wait_s"] = max(self._metrics["max_wait_s"], waited)
+                return waited
+        logger.warning(f"[Scheduler] {self.name} tick skipped ({reason}); {skipped} skipped so far")
+        return None
+
+    def __call__(self, *args, **kwargs):
+        waited = self._enter()
+        if waited is None:
+            return None
+        if waited:
+            logger.info(f"[Scheduler] {self.name} started after waiting {waited:.1f}s")
+        t0 = self._clock()
+        with self._cond:
+            self._metrics["started"] += 1
+        try:
+            result = self.func(*args, **kwargs)
+        except Exception:
+            with self._cond:
+                self._metrics["failed"] += 1
+            raise
+        else:
+            with self._cond:
+                self._metrics["completed"] += 1
+            return result
+        finally:
+            duration = self._clock() - t0
+            with self._cond:
+                self._active -= 1
+                self._metrics["last_duration_s"] = duration
+                self._metrics["max_duration_s"] = max(self._metrics["max_duration_s"], duration)
+                self._cond.notify()